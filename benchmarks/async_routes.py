@@ -0,0 +1,117 @@
+# Compares requests/sec of the sync (threadpool) and async creature routes under many concurrent connections.
+# How to run:
+#   poetry run python3 benchmarks/async_routes.py [--connections 500] [--seconds 10]
+# Each mode serves the routes with uvicorn in its own process, and the benchmark drives it with httpx.
+# The sync routes call `cryptid.service.creature` in AnyIO's threadpool (the previous implementation), and
+# the async routes are those of `cryptid.main:app`, which await `cryptid.service.aio.creature`.
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+ROWS: int = 100
+
+
+def serve(mode: str, port: int) -> None:
+    import uvicorn
+    from fastapi import FastAPI, HTTPException
+
+    from cryptid.data.migrate import migrate
+    from cryptid.error import EntityAlreadyExistsError, EntityNotFoundError
+    from cryptid.model.creature import Creature
+    from cryptid.service import creature as service
+
+    migrate()
+    for i in range(ROWS):
+        try:
+            service.create(Creature(name=f"Creature {i}", country="US", area="*"))
+        except EntityAlreadyExistsError:
+            pass
+
+    if mode == "async":
+        from cryptid.main import app
+    else:
+        app = FastAPI()
+
+        # `response_model` is explicit, because the annotations of a local function are unresolvable strings here.
+        @app.get("/creatures/{name}", response_model=Creature)
+        def get_one(name: str):
+            try:
+                return service.get_one(name)
+            except EntityNotFoundError as e:
+                raise HTTPException(status_code=404, detail=str(e))
+
+    uvicorn.run(app, port=port, log_level="warning", backlog=4096)
+
+
+async def drive(port: int, connections: int, seconds: float) -> tuple[int, int]:
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+        deadline = time.monotonic() + seconds
+        ok = errors = 0
+
+        async def loop(i: int) -> None:
+            nonlocal ok, errors
+            while time.monotonic() < deadline:
+                try:
+                    resp = await client.get(f"/creatures/Creature {i % ROWS}")
+                    if resp.status_code == 200:
+                        ok += 1
+                    else:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+
+        await asyncio.gather(*(loop(i) for i in range(connections)))
+        return ok, errors
+
+
+def wait_until_ready(port: int) -> None:
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/creatures/Creature 0", timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server on port {port} not ready")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--connections", type=int, default=500)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--serve", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port)
+        return
+
+    print(f"{'mode':<6} {'connections':>12} {'requests/s':>12} {'errors':>8}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        env = os.environ | {"CRYPTID_SQLITE_DB": str(Path(tmp_dir) / "bench.db")}
+        env.setdefault("CRYPTID_JWT_SECRET_KEY", "benchmark")
+        for mode in ["sync", "async"]:
+            cmd = [sys.executable, __file__, "--serve", mode, "--port", str(args.port)]
+            server = subprocess.Popen(cmd, env=env)
+            try:
+                wait_until_ready(args.port)
+                ok, errors = asyncio.run(drive(args.port, args.connections, args.seconds))
+            finally:
+                server.terminate()
+                server.wait()
+            print(f"{mode:<6} {args.connections:>12} {ok / args.seconds:>12.0f} {errors:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# Measures the creature service on each registered storage backend, which shows the cost of SQLite and the
+# writer against the layers above storage.
+# How to run:
+#   poetry run python3 benchmarks/backends.py [--ops 5000]
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+
+os.environ.setdefault("CRYPTID_SQLITE_DB", ":memory:")
+
+from cryptid.backend import configure  # noqa: E402
+from cryptid.model.creature import Creature, PartialCreature  # noqa: E402
+from cryptid.service import creature as service  # noqa: E402
+
+BACKENDS: tuple[str, ...] = ("sqlite", "memory")
+
+
+def measure(name: str, ops: int) -> None:
+    backend = configure(name)
+    if backend.migrate is not None:
+        backend.migrate()
+    names = [f"{name} {i}" for i in range(ops)]
+    timings = []
+    for op in (
+        lambda n: service.create(Creature(name=n, country="US", area="*")),
+        service.get_one,
+        lambda n: service.modify(n, PartialCreature(area="Himalayas")),
+        lambda n: service.get_all(limit=100, after=n),
+        service.delete,
+    ):
+        start = time.perf_counter()
+        for n in names:
+            op(n)
+        timings.append((time.perf_counter() - start) / ops * 1e6)
+    print(f"{name:<8}" + "".join(f" {t:>11.1f}" for t in timings))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ops", type=int, default=5_000)
+    args = parser.parse_args()
+
+    print(f"{'backend':<8}" + "".join(f" {op + ' (us)':>11}" for op in ("create", "get", "modify", "page", "delete")))
+    for name in BACKENDS:
+        measure(name, args.ops)
+
+
+if __name__ == "__main__":
+    main()
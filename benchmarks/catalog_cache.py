@@ -0,0 +1,47 @@
+# Measures the latency of the catalog reads of the creature service with and without the read-through cache.
+# How to run:
+#   poetry run python3 benchmarks/catalog_cache.py [--reads 20000]
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+
+os.environ.setdefault("CRYPTID_SQLITE_DB", ":memory:")
+
+from cryptid.data.migrate import migrate  # noqa: E402
+from cryptid.model.creature import Creature  # noqa: E402
+from cryptid.service import cache  # noqa: E402
+from cryptid.service import creature as service  # noqa: E402
+
+ROWS: int = 1000
+
+
+def measure(label: str, reads: int) -> None:
+    timings = []
+    for read in (lambda i: service.get_one(f"Creature {i % ROWS}"), lambda i: service.get_all(limit=100)):
+        start = time.perf_counter()
+        for i in range(reads):
+            read(i)
+        timings.append((time.perf_counter() - start) / reads * 1e6)
+    print(f"{label:<8} {timings[0]:>14.2f} {timings[1]:>14.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reads", type=int, default=20_000)
+    args = parser.parse_args()
+
+    migrate()
+    service.create_many([Creature(name=f"Creature {i}", country="US", area="*") for i in range(ROWS)])
+    print(f"{'mode':<8} {'get_one (us)':>14} {'get_all (us)':>14}")
+    cache.creature.one.ttl = cache.creature.pages.ttl = 0
+    measure("uncached", args.reads)
+    cache.creature.one.ttl = cache.creature.pages.ttl = 60
+    measure("cached", args.reads)
+    print(cache.get_cache_stats()["creature.one"])
+
+
+if __name__ == "__main__":
+    main()
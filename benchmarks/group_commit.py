@@ -0,0 +1,102 @@
+# Compares concurrent creature writes with and without the group commit writer.
+# How to run:
+#   poetry run python3 benchmarks/group_commit.py [--writers 32] [--seconds 5] [--profile durable]
+# Each mode runs in a fresh process on a fresh database file, because the data layer reads
+# `CRYPTID_SQLITE_GROUP_COMMIT` when it is imported.
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+
+def run_mode(writers: int, seconds: float) -> dict[str, float]:
+    from cryptid.data import creature
+    from cryptid.data.init import Cursor, get_writer_stats, transaction
+    from cryptid.data.migrate import migrate
+    from cryptid.model.creature import Creature
+
+    migrate()
+
+    @transaction
+    def create(cursor: Cursor, name: str) -> None:
+        creature.create(cursor, Creature(name=name, country="US", area="*"), fetch=False)
+
+    stop = threading.Event()
+    names = itertools.count()
+    counts = {"writes": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def loop() -> None:
+        n = errors = 0
+        while not stop.is_set():
+            try:
+                create(f"Creature {next(names)}")
+                n += 1
+            except Exception:
+                errors += 1
+        with lock:
+            counts["writes"] += n
+            counts["errors"] += errors
+
+    threads = [threading.Thread(target=loop) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    stats = get_writer_stats()
+    return {
+        "writes_per_sec": counts["writes"] / seconds,
+        "errors": counts["errors"],
+        "avg_batch_size": stats.transactions / stats.batches if stats else 1.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writers", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--profile", default="durable")
+    parser.add_argument("--mode", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        result = run_mode(args.writers, args.seconds)
+        print(json.dumps(result))
+        return
+
+    print(f"{'mode':<14} {'writes/s':>12} {'avg batch':>10} {'errors':>8}")
+    for mode in ["per-request", "group-commit"]:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            env = os.environ | {
+                "CRYPTID_SQLITE_DB": str(Path(tmp_dir) / "bench.db"),
+                "CRYPTID_SQLITE_PROFILE": args.profile,
+                "CRYPTID_SQLITE_POOL_SIZE": str(args.writers),
+                "CRYPTID_SQLITE_GROUP_COMMIT": "true" if mode == "group-commit" else "false",
+            }
+            cmd = [
+                sys.executable, __file__,
+                "--mode", mode,
+                "--writers", str(args.writers),
+                "--seconds", str(args.seconds),
+            ]
+            output = subprocess.run(cmd, env=env, check=True, capture_output=True, text=True).stdout
+            result = json.loads(output.splitlines()[-1])
+        print(
+            f"{mode:<14} {result['writes_per_sec']:>12.0f} {result['avg_batch_size']:>10.1f} "
+            f"{result['errors']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# Measures the authentication overhead of a request, verifying its access token into the `AuthUser` of
+# `get_auth_user`, with and without the cache of verified tokens, for a pool of users repeating their tokens.
+# How to run:
+#   poetry run python3 benchmarks/jwt_cache.py [--requests 50000] [--users 100]
+
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import timedelta
+
+from cryptid.service import auth, cache
+
+
+def measure(label: str, tokens: list[str], requests: int) -> None:
+    cache.token.clear()
+    start = time.perf_counter()
+    for i in range(requests):
+        auth.get_user_from_jwt(tokens[i % len(tokens)])
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {elapsed / requests * 1_000_000:>14.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=50000)
+    parser.add_argument("--users", type=int, default=100)
+    args = parser.parse_args()
+
+    tokens = [
+        auth.create_jwt({"sub": f"user{i}", "roles": ["user"]}, expires_in=timedelta(minutes=15)).access
+        for i in range(args.users)
+    ]
+    print(f"{'cache':<10} {'us/request':>14}")
+    max_entries = cache.token.max_entries
+    cache.token.max_entries = 0
+    measure("off", tokens, args.requests)
+    cache.token.max_entries = max_entries
+    measure("on", tokens, args.requests)
+    stats = cache.get_token_cache_stats()
+    print(f"hit rate: {stats.hits / (stats.hits + stats.misses):.1%}")
+
+
+if __name__ == "__main__":
+    main()
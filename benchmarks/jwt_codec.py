@@ -0,0 +1,66 @@
+# Measures the sign and verify throughput of access tokens per algorithm, for python-jose given the raw key on
+# every call (the previous implementation, HS256 only) and for the codec of `cryptid.service.codec` with its keys
+# prepared once.
+# How to run:
+#   poetry run python3 benchmarks/jwt_codec.py [--tokens 5000]
+
+from __future__ import annotations
+
+import argparse
+import os
+import secrets
+import time
+from datetime import UTC, datetime, timedelta
+from typing import Any, Callable
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+
+os.environ.setdefault("CRYPTID_JWT_SECRET_KEY", "benchmark")
+
+from jose import jwt  # noqa: E402
+
+from cryptid.service.codec import JWTCodec  # noqa: E402
+
+
+def rate(func: Callable[[int], Any], count: int) -> float:
+    start = time.perf_counter()
+    for i in range(count):
+        func(i)
+    return count / (time.perf_counter() - start)
+
+
+def measure(label: str, encode: Callable[[dict[str, Any]], str], decode: Callable[[str], Any], count: int) -> None:
+    exp = datetime.now(UTC) + timedelta(minutes=15)
+    claims = [{"sub": f"user{i}", "roles": ["user"], "exp": exp} for i in range(count)]
+    tokens = [encode(c) for c in claims]
+    signs = rate(lambda i: encode(claims[i]), count)
+    verifies = rate(lambda i: decode(tokens[i]), count)
+    print(f"{label:<12} {signs:>12.0f} {verifies:>12.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=5000)
+    args = parser.parse_args()
+
+    secret = secrets.token_urlsafe(32)
+    keys = {
+        "ES256": ec.generate_private_key(ec.SECP256R1()),
+        "EdDSA": ed25519.Ed25519PrivateKey.generate(),
+    }
+    pkcs8 = serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    print(f"{'algorithm':<12} {'signs/sec':>12} {'verifies/sec':>12}")
+    measure(
+        "HS256 (raw)",
+        lambda c: jwt.encode(c, secret, algorithm="HS256"),
+        lambda t: jwt.decode(t, secret, algorithms=["HS256"]),
+        args.tokens,
+    )
+    codecs = [JWTCodec("HS256", secret)] + [JWTCodec(alg, key.private_bytes(*pkcs8)) for alg, key in keys.items()]
+    for codec in codecs:
+        measure(codec.algorithm, codec.encode, codec.decode, args.tokens)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# Measures a one-field PATCH with the single-statement `modify` against the previous read-copy-replace,
+# both for a changed field and for a field that already holds its value. `changes` counts the rows written,
+# including the FTS index rows written by triggers.
+# How to run:
+#   poetry run python3 benchmarks/partial_update.py [--writes 20000]
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from sqlite3 import Cursor
+
+os.environ.setdefault("CRYPTID_SQLITE_DB", ":memory:")
+
+from cryptid.data import creature as data  # noqa: E402
+from cryptid.data.init import get_conn  # noqa: E402
+from cryptid.data.migrate import migrate  # noqa: E402
+from cryptid.model.creature import Creature, PartialCreature  # noqa: E402
+
+
+# The previous implementation of `modify`, which reads the creature, copies the update onto it, and rewrites
+# every column.
+def modify_by_replace(cursor: Cursor, name: str, creature: PartialCreature) -> Creature:
+    updated = data.get_one(cursor, name).model_copy(update=creature.model_dump(exclude_unset=True))
+    return data.replace(cursor, name, updated)
+
+
+def measure(label: str, writes: int, modify) -> None:
+    conn = get_conn()
+    cursor = conn.cursor()
+    names = [f"{label} {i}" for i in range(writes)]
+    cursor.executemany(
+        "INSERT INTO creature (name, country, area, description, aka) VALUES (?, 'US', '*', '', '')",
+        ((name,) for name in names),
+    )
+    timings, changes = [], conn.total_changes
+    for area in ("Himalayas", "Himalayas"):  # the second pass changes nothing
+        start = time.perf_counter()
+        for name in names:
+            modify(cursor, name, PartialCreature(area=area))
+        timings.append(time.perf_counter() - start)
+    changes = conn.total_changes - changes
+    conn.rollback()
+    print(f"{label:<10} {timings[0] / writes * 1e6:>14.1f} {timings[1] / writes * 1e6:>16.1f} {changes:>10}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writes", type=int, default=20_000)
+    args = parser.parse_args()
+
+    migrate()
+    print(f"{'mode':<10} {'changed (us)':>14} {'unchanged (us)':>16} {'changes':>10}")
+    measure("replace", args.writes, modify_by_replace)
+    measure("partial", args.writes, data.modify)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# Measures concurrent logins checking bcrypt passwords in the default thread executor (the previous
+# implementation) and in the process pool of `cryptid.service.hasher`, with the worst delay of a timer
+# on the event loop meanwhile, which is what every other request waits for.
+# How to run:
+#   poetry run python3 benchmarks/password_hashing.py [--logins 64] [--workers 4]
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from cryptid.service.hasher import PasswordHasher, _checkpw, _hashpw
+
+
+async def measure(label: str, logins: int, check) -> None:
+    delays = []
+    done = asyncio.Event()
+
+    async def tick() -> None:
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            delays.append(time.perf_counter() - start - 0.001)
+
+    ticker = asyncio.create_task(tick())
+    start = time.perf_counter()
+    await asyncio.gather(*(check() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await ticker
+    print(f"{label:<8} {logins / elapsed:>12.1f} {max(delays) * 1000:>16.2f}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    hashed = _hashpw("mike1234")
+    hasher = PasswordHasher(workers=args.workers, max_pending=args.logins)
+    await asyncio.to_thread(hasher.warm_up)
+    print(f"{'mode':<8} {'logins/sec':>12} {'loop delay (ms)':>16}")
+    await measure("thread", args.logins, lambda: asyncio.to_thread(_checkpw, "mike1234", hashed))
+    await measure("process", args.logins, lambda: hasher.async_verify_password("mike1234", hashed))
+    hasher.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+# Measures the per-write saving of `INSERT/UPDATE ... RETURNING *` over a write followed by a SELECT.
+# How to run:
+#   poetry run python3 benchmarks/returning.py [--writes 20000]
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from sqlite3 import Cursor
+
+os.environ.setdefault("CRYPTID_SQLITE_DB", ":memory:")
+
+from cryptid.data import creature as data  # noqa: E402
+from cryptid.data.init import get_conn  # noqa: E402
+from cryptid.data.migrate import migrate  # noqa: E402
+from cryptid.model.creature import Creature  # noqa: E402
+
+
+# The previous implementation of `create`, which runs the INSERT and then `get_one`.
+def create_then_select(cursor: Cursor, creature: Creature) -> Creature:
+    sql = """
+    INSERT INTO creature (name, country, area, description, aka)
+    VALUES (:name, :country, :area, :description, :aka)
+    """
+    cursor.execute(sql, data.model_to_dict(creature))
+    return data.get_one(cursor, creature.name)
+
+
+# The previous implementation of `replace`, which runs the UPDATE and then `get_one`.
+def replace_then_select(cursor: Cursor, name: str, creature: Creature) -> Creature:
+    sql = """
+    UPDATE creature
+    SET name = :name,
+        country = :country,
+        area = :area,
+        description = :description,
+        aka = :aka
+    WHERE name = :name_old
+    """
+    params = data.model_to_dict(creature)
+    params["name_old"] = name
+    cursor.execute(sql, params)
+    return data.get_one(cursor, creature.name)
+
+
+def measure(label: str, writes: int, create, replace) -> None:
+    conn = get_conn()
+    cursor = conn.cursor()
+    creatures = [Creature(name=f"{label} {i}", country="US", area="*") for i in range(writes)]
+    start = time.perf_counter()
+    for creature in creatures:
+        create(cursor, creature)
+    created = time.perf_counter() - start
+    start = time.perf_counter()
+    for creature in creatures:
+        replace(cursor, creature.name, creature.model_copy(update={"area": "Himalayas"}))
+    replaced = time.perf_counter() - start
+    conn.rollback()
+    print(f"{label:<10} {created / writes * 1e6:>12.1f} {replaced / writes * 1e6:>12.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writes", type=int, default=20_000)
+    args = parser.parse_args()
+
+    migrate()
+    print(f"{'mode':<10} {'create (us)':>12} {'replace (us)':>12}")
+    measure("select", args.writes, create_then_select, replace_then_select)
+    measure("returning", args.writes, data.create, data.replace)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# Measures the row-to-response cost of `get_all` for creatures and users, comparing the validated decoding of
+# `SELECT *` rows (the previous implementation) with the trusted decoding of explicit columns.
+# How to run:
+#   poetry run python3 benchmarks/row_decoding.py [--rows 100000] [--repeat 3]
+# Each mode fetches and decodes all rows, and then validates and serializes them to JSON like FastAPI does
+# with the response model of a route.
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import time
+from datetime import datetime, timezone
+from sqlite3 import Cursor
+from typing import Any, Callable
+
+os.environ.setdefault("CRYPTID_SQLITE_DB", ":memory:")
+
+from pydantic import TypeAdapter  # noqa: E402
+
+from cryptid.data import creature, user  # noqa: E402
+from cryptid.data.init import get_cursor, transaction  # noqa: E402
+from cryptid.data.migrate import migrate  # noqa: E402
+from cryptid.data.row import from_micros, to_micros  # noqa: E402
+from cryptid.model.creature import Creature  # noqa: E402
+from cryptid.model.user import PublicUser  # noqa: E402
+
+
+# The previous implementation of `cryptid.data.creature.get_all`.
+def get_creatures_validated(cursor: Cursor) -> list[Creature]:
+    cursor.execute("SELECT name, country, area, description, aka, version FROM creature ORDER BY name")
+    return [
+        Creature(name=name, country=country, area=area, description=description, aka=aka, version=version)
+        for name, country, area, description, aka, version in cursor.fetchall()
+    ]
+
+
+# The previous implementation of `cryptid.data.user.get_all`, which also read the password hash.
+def get_users_validated(cursor: Cursor) -> list[PublicUser]:
+    cursor.execute("SELECT id, name, hash, roles, created_at, updated_at, version FROM user ORDER BY id")
+    return [
+        PublicUser(
+            id=str(id_),
+            name=name,
+            roles=json.loads(roles),
+            created_at=from_micros(created_at),
+            updated_at=from_micros(updated_at),
+            version=version,
+        )
+        for id_, name, hash_, roles, created_at, updated_at, version in cursor.fetchall()
+    ]
+
+
+@transaction
+def seed(cursor: Cursor, rows: int) -> None:
+    cursor.executemany(
+        "INSERT INTO creature (name, country, area, description, aka) VALUES (?, 'US', '*', ?, ?)",
+        ((f"Creature {i:06}", f"Description {i}", f"Aka {i}") for i in range(rows)),
+    )
+    now = to_micros(datetime.now(timezone.utc))
+    # A bcrypt hash is 60 characters long.
+    cursor.executemany(
+        "INSERT INTO user (name, hash, roles, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+        ((f"User {i:06}", "$" * 60, '["user"]', now, now) for i in range(rows)),
+    )
+
+
+# Returns the best of `repeat` runs, each with the garbage collector paused, which would otherwise charge
+# its collections of the previous runs to the current one.
+def measure(get_all: Callable[[Cursor], list[Any]], adapter: TypeAdapter, repeat: int) -> tuple[float, float]:
+    cursor = get_cursor()
+    best_decoded = best_serialized = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            items = get_all(cursor)
+            decoded = time.perf_counter() - start
+            start = time.perf_counter()
+            adapter.dump_json(adapter.validate_python(items))
+            serialized = time.perf_counter() - start
+        finally:
+            gc.enable()
+        del items
+        best_decoded, best_serialized = min(best_decoded, decoded), min(best_serialized, serialized)
+    return best_decoded, best_serialized
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    migrate()
+    seed(args.rows)
+    creatures = TypeAdapter(list[Creature])
+    users = TypeAdapter(list[PublicUser])
+    cases = [
+        ("creature", "validated", get_creatures_validated, creatures),
+        ("creature", "trusted", creature.get_all, creatures),
+        ("user", "validated", get_users_validated, users),
+        ("user", "trusted", user.get_all, users),
+    ]
+    print(f"{'entity':<10} {'mode':<10} {'decode (ms)':>12} {'response (ms)':>14} {'total (ms)':>11}")
+    for entity, mode, get_all, adapter in cases:
+        decoded, serialized = measure(get_all, adapter, args.repeat)
+        total = decoded + serialized
+        print(f"{entity:<10} {mode:<10} {decoded * 1e3:>12.0f} {serialized * 1e3:>14.0f} {total * 1e3:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# Measures the write throughput of the sharded backend by shard count, with concurrent threads creating creatures
+# in files of a temporary directory. One shard is the unsharded database, written without group commit, so that
+# each count runs the same transactions.
+# How to run:
+#   poetry run python3 benchmarks/sharding.py [--writes 4000] [--threads 16] [--shards 1 2 4 8]
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+_dir = tempfile.TemporaryDirectory()
+os.environ["CRYPTID_SQLITE_DB"] = os.path.join(_dir.name, "cryptid.db")
+os.environ["CRYPTID_SQLITE_GROUP_COMMIT"] = "false"
+
+from cryptid.backend import configure  # noqa: E402
+from cryptid.data.shard import open_shards  # noqa: E402
+from cryptid.model.creature import Creature  # noqa: E402
+from cryptid.service import creature as service  # noqa: E402
+
+
+def measure(shards: int, writes: int, threads: int) -> None:
+    open_shards(shards).migrate()
+    configure("sharded")
+    names = [f"Creature {shards} {i}" for i in range(writes)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(lambda name: service.create(Creature(name=name, country="US", area="*")), names))
+    elapsed = time.perf_counter() - start
+    print(f"{shards:>6} {writes / elapsed:>12.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writes", type=int, default=4_000)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    print(f"{'shards':>6} {'writes/sec':>12}")
+    for shards in args.shards:
+        measure(shards, args.writes, args.threads)
+
+
+if __name__ == "__main__":
+    main()
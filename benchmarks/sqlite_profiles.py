@@ -0,0 +1,116 @@
+# Compares read/write concurrency on the creature and explorer tables across the SQLite PRAGMA profiles.
+# How to run:
+#   poetry run python3 benchmarks/sqlite_profiles.py [--readers 8] [--seconds 5] [--rows 10000]
+# Each profile runs in a fresh process on a fresh database file, because the data layer applies the profile
+# selected by `CRYPTID_SQLITE_PROFILE` when it is imported.
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+PROFILES: list[str] = ["legacy", "durable", "balanced", "ephemeral"]
+
+
+def run_profile(readers: int, seconds: float, rows: int) -> dict[str, float]:
+    from cryptid.data import creature, explorer
+    from cryptid.data.init import Cursor, query, transaction
+    from cryptid.data.migrate import migrate
+    from cryptid.model.creature import Creature
+    from cryptid.model.explorer import Explorer
+
+    migrate()
+
+    @transaction
+    def seed(cursor: Cursor) -> None:
+        for i in range(rows):
+            creature.create(cursor, Creature(name=f"Creature {i}", country="US", area="*"), fetch=False)
+            explorer.create(cursor, Explorer(name=f"Explorer {i}", country="FR"), fetch=False)
+
+    @query
+    def read(cursor: Cursor, i: int) -> None:
+        creature.get_one(cursor, f"Creature {i}")
+        explorer.get_one(cursor, f"Explorer {i}")
+
+    @transaction
+    def write(cursor: Cursor, i: int) -> None:
+        creature.replace(cursor, f"Creature {i}", Creature(name=f"Creature {i}", country="CN", area=str(i)), fetch=False)
+        explorer.replace(cursor, f"Explorer {i}", Explorer(name=f"Explorer {i}", country="DE"), fetch=False)
+
+    seed()
+    stop = threading.Event()
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def loop(key: str, func) -> None:
+        n = errors = 0
+        while not stop.is_set():
+            try:
+                func(n % rows)
+                n += 1
+            except Exception:
+                errors += 1
+        with lock:
+            counts[key] += n
+            counts["errors"] += errors
+
+    threads = [threading.Thread(target=loop, args=("reads", read)) for _ in range(readers)]
+    threads.append(threading.Thread(target=loop, args=("writes", write)))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return {
+        "reads_per_sec": counts["reads"] / seconds,
+        "writes_per_sec": counts["writes"] / seconds,
+        "errors": counts["errors"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--profile", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.profile:
+        result = run_profile(args.readers, args.seconds, args.rows)
+        print(json.dumps(result))
+        return
+
+    print(f"{'profile':<10} {'reads/s':>12} {'writes/s':>12} {'errors':>8}")
+    for profile in PROFILES:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            env = os.environ | {
+                "CRYPTID_SQLITE_DB": str(Path(tmp_dir) / "bench.db"),
+                "CRYPTID_SQLITE_PROFILE": profile,
+                "CRYPTID_SQLITE_POOL_SIZE": str(args.readers + 1),
+            }
+            cmd = [
+                sys.executable, __file__,
+                "--profile", profile,
+                "--readers", str(args.readers),
+                "--seconds", str(args.seconds),
+                "--rows", str(args.rows),
+            ]
+            output = subprocess.run(cmd, env=env, check=True, capture_output=True, text=True).stdout
+            result = json.loads(output.splitlines()[-1])
+        print(
+            f"{profile:<10} {result['reads_per_sec']:>12.0f} {result['writes_per_sec']:>12.0f} "
+            f"{result['errors']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
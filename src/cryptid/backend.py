@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from functools import partial
+from types import ModuleType
+from typing import Any, AsyncIterator, Callable, Iterator, Protocol
+
+from cryptid.data.init import AsyncTxWrapper, Connection, Cursor, P, R, StreamFunc, TxFunc, TxWrapper
+from cryptid.model.bulk import BulkItem, BulkMode
+from cryptid.model.creature import Creature, CreatureFilter, CreatureHit, PartialCreature
+from cryptid.model.explorer import Explorer, ExplorerFilter, ExplorerHit, PartialExplorer
+from cryptid.model.user import PartialUser, PrivateUser, PublicUser, UserFilter
+
+
+# The storage of each entity, which a backend implements as a module of functions taking the cursor of its
+# runner first. The in-memory backend is passed None.
+class CreatureRepository(Protocol):
+    def create(self, cursor: Cursor, creature: Creature) -> Creature: ...
+
+    def create_many(self, cursor: Cursor, creatures: list[Creature], *, mode: BulkMode = ...) -> list[BulkItem]: ...
+
+    def get_all(
+        self,
+        cursor: Cursor,
+        *,
+        limit: int | None = ...,
+        after: str | None = ...,
+        filters: CreatureFilter | None = ...,
+    ) -> list[Creature]: ...
+
+    def iter_all(self, cursor: Cursor, *, filters: CreatureFilter | None = ...) -> Iterator[Creature]: ...
+
+    def search(
+        self,
+        cursor: Cursor,
+        text: str,
+        *,
+        limit: int | None = ...,
+        after: tuple[float, str] | None = ...,
+    ) -> list[CreatureHit]: ...
+
+    def get_one(self, cursor: Cursor, name: str) -> Creature: ...
+
+    def replace(self, cursor: Cursor, name: str, creature: Creature, *, version: int | None = ...) -> Creature: ...
+
+    def modify(
+        self,
+        cursor: Cursor,
+        name: str,
+        creature: PartialCreature,
+        *,
+        version: int | None = ...,
+    ) -> Creature: ...
+
+    def delete(self, cursor: Cursor, name: str, *, version: int | None = ...) -> None: ...
+
+
+class ExplorerRepository(Protocol):
+    def create(self, cursor: Cursor, explorer: Explorer) -> Explorer: ...
+
+    def create_many(self, cursor: Cursor, explorers: list[Explorer], *, mode: BulkMode = ...) -> list[BulkItem]: ...
+
+    def get_all(
+        self,
+        cursor: Cursor,
+        *,
+        limit: int | None = ...,
+        after: str | None = ...,
+        filters: ExplorerFilter | None = ...,
+    ) -> list[Explorer]: ...
+
+    def iter_all(self, cursor: Cursor, *, filters: ExplorerFilter | None = ...) -> Iterator[Explorer]: ...
+
+    def search(
+        self,
+        cursor: Cursor,
+        text: str,
+        *,
+        limit: int | None = ...,
+        after: tuple[float, str] | None = ...,
+    ) -> list[ExplorerHit]: ...
+
+    def get_one(self, cursor: Cursor, name: str) -> Explorer: ...
+
+    def replace(self, cursor: Cursor, name: str, explorer: Explorer, *, version: int | None = ...) -> Explorer: ...
+
+    def modify(
+        self,
+        cursor: Cursor,
+        name: str,
+        explorer: PartialExplorer,
+        *,
+        version: int | None = ...,
+    ) -> Explorer: ...
+
+    def delete(self, cursor: Cursor, name: str, *, version: int | None = ...) -> None: ...
+
+
+class UserRepository(Protocol):
+    def create(self, cursor: Cursor, user: PrivateUser) -> PublicUser: ...
+
+    def get_all(
+        self,
+        cursor: Cursor,
+        *,
+        limit: int | None = ...,
+        after: str | tuple[datetime, str] | None = ...,
+        role: str | None = ...,
+        filters: UserFilter | None = ...,
+    ) -> list[PublicUser]: ...
+
+    def iter_all(
+        self,
+        cursor: Cursor,
+        *,
+        role: str | None = ...,
+        filters: UserFilter | None = ...,
+    ) -> Iterator[PublicUser]: ...
+
+    def get_one(self, cursor: Cursor, id_: str, *, public: bool = ...) -> PublicUser | PrivateUser: ...
+
+    def replace(self, cursor: Cursor, id_: str, user: PublicUser, *, version: int | None = ...) -> PublicUser: ...
+
+    def modify(self, cursor: Cursor, id_: str, user: PartialUser, *, version: int | None = ...) -> PublicUser: ...
+
+    # Moves the user to the deleted users.
+    def delete(self, cursor: Cursor, id_: str, *, version: int | None = ...) -> None: ...
+
+    def delete_many(self, cursor: Cursor, ids: list[str]) -> list[str]: ...
+
+
+class DeletedUserRepository(Protocol):
+    def get_all(
+        self,
+        cursor: Cursor,
+        *,
+        limit: int | None = ...,
+        after: str | tuple[datetime, str] | None = ...,
+        role: str | None = ...,
+        filters: UserFilter | None = ...,
+    ) -> list[PublicUser]: ...
+
+    def iter_all(
+        self,
+        cursor: Cursor,
+        *,
+        role: str | None = ...,
+        filters: UserFilter | None = ...,
+    ) -> Iterator[PublicUser]: ...
+
+    def get_one(self, cursor: Cursor, id_: str, *, public: bool = ...) -> PublicUser | PrivateUser: ...
+
+    def purge(self, cursor: Cursor, *, before: datetime, limit: int) -> int: ...
+
+
+# A storage engine. `runner` provides the decorators of `cryptid.data.init`, which run a repository function
+# with a cursor of the engine, within a transaction or not. `migrate` creates the schema, if the engine has one.
+# `change_logs` returns a connect function per database of the engine that other processes write, whose
+# `change_log` the caches follow.
+@dataclass(frozen=True)
+class Backend:
+    name: str
+    runner: ModuleType
+    creature: CreatureRepository
+    explorer: ExplorerRepository
+    user: UserRepository
+    xuser: DeletedUserRepository
+    migrate: Callable[[], Any] | None = None
+    change_logs: Callable[[], list[Callable[[], Connection]]] | None = None
+
+
+_factories: dict[str, Callable[[], Backend]] = {}
+_backends: dict[str, Backend] = {}
+_backend: Backend | None = None
+
+
+# Registers an engine under `name`. The factory runs on the first `configure(name)`, so the modules of
+# the engines that are not used are never imported.
+def register(name: str, factory: Callable[[], Backend]) -> None:
+    _factories[name] = factory
+    _backends.pop(name, None)
+
+
+# Selects the backend of the services, by default the one named in `CRYPTID_STORAGE_BACKEND`.
+def configure(name: str | None = None) -> Backend:
+    global _backend
+    if name is None:
+        name = os.getenv("CRYPTID_STORAGE_BACKEND", default="sqlite")
+    if (backend := _backends.get(name)) is None:
+        if (factory := _factories.get(name)) is None:
+            raise ValueError(f"storage backend must be one of {sorted(_factories)}, but got '{name}'")
+        backend = _backends[name] = factory()
+    _backend = backend
+    return backend
+
+
+def get_backend() -> Backend:
+    return _backend or configure()
+
+
+def _sqlite() -> Backend:
+    from cryptid.data import creature, explorer, init, migrate, user, xuser
+    return Backend(
+        "sqlite",
+        init,
+        creature,
+        explorer,
+        user,
+        xuser,
+        migrate=migrate.migrate,
+        change_logs=lambda: [partial(init.get_conn, new=True)],
+    )
+
+
+# `creature` and `explorer` spread over the shards of `cryptid.data.shard`, and the users in the main database.
+def _sharded() -> Backend:
+    from cryptid.data import shard, sharded
+    return Backend(
+        "sharded",
+        shard,
+        sharded.creature,
+        sharded.explorer,
+        sharded.user,
+        sharded.xuser,
+        migrate=shard.migrate,
+        change_logs=shard.change_logs,
+    )
+
+
+def _memory() -> Backend:
+    from cryptid.fake.data import creature, explorer, init, user, xuser
+    return Backend("memory", init, creature, explorer, user, xuser)
+
+
+register("sqlite", _sqlite)
+register("sharded", _sharded)
+register("memory", _memory)
+
+
+# The service counterparts of the decorators of `cryptid.data.init`, which run `func` with the runner of
+# the backend configured at the time of the call. Each runner wraps `func` once, on its first call.
+def _dispatch(decorator: str, func: Callable[..., Any]) -> Callable[..., Any]:
+    wrapped: dict[ModuleType, Callable[..., Any]] = {}
+
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        runner = get_backend().runner
+        if (run := wrapped.get(runner)) is None:
+            run = wrapped[runner] = getattr(runner, decorator)(func)
+        return run(*args, **kwargs)
+    return wrapper
+
+
+def transaction(func: TxFunc) -> TxWrapper:
+    return _dispatch("transaction", func)
+
+
+def query(func: TxFunc) -> TxWrapper:
+    return _dispatch("query", func)
+
+
+def stream(func: StreamFunc) -> Callable[P, Iterator[R]]:
+    return _dispatch("stream", func)
+
+
+def async_transaction(func: TxFunc) -> AsyncTxWrapper:
+    return _dispatch("async_transaction", func)
+
+
+def async_query(func: TxFunc) -> AsyncTxWrapper:
+    return _dispatch("async_query", func)
+
+
+def async_stream(func: StreamFunc) -> Callable[P, AsyncIterator[R]]:
+    return _dispatch("async_stream", func)
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from sqlite3 import Connection
+from typing import Callable
+
+__all__ = [
+    "ChangeStats",
+    "ChangeWatcher",
+    "subscribe",
+]
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# Called with the changed keys of a table, or None if changes may have been missed and every key is suspect.
+Listener = Callable[[set[str] | None], None]
+
+_listeners: dict[str, list[Listener]] = {}
+
+
+# Registers `listener` for the changes of `table` (creature, explorer or user) by any process.
+def subscribe(table: str, listener: Listener) -> None:
+    _listeners.setdefault(table, []).append(listener)
+
+
+def _notify(table: str, keys: set[str] | None) -> None:
+    for listener in _listeners.get(table, []):
+        listener(keys)
+
+
+@dataclass(frozen=True)
+class ChangeStats:
+    polls: int
+    changes: int  # the logged writes read
+    resets: int  # the times the log was trimmed past the last read change, and everything was invalidated
+    lag_last: float  # seconds from the last write read to its invalidation
+    lag_max: float  # seconds
+    lag_total: float  # seconds
+
+
+class _Log:
+    def __init__(self, conn: Connection) -> None:
+        self.conn = conn
+        self.data_version = -1
+        self.seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log").fetchone()[0]
+
+
+# Follows the `change_log` of each database, written by the triggers of migration 9, and notifies the listeners
+# of the keys written since the last poll, by this process or any other. `PRAGMA data_version` of a connection
+# only changes when another connection committed, and is read from the shared memory of the WAL, so an idle
+# poll costs no query of the log. Each database is followed with a dedicated connection from `connect`.
+class ChangeWatcher:
+    def __init__(self, connects: list[Callable[[], Connection]], *, interval: float = 0.005) -> None:
+        self.interval = interval
+        self._logs = [_Log(connect()) for connect in connects]
+        self._polls = 0
+        self._changes = 0
+        self._resets = 0
+        self._lag_last = 0.0
+        self._lag_max = 0.0
+        self._lag_total = 0.0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="cryptid-changes", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        for log in self._logs:
+            log.conn.close()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                self.poll()
+            except Exception:
+                logger.warning("failed to poll the change log", exc_info=True)
+
+    # Reads the changes of every database since the last poll, and returns their number.
+    def poll(self) -> int:
+        changes = 0
+        for log in self._logs:
+            if (data_version := log.conn.execute("PRAGMA data_version").fetchone()[0]) == log.data_version:
+                continue
+            log.data_version = data_version
+            changes += self._read(log)
+        with self._lock:
+            self._polls += 1
+        return changes
+
+    def _read(self, log: _Log) -> int:
+        rows = log.conn.execute(
+            "SELECT seq, tbl, key, at FROM change_log WHERE seq > :seq ORDER BY seq",
+            {"seq": log.seq},
+        ).fetchall()
+        if not rows:
+            return 0
+        keys: dict[str, set[str]] = {}
+        for _, table, key, _ in rows:
+            keys.setdefault(table, set()).add(key)
+        # The log keeps only its last rows, so a gap after the last read change means some were trimmed unread.
+        missed = rows[0][0] > log.seq + 1
+        for table in _listeners if missed else keys:
+            _notify(table, None if missed else keys.get(table, set()))
+        log.seq = rows[-1][0]
+        lag = max(0.0, time.time() - rows[-1][3] / 1_000_000)
+        with self._lock:
+            self._changes += len(rows)
+            self._resets += missed
+            self._lag_last = lag
+            self._lag_max = max(self._lag_max, lag)
+            self._lag_total += lag
+        return len(rows)
+
+    def stats(self) -> ChangeStats:
+        with self._lock:
+            return ChangeStats(
+                polls=self._polls,
+                changes=self._changes,
+                resets=self._resets,
+                lag_last=self._lag_last,
+                lag_max=self._lag_max,
+                lag_total=self._lag_total,
+            )
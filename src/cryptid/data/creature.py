@@ -1,49 +1,44 @@
 from __future__ import annotations
 
-from typing import Any, TypeAlias
+import json
+from typing import Any, Iterator, TypeAlias
 
-from cryptid.data.init import Cursor, IntegrityError, is_unique_constraint_failed, transaction_with
-from cryptid.error import EntityAlreadyExistsError, EntityNotFoundError
-from cryptid.model.creature import Creature, PartialCreature
+from cryptid.data import fts
+from cryptid.data.init import Cursor, IntegrityError, is_unique_constraint_failed
+from cryptid.data.patch import set_changed
+from cryptid.data.row import construct
+from cryptid.error import EntityAlreadyExistsError, EntityNotFoundError, VersionMismatchError
+from cryptid.model.bulk import BulkItem, BulkMode
+from cryptid.model.creature import Creature, CreatureFilter, CreatureHit, PartialCreature
 
-Row: TypeAlias = tuple[str, str, str, str, str]
+Row: TypeAlias = tuple[str, str, str, str, str, int]
 
+COLUMNS: str = "name, country, area, description, aka, version"  # the order of `Row`
 
-@transaction_with(new_conn=False)
-def _create_table(cursor: Cursor) -> None:
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS creature (
-        name TEXT PRIMARY KEY,
-        country TEXT NOT NULL,
-        area TEXT NOT NULL,
-        description TEXT NOT NULL,
-        aka TEXT NOT NULL
-    )
-    """)
-
-
-_create_table()
+_AT_VERSION: str = "AND version = :version"
 
 
 def model_to_dict(creature: Creature) -> dict[str, Any]:
-    return creature.model_dump()
+    return creature.model_dump(exclude={"version"})
 
 
 def row_to_model(row: Row) -> Creature:
-    name, country, area, description, aka = row
-    return Creature(
-        name=name,
-        country=country,
-        area=area,
-        description=description,
-        aka=aka,
-    )
+    name, country, area, description, aka, version = row
+    return construct(Creature, {
+        "name": name,
+        "country": country,
+        "area": area,
+        "description": description,
+        "aka": aka,
+        "version": version,
+    })
 
 
 def create(cursor: Cursor, creature: Creature, *, fetch: bool = True) -> Creature | None:
-    sql = """
+    sql = f"""
     INSERT INTO creature (name, country, area, description, aka)
     VALUES (:name, :country, :area, :description, :aka)
+    RETURNING {COLUMNS}
     """
     try:
         cursor.execute(sql, model_to_dict(creature))
@@ -51,21 +46,126 @@ def create(cursor: Cursor, creature: Creature, *, fetch: bool = True) -> Creatur
         if is_unique_constraint_failed(e):
             raise EntityAlreadyExistsError(entity="creature", key=creature.name)
         raise e
-    return get_one(cursor, creature.name) if fetch else None
+    row = cursor.fetchone()
+    return row_to_model(row) if fetch else None
 
 
-def get_all(cursor: Cursor) -> list[Creature]:
+# Writes all `creatures` with one `executemany`, and reports the outcome of each by its position in `creatures`.
+# The existing names are looked up once beforehand, so a conflict fails or skips only its own item instead of
+# aborting the statement. A name repeated within `creatures` conflicts with its earlier occurrence.
+def create_many(cursor: Cursor, creatures: list[Creature], *, mode: BulkMode = "insert") -> list[BulkItem]:
+    sql = """
+    SELECT name
+    FROM creature
+    WHERE name IN (SELECT value FROM json_each(:names))
+    """
+    cursor.execute(sql, {"names": json.dumps([creature.name for creature in creatures])})
+    existing = {name for (name,) in cursor.fetchall()}
+    items, rows = [], []
+    for index, creature in enumerate(creatures):
+        if creature.name not in existing:
+            items.append(BulkItem(index=index, name=creature.name, status="created"))
+        elif mode == "upsert":
+            items.append(BulkItem(index=index, name=creature.name, status="updated"))
+        elif mode == "skip":
+            items.append(BulkItem(index=index, name=creature.name, status="skipped"))
+            continue
+        else:
+            error = EntityAlreadyExistsError(entity="creature", key=creature.name)
+            items.append(BulkItem(index=index, name=creature.name, status="failed", detail=str(error)))
+            continue
+        existing.add(creature.name)
+        rows.append(model_to_dict(creature))
     sql = """
-    SELECT *
+    INSERT INTO creature (name, country, area, description, aka)
+    VALUES (:name, :country, :area, :description, :aka)
+    ON CONFLICT (name) DO UPDATE
+    SET country = excluded.country,
+        area = excluded.area,
+        description = excluded.description,
+        aka = excluded.aka,
+        version = version + 1
+    """
+    cursor.executemany(sql, rows)
+    return items
+
+
+def select_all(
+    *,
+    limit: int | None = None,
+    after: str | None = None,
+    filters: CreatureFilter | None = None,
+) -> tuple[str, dict[str, Any]]:
+    params = filters.model_dump(exclude_none=True) if filters else {}
+    conditions = [f"{column} = :{column}" for column in params]
+    if after is not None:
+        conditions.append("name > :after")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    sql = f"""
+    SELECT {COLUMNS}
     FROM creature
+    {where}
+    ORDER BY name
+    LIMIT :limit
     """
-    cursor.execute(sql)
+    params.update(limit=-1 if limit is None else limit, after=after)
+    return sql, params
+
+
+def get_all(
+    cursor: Cursor,
+    *,
+    limit: int | None = None,
+    after: str | None = None,
+    filters: CreatureFilter | None = None,
+) -> list[Creature]:
+    # Keyset pagination: a page starts right after the name `after`, so it costs the same however deep it is.
+    cursor.execute(*select_all(limit=limit, after=after, filters=filters))
     return [row_to_model(row) for row in cursor.fetchall()]
 
 
+def iter_all(cursor: Cursor, *, batch_size: int = 1000, filters: CreatureFilter | None = None) -> Iterator[Creature]:
+    # Unlike `get_all`, this holds at most `batch_size` rows in memory at a time.
+    cursor.execute(*select_all(filters=filters))
+    while rows := cursor.fetchmany(batch_size):
+        for row in rows:
+            yield row_to_model(row)
+
+
+# Ranks the rows matching every word of `text` by bm25, where `name` counts most, then `aka`, then `description`.
+# Pages are keyed by (score, name) like `get_all` is keyed by name, though every page still ranks all matches.
+def search(
+    cursor: Cursor,
+    text: str,
+    *,
+    limit: int | None = None,
+    after: tuple[float, str] | None = None,
+) -> list[CreatureHit]:
+    if not (query := fts.match_query(text)):
+        return []
+    where = "WHERE (score, name) > (:score, :name)" if after is not None else ""
+    sql = f"""
+    SELECT {COLUMNS}, score, snippet
+    FROM (
+        SELECT rowid,
+            bm25(creature_fts, 10.0, 1.0, 5.0) AS score,
+            snippet(creature_fts, -1, '<mark>', '</mark>', '…', 16) AS snippet
+        FROM creature_fts
+        WHERE creature_fts MATCH :query
+    ) AS hit
+    JOIN creature ON creature.rowid = hit.rowid
+    {where}
+    ORDER BY score, name
+    LIMIT :limit
+    """
+    score, name = after if after is not None else (None, None)
+    cursor.execute(sql, {"query": query, "score": score, "name": name, "limit": -1 if limit is None else limit})
+    return [CreatureHit(creature=row_to_model(row[:-2]), score=row[-2], snippet=row[-1]) for row in cursor.fetchall()]
+
+
 def get_one(cursor: Cursor, name: str) -> Creature:
-    sql = """
-    SELECT *
+    sql = f"""
+    SELECT {COLUMNS}
     FROM creature
     WHERE name = :name
     """
@@ -75,44 +175,90 @@ def get_one(cursor: Cursor, name: str) -> Creature:
     return row_to_model(row)
 
 
-def replace(cursor: Cursor, name: str, creature: Creature, *, fetch: bool = True) -> Creature | None:
-    sql = """
+# Raises the error of a conditional write to `name` that matched no row: not found, or at another version than
+# `version`. Otherwise the write matched no row because it changed nothing, and the creature is returned as is.
+def check_version(cursor: Cursor, name: str, version: int | None) -> Creature:
+    creature = get_one(cursor, name)
+    if version is not None and creature.version != version:
+        raise VersionMismatchError(entity="creature", key=name, version=version)
+    return creature
+
+
+# With `version`, the write is conditional on the stored version, and a mismatch raises `VersionMismatchError`.
+def replace(
+    cursor: Cursor,
+    name: str,
+    creature: Creature,
+    *,
+    version: int | None = None,
+    fetch: bool = True,
+) -> Creature | None:
+    sql = f"""
     UPDATE creature
     SET name = :name,
         country = :country,
         area = :area,
         description = :description,
-        aka = :aka
-    WHERE name = :name_old
+        aka = :aka,
+        version = version + 1
+    WHERE name = :name_old {_AT_VERSION if version is not None else ""}
+    RETURNING {COLUMNS}
     """
     params = model_to_dict(creature)
     params["name_old"] = name
+    params["version"] = version
     try:
         cursor.execute(sql, params)
     except IntegrityError as e:
         if is_unique_constraint_failed(e):
             raise EntityAlreadyExistsError(entity="creature", key=creature.name)
         raise e
-    if cursor.rowcount == 0:
-        raise EntityNotFoundError(entity="creature", key=name)
-    return get_one(cursor, creature.name) if fetch else None
-
-
-def modify(cursor: Cursor, name: str, creature: PartialCreature, *, fetch: bool = True) -> Creature | None:
-    updated = update_model(get_one(cursor, name), creature)
-    return replace(cursor, name, updated, fetch=fetch)
+    if (row := cursor.fetchone()) is None:
+        check_version(cursor, name, version)
+    return row_to_model(row) if fetch else None
 
 
-def update_model(creature: Creature, update: PartialCreature) -> Creature:
-    update_dict = update.model_dump(exclude_unset=True)
-    return creature.model_copy(update=update_dict)
+# Updates only the fields set in `creature` with one UPDATE, which writes nothing if they already hold their values.
+# Only then, or if the creature does not exist or is at another version, is it read back with `check_version`,
+# which raises the error. An explicit null is ignored like an unset field, because every column is NOT NULL.
+def modify(
+    cursor: Cursor,
+    name: str,
+    creature: PartialCreature,
+    *,
+    version: int | None = None,
+    fetch: bool = True,
+) -> Creature | None:
+    params = creature.model_dump(exclude_unset=True, exclude_none=True)
+    if not params:
+        creature_old = check_version(cursor, name, version)
+        return creature_old if fetch else None
+    assignments, changed = set_changed(params)
+    sql = f"""
+    UPDATE creature
+    SET {assignments}, version = version + 1
+    WHERE name = :name_old {_AT_VERSION if version is not None else ""} AND ({changed})
+    RETURNING {COLUMNS}
+    """
+    params["name_old"] = name
+    params["version"] = version
+    try:
+        cursor.execute(sql, params)
+    except IntegrityError as e:
+        if is_unique_constraint_failed(e):
+            raise EntityAlreadyExistsError(entity="creature", key=params["name"])
+        raise e
+    if (row := cursor.fetchone()) is None:
+        creature_old = check_version(cursor, name, version)
+        return creature_old if fetch else None
+    return row_to_model(row) if fetch else None
 
 
-def delete(cursor: Cursor, name: str) -> None:
-    sql = """
+def delete(cursor: Cursor, name: str, *, version: int | None = None) -> None:
+    sql = f"""
     DELETE FROM creature
-    WHERE name = :name
+    WHERE name = :name {_AT_VERSION if version is not None else ""}
     """
-    cursor.execute(sql, {"name": name})
+    cursor.execute(sql, {"name": name, "version": version})
     if cursor.rowcount == 0:
-        raise EntityNotFoundError(entity="creature", key=name)
+        check_version(cursor, name, version)
@@ -1,45 +1,42 @@
 from __future__ import annotations
 
-from typing import Any, TypeAlias
+import json
+from typing import Any, Iterator, TypeAlias
 
-from cryptid.data.init import Cursor, IntegrityError, is_unique_constraint_failed, transaction_with
-from cryptid.error import EntityAlreadyExistsError, EntityNotFoundError
-from cryptid.model.explorer import Explorer, PartialExplorer
+from cryptid.data import fts
+from cryptid.data.init import Cursor, IntegrityError, is_unique_constraint_failed
+from cryptid.data.patch import set_changed
+from cryptid.data.row import construct
+from cryptid.error import EntityAlreadyExistsError, EntityNotFoundError, VersionMismatchError
+from cryptid.model.bulk import BulkItem, BulkMode
+from cryptid.model.explorer import Explorer, ExplorerFilter, ExplorerHit, PartialExplorer
 
-Row: TypeAlias = tuple[str, str, str]
+Row: TypeAlias = tuple[str, str, str, int]
 
+COLUMNS: str = "name, country, description, version"  # the order of `Row`
 
-@transaction_with(new_conn=False)
-def _create_table(cursor: Cursor) -> None:
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS explorer (
-        name TEXT PRIMARY KEY,
-        country TEXT NOT NULL,
-        description TEXT NOT NULL
-    )
-    """)
-
-
-_create_table()
+_AT_VERSION: str = "AND version = :version"
 
 
 def model_to_dict(explorer: Explorer) -> dict[str, Any]:
-    return explorer.model_dump()
+    return explorer.model_dump(exclude={"version"})
 
 
 def row_to_model(row: Row) -> Explorer:
-    name, country, description = row
-    return Explorer(
-        name=name,
-        country=country,
-        description=description,
-    )
+    name, country, description, version = row
+    return construct(Explorer, {
+        "name": name,
+        "country": country,
+        "description": description,
+        "version": version,
+    })
 
 
 def create(cursor: Cursor, explorer: Explorer, *, fetch: bool = True) -> Explorer | None:
-    sql = """
+    sql = f"""
     INSERT INTO explorer (name, country, description)
     VALUES (:name, :country, :description)
+    RETURNING {COLUMNS}
     """
     try:
         cursor.execute(sql, model_to_dict(explorer))
@@ -47,21 +44,119 @@ def create(cursor: Cursor, explorer: Explorer, *, fetch: bool = True) -> Explore
         if is_unique_constraint_failed(e):
             raise EntityAlreadyExistsError(entity="explorer", key=explorer.name)
         raise e
-    return get_one(cursor, explorer.name) if fetch else None
+    row = cursor.fetchone()
+    return row_to_model(row) if fetch else None
 
 
-def get_all(cursor: Cursor) -> list[Explorer]:
+# Writes all `explorers` with one `executemany`, like `cryptid.data.creature.create_many`.
+def create_many(cursor: Cursor, explorers: list[Explorer], *, mode: BulkMode = "insert") -> list[BulkItem]:
     sql = """
-    SELECT *
+    SELECT name
+    FROM explorer
+    WHERE name IN (SELECT value FROM json_each(:names))
+    """
+    cursor.execute(sql, {"names": json.dumps([explorer.name for explorer in explorers])})
+    existing = {name for (name,) in cursor.fetchall()}
+    items, rows = [], []
+    for index, explorer in enumerate(explorers):
+        if explorer.name not in existing:
+            items.append(BulkItem(index=index, name=explorer.name, status="created"))
+        elif mode == "upsert":
+            items.append(BulkItem(index=index, name=explorer.name, status="updated"))
+        elif mode == "skip":
+            items.append(BulkItem(index=index, name=explorer.name, status="skipped"))
+            continue
+        else:
+            error = EntityAlreadyExistsError(entity="explorer", key=explorer.name)
+            items.append(BulkItem(index=index, name=explorer.name, status="failed", detail=str(error)))
+            continue
+        existing.add(explorer.name)
+        rows.append(model_to_dict(explorer))
+    sql = """
+    INSERT INTO explorer (name, country, description)
+    VALUES (:name, :country, :description)
+    ON CONFLICT (name) DO UPDATE
+    SET country = excluded.country,
+        description = excluded.description,
+        version = version + 1
+    """
+    cursor.executemany(sql, rows)
+    return items
+
+
+def select_all(
+    *,
+    limit: int | None = None,
+    after: str | None = None,
+    filters: ExplorerFilter | None = None,
+) -> tuple[str, dict[str, Any]]:
+    params = filters.model_dump(exclude_none=True) if filters else {}
+    conditions = [f"{column} = :{column}" for column in params]
+    if after is not None:
+        conditions.append("name > :after")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    sql = f"""
+    SELECT {COLUMNS}
     FROM explorer
+    {where}
+    ORDER BY name
+    LIMIT :limit
     """
-    cursor.execute(sql)
+    params.update(limit=-1 if limit is None else limit, after=after)
+    return sql, params
+
+
+def get_all(
+    cursor: Cursor,
+    *,
+    limit: int | None = None,
+    after: str | None = None,
+    filters: ExplorerFilter | None = None,
+) -> list[Explorer]:
+    cursor.execute(*select_all(limit=limit, after=after, filters=filters))
     return [row_to_model(row) for row in cursor.fetchall()]
 
 
+def iter_all(cursor: Cursor, *, batch_size: int = 1000, filters: ExplorerFilter | None = None) -> Iterator[Explorer]:
+    cursor.execute(*select_all(filters=filters))
+    while rows := cursor.fetchmany(batch_size):
+        for row in rows:
+            yield row_to_model(row)
+
+
+# Ranks the rows matching every word of `text` by bm25.
+def search(
+    cursor: Cursor,
+    text: str,
+    *,
+    limit: int | None = None,
+    after: tuple[float, str] | None = None,
+) -> list[ExplorerHit]:
+    if not (query := fts.match_query(text)):
+        return []
+    where = "WHERE (score, name) > (:score, :name)" if after is not None else ""
+    sql = f"""
+    SELECT {COLUMNS}, score, snippet
+    FROM (
+        SELECT rowid,
+            bm25(explorer_fts) AS score,
+            snippet(explorer_fts, -1, '<mark>', '</mark>', '…', 16) AS snippet
+        FROM explorer_fts
+        WHERE explorer_fts MATCH :query
+    ) AS hit
+    JOIN explorer ON explorer.rowid = hit.rowid
+    {where}
+    ORDER BY score, name
+    LIMIT :limit
+    """
+    score, name = after if after is not None else (None, None)
+    cursor.execute(sql, {"query": query, "score": score, "name": name, "limit": -1 if limit is None else limit})
+    return [ExplorerHit(explorer=row_to_model(row[:-2]), score=row[-2], snippet=row[-1]) for row in cursor.fetchall()]
+
+
 def get_one(cursor: Cursor, name: str) -> Explorer:
-    sql = """
-    SELECT *
+    sql = f"""
+    SELECT {COLUMNS}
     FROM explorer
     WHERE name = :name
     """
@@ -71,42 +166,85 @@ def get_one(cursor: Cursor, name: str) -> Explorer:
     return row_to_model(row)
 
 
-def replace(cursor: Cursor, name: str, explorer: Explorer, *, fetch: bool = True) -> Explorer | None:
-    sql = """
+# Raises the error of a conditional write like `cryptid.data.creature.check_version`.
+def check_version(cursor: Cursor, name: str, version: int | None) -> Explorer:
+    explorer = get_one(cursor, name)
+    if version is not None and explorer.version != version:
+        raise VersionMismatchError(entity="explorer", key=name, version=version)
+    return explorer
+
+
+# With `version`, the write is conditional on the stored version, and a mismatch raises `VersionMismatchError`.
+def replace(
+    cursor: Cursor,
+    name: str,
+    explorer: Explorer,
+    *,
+    version: int | None = None,
+    fetch: bool = True,
+) -> Explorer | None:
+    sql = f"""
     UPDATE explorer
     SET name = :name,
         country = :country,
-        description = :description
-    WHERE name = :name_old
+        description = :description,
+        version = version + 1
+    WHERE name = :name_old {_AT_VERSION if version is not None else ""}
+    RETURNING {COLUMNS}
     """
     params = model_to_dict(explorer)
     params["name_old"] = name
+    params["version"] = version
     try:
         cursor.execute(sql, params)
     except IntegrityError as e:
         if is_unique_constraint_failed(e):
             raise EntityAlreadyExistsError(entity="explorer", key=explorer.name)
         raise e
-    if cursor.rowcount == 0:
-        raise EntityNotFoundError(entity="explorer", key=name)
-    return get_one(cursor, explorer.name) if fetch else None
-
-
-def modify(cursor: Cursor, name: str, explorer: PartialExplorer, *, fetch: bool = True) -> Explorer | None:
-    updated = update_model(get_one(cursor, name), explorer)
-    return replace(cursor, name, updated, fetch=fetch)
-
-
-def update_model(explorer: Explorer, update: PartialExplorer) -> Explorer:
-    update_dict = update.model_dump(exclude_unset=True)
-    return explorer.model_copy(update=update_dict)
+    if (row := cursor.fetchone()) is None:
+        check_version(cursor, name, version)
+    return row_to_model(row) if fetch else None
+
+
+# A partial update like `cryptid.data.creature.modify`.
+def modify(
+    cursor: Cursor,
+    name: str,
+    explorer: PartialExplorer,
+    *,
+    version: int | None = None,
+    fetch: bool = True,
+) -> Explorer | None:
+    params = explorer.model_dump(exclude_unset=True, exclude_none=True)
+    if not params:
+        explorer_old = check_version(cursor, name, version)
+        return explorer_old if fetch else None
+    assignments, changed = set_changed(params)
+    sql = f"""
+    UPDATE explorer
+    SET {assignments}, version = version + 1
+    WHERE name = :name_old {_AT_VERSION if version is not None else ""} AND ({changed})
+    RETURNING {COLUMNS}
+    """
+    params["name_old"] = name
+    params["version"] = version
+    try:
+        cursor.execute(sql, params)
+    except IntegrityError as e:
+        if is_unique_constraint_failed(e):
+            raise EntityAlreadyExistsError(entity="explorer", key=params["name"])
+        raise e
+    if (row := cursor.fetchone()) is None:
+        explorer_old = check_version(cursor, name, version)
+        return explorer_old if fetch else None
+    return row_to_model(row) if fetch else None
 
 
-def delete(cursor: Cursor, name: str) -> None:
-    sql = """
+def delete(cursor: Cursor, name: str, *, version: int | None = None) -> None:
+    sql = f"""
     DELETE FROM explorer
-    WHERE name = :name
+    WHERE name = :name {_AT_VERSION if version is not None else ""}
     """
-    cursor.execute(sql, {"name": name})
+    cursor.execute(sql, {"name": name, "version": version})
     if cursor.rowcount == 0:
-        raise EntityNotFoundError(entity="explorer", key=name)
+        check_version(cursor, name, version)
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from cryptid.data.init import Cursor
+
+
+# Creates the FTS5 index `<table>_fts` over `columns` of `table`, indexes the existing rows, and creates the
+# triggers that keep it in sync.
+# The index is an external content table, which stores only the tokens and reads the text back from `table`
+# by rowid. `table` has no INTEGER PRIMARY KEY, so a VACUUM may renumber its rowids, after which the index
+# must be rebuilt with `rebuild`.
+def create_index(cursor: Cursor, table: str, columns: list[str]) -> None:
+    fts = f"{table}_fts"
+    names = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    cursor.execute(f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {fts}
+    USING fts5({names}, content='{table}', content_rowid='rowid')
+    """)
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN
+        INSERT INTO {fts} (rowid, {names}) VALUES (new.rowid, {new_values});
+    END
+    """)
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN
+        INSERT INTO {fts} ({fts}, rowid, {names}) VALUES ('delete', old.rowid, {old_values});
+    END
+    """)
+    # Updates of the other columns leave the index alone.
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {names} ON {table} BEGIN
+        INSERT INTO {fts} ({fts}, rowid, {names}) VALUES ('delete', old.rowid, {old_values});
+        INSERT INTO {fts} (rowid, {names}) VALUES (new.rowid, {new_values});
+    END
+    """)
+    rebuild(cursor, table)
+
+
+# Reindexes all rows of `table`.
+def rebuild(cursor: Cursor, table: str) -> None:
+    cursor.execute(f"INSERT INTO {table}_fts ({table}_fts) VALUES ('rebuild')")
+
+
+# Turns free text into an FTS5 query that matches rows containing every word, so that users need not know
+# the FTS5 query syntax, and quotes or operators in `text` cannot make the query invalid.
+def match_query(text: str) -> str:
+    return " ".join('"' + word.replace('"', '""') + '"' for word in text.split())
@@ -1,36 +1,82 @@
 from __future__ import annotations
 
+import asyncio
+import itertools
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from sqlite3 import Connection, Cursor, IntegrityError, connect
-from typing import Callable, Concatenate, ParamSpec, TypeAlias, TypeVar
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Concatenate,
+    ContextManager,
+    Iterator,
+    ParamSpec,
+    TypeAlias,
+    TypeVar,
+)
+
+from cryptid.data.pool import ConnectionPool, PoolStats
+from cryptid.data.pragma import Profile, apply_profile, get_profile
+from cryptid.data.writer import GroupCommitWriter, WriterStats
 
 __all__ = [
     "Connection",
     "Cursor",
     "IntegrityError",
+    "PoolStats",
+    "WriterStats",
+    "async_query",
+    "async_stream",
+    "async_transaction",
     "database",
     "get_conn",
     "get_cursor",
+    "get_pool_stats",
+    "get_writer_stats",
     "is_unique_constraint_failed",
+    "pooled_conn",
+    "stream_conn",
+    "query",
+    "stream",
     "transaction",
     "transaction_with",
 ]
 
 database: str | None = None
-_conn: Connection | None = None
+_uri: str | None = None
+_pool: ConnectionPool | None = None
+_profile: Profile = {}
+_writer: GroupCommitWriter | None = None
+_executor: ThreadPoolExecutor | None = None
+_streams: ConnectionPool | None = None
+_stream_executor: ThreadPoolExecutor | None = None
+_local: threading.local = threading.local()
+_memory_db_ids: Iterator[int] = itertools.count(start=1)
 
 
 def _init_db(path: str | None = None, reset: bool = False):
-    global database, _conn
-    if _conn:
+    global database, _uri, _pool, _profile, _writer, _executor, _streams, _stream_executor
+    if _pool:
         if not reset:
             return
-        _conn = None
+        _executor.shutdown()
+        _executor = None
+        _stream_executor.shutdown()
+        _stream_executor = None
+        _streams.close()
+        _streams = None
+        if _writer:
+            _writer.close()
+            _writer = None
+        _pool.close()
+        _pool = None
     if not path:
         top_dir = Path(__file__).resolve().parents[3]
         db_dir = top_dir / "db"
-        db_dir.mkdir(exist_ok=True)
         db_name = "cryptid.db"
         db_path = str(db_dir / db_name)
         path = os.getenv("CRYPTID_SQLITE_DB", db_path)
@@ -47,9 +93,46 @@ def _init_db(path: str | None = None, reset: bool = False):
     # * The `with conn:` syntax begins the `isolation_level` transaction if `isolation_level` is not None and
     #   not in a transaction, and commits or rollbacks it if `isolation_level` is not None.
     database = path
-    _conn = connect(database, isolation_level="DEFERRED", check_same_thread=False)
+    _profile = get_profile()
+    # Every plain `:memory:` connection opens its own private database, so the pooled connections share
+    # one named in-memory database instead. It lives as long as any of its connections stays open.
+    _uri = f"file:cryptid-{next(_memory_db_ids)}?mode=memory&cache=shared" if path == ":memory:" else None
+    _pool = ConnectionPool(
+        _connect,
+        size=int(os.getenv("CRYPTID_SQLITE_POOL_SIZE", default="8")),
+        timeout=float(os.getenv("CRYPTID_SQLITE_POOL_TIMEOUT", default="30")),
+    )
+    # The DB executor runs the async queries, and has as many threads as pooled connections,
+    # so that a query never waits for a connection in a thread.
+    _executor = ThreadPoolExecutor(max_workers=_pool.size, thread_name_prefix="cryptid-sqlite")
+    # A stream holds its connection for as long as its client reads, so the streams check out the connections of
+    # their own pool, and advance on their own executor, instead of starving the queries of theirs.
+    _streams = ConnectionPool(
+        _connect,
+        size=int(os.getenv("CRYPTID_SQLITE_MAX_STREAMS", default="4")),
+        timeout=_pool.timeout,
+    )
+    _stream_executor = ThreadPoolExecutor(max_workers=_streams.size, thread_name_prefix="cryptid-sqlite-stream")
+    if os.getenv("CRYPTID_SQLITE_GROUP_COMMIT", default="true").lower() != "false":
+        _writer = GroupCommitWriter(
+            _connect,
+            max_batch=int(os.getenv("CRYPTID_SQLITE_GROUP_COMMIT_MAX_BATCH", default="64")),
+            max_delay=float(os.getenv("CRYPTID_SQLITE_GROUP_COMMIT_MAX_DELAY_MS", default="0")) / 1000,
+        )
+
 
+def _connect() -> Connection:
+    if _uri is not None:
+        conn = connect(_uri, isolation_level="DEFERRED", check_same_thread=False, uri=True)
+    else:
+        Path(database).parent.mkdir(parents=True, exist_ok=True)
+        conn = connect(database, isolation_level="DEFERRED", check_same_thread=False)
+    apply_profile(conn, _profile)
+    return conn
 
+
+# Nothing connects until the first query, because the pool, the writer and the executor are all lazy.
+# The schema is created by `cryptid.data.migrate`.
 _init_db()
 
 # This is the rough implementation of sqlite3.Connection.ContextManager.
@@ -68,40 +151,154 @@ _init_db()
 #             self.rollback()
 
 
+# Returns the connection bound to this thread by `transaction`/`query`, and otherwise a new connection, which the
+# caller owns and closes. A pooled connection is never handed out unscoped, since nothing would return it to the
+# pool before its thread exits, and the threads of the executors live as long as the process.
 def get_conn(*, new: bool = False) -> Connection:
-    if new:
-        return connect(database, isolation_level="DEFERRED", check_same_thread=False)
-    else:
-        return _conn
+    if not new and (conn := getattr(_local, "conn", None)) is not None:
+        return conn
+    return _connect()
 
 
 def get_cursor(*, new_conn: bool = False) -> Cursor:
     return get_conn(new=new_conn).cursor()
 
 
+# Checks out a pooled connection for a caller that controls its own transactions, like the migrations.
+def pooled_conn() -> ContextManager[Connection]:
+    return _pool.connection()
+
+
+# Checks out a connection of the stream pool, for a stream run by another runner, like the sharded one.
+def stream_conn() -> ContextManager[Connection]:
+    return _streams.connection()
+
+
+def get_pool_stats() -> PoolStats:
+    return _pool.stats()
+
+
+def get_writer_stats() -> WriterStats | None:
+    return _writer.stats() if _writer else None
+
+
 P = ParamSpec("P")
 R = TypeVar("R")
 TxFunc: TypeAlias = Callable[Concatenate[Cursor, P], R]
 TxWrapper: TypeAlias = Callable[P, R]
+AsyncTxWrapper: TypeAlias = Callable[P, Awaitable[R]]
+StreamFunc: TypeAlias = Callable[Concatenate[Cursor, P], Iterator[R]]
+
+
+def _run(func: TxFunc, args: P.args, kwargs: P.kwargs, *, new_conn: bool = False, in_tx: bool = True) -> R:
+    if new_conn:
+        conn = get_conn(new=True)
+        with conn:
+            return func(conn.cursor(), *args, **kwargs)
+    # A nested call joins the transaction (or query) already running on this thread.
+    conn = getattr(_local, "conn", None)
+    if conn is not None and (_local.in_tx or not in_tx):
+        return func(conn.cursor(), *args, **kwargs)
+    # The outermost transaction goes to the group commit writer if enabled, and otherwise, like a query,
+    # runs with a connection bound to this thread until it returns.
+    if in_tx and _writer:
+        return _writer.submit(lambda writer_conn: _bind(writer_conn, func, args, kwargs, in_tx=True, commit=False))
+    if conn is not None:
+        return _bind(conn, func, args, kwargs, in_tx=in_tx)
+    with _pool.connection() as conn:
+        return _bind(conn, func, args, kwargs, in_tx=in_tx)
+
+
+def _bind(
+    conn: Connection,
+    func: TxFunc,
+    args: P.args,
+    kwargs: P.kwargs,
+    *,
+    in_tx: bool,
+    commit: bool = True,
+) -> R:
+    outer = getattr(_local, "conn", None), getattr(_local, "in_tx", False)
+    _local.conn, _local.in_tx = conn, in_tx
+    try:
+        if not in_tx or not commit:
+            return func(conn.cursor(), *args, **kwargs)
+        with conn:
+            return func(conn.cursor(), *args, **kwargs)
+    finally:
+        _local.conn, _local.in_tx = outer
 
 
 def transaction(func: TxFunc) -> TxWrapper:
     def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
-        with get_conn() as conn:
-            result = func(conn.cursor(), *args, **kwargs)
-            return result
+        return _run(func, args, kwargs)
     return wrapper
 
 
 def transaction_with(*, new_conn: bool) -> Callable[[TxFunc], TxWrapper]:
     def decorator(func: TxFunc) -> TxWrapper:
         def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
-            with get_conn(new=new_conn) as conn:
-                result = func(conn.cursor(), *args, **kwargs)
-                return result
+            return _run(func, args, kwargs, new_conn=new_conn)
         return wrapper
     return decorator
 
 
+# `query` is the read-only counterpart of `transaction`, which runs `func` with a pooled connection
+# on the calling thread, but neither begins nor commits a transaction.
+def query(func: TxFunc) -> TxWrapper:
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        return _run(func, args, kwargs, in_tx=False)
+    return wrapper
+
+
+# `async_transaction` and `async_query` are the asyncio counterparts of `transaction` and `query`.
+# The event loop never runs SQLite. A transaction is awaited on the future of the group commit writer,
+# and a query (or a transaction without the writer) runs on the DB executor.
+def async_transaction(func: TxFunc) -> AsyncTxWrapper:
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        if _writer:
+            future = _writer.submit_future(lambda conn: _bind(conn, func, args, kwargs, in_tx=True, commit=False))
+            return await asyncio.wrap_future(future)
+        return await asyncio.get_running_loop().run_in_executor(_executor, lambda: _run(func, args, kwargs))
+    return wrapper
+
+
+def async_query(func: TxFunc) -> AsyncTxWrapper:
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        return await asyncio.get_running_loop().run_in_executor(
+            _executor,
+            lambda: _run(func, args, kwargs, in_tx=False),
+        )
+    return wrapper
+
+
+# `stream` and `async_stream` run a generator `func` with a connection of the stream pool, which stays checked out
+# until the stream is exhausted or closed. `async_stream` advances the generator on the stream executor
+# `batch_size` items at a time, so the event loop never runs SQLite. It waits for a connection in a thread of
+# the event loop instead, because a stream holding a connection needs a thread of the stream executor to advance.
+def stream(func: StreamFunc) -> Callable[P, Iterator[R]]:
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> Iterator[R]:
+        with _streams.connection() as conn:
+            yield from func(conn.cursor(), *args, **kwargs)
+    return wrapper
+
+
+def async_stream(func: StreamFunc, *, batch_size: int = 1000) -> Callable[P, AsyncIterator[R]]:
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> AsyncIterator[R]:
+        loop = asyncio.get_running_loop()
+        streams, executor = _streams, _stream_executor
+        conn = await asyncio.to_thread(streams.acquire)
+        items = func(conn.cursor(), *args, **kwargs)
+        try:
+            while batch := await loop.run_in_executor(executor, lambda: list(itertools.islice(items, batch_size))):
+                for item in batch:
+                    yield item
+        finally:
+            # Closing only resets the statement, and must not await in case the stream was cancelled.
+            items.close()
+            streams.release(conn)
+    return wrapper
+
+
 def is_unique_constraint_failed(error: IntegrityError) -> bool:
     return "UNIQUE constraint failed" in str(error)
@@ -0,0 +1,303 @@
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+
+from cryptid.data import fts
+from cryptid.data.init import Connection, Cursor, pooled_conn
+from cryptid.data.row import to_micros
+
+
+# A schema change, which is applied once to a database whose `PRAGMA user_version` is below `version`.
+# Released migrations must never be edited, but followed by a new migration with the next version.
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    apply: Callable[[Cursor], None]
+
+
+MIGRATIONS: list[Migration] = []
+
+
+def migration(version: int, name: str) -> Callable[[Callable[[Cursor], None]], Callable[[Cursor], None]]:
+    def decorator(func: Callable[[Cursor], None]) -> Callable[[Cursor], None]:
+        if MIGRATIONS and MIGRATIONS[-1].version + 1 != version:
+            raise ValueError(f"migration version must be {MIGRATIONS[-1].version + 1}, but got {version}")
+        MIGRATIONS.append(Migration(version, name, func))
+        return func
+    return decorator
+
+
+# The tables of databases created before the migrations existed are at version 0, so the first migrations
+# use IF NOT EXISTS to adopt them.
+@migration(1, "create user and xuser tables")
+def _create_user_tables(cursor: Cursor) -> None:
+    # CURRENT_TIMESTAMP or DATETIME('now') creates the UTC time.
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS user (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT UNIQUE NOT NULL,
+        hash TEXT NOT NULL,
+        roles TEXT NOT NULL CHECK(JSON_VALID(roles)),
+        created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS xuser (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        hash TEXT NOT NULL,
+        roles TEXT NOT NULL CHECK(JSON_VALID(roles)),
+        created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        deleted_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+
+@migration(2, "create creature and explorer tables")
+def _create_lore_tables(cursor: Cursor) -> None:
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS creature (
+        name TEXT PRIMARY KEY,
+        country TEXT NOT NULL,
+        area TEXT NOT NULL,
+        description TEXT NOT NULL,
+        aka TEXT NOT NULL
+    )
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS explorer (
+        name TEXT PRIMARY KEY,
+        country TEXT NOT NULL,
+        description TEXT NOT NULL
+    )
+    """)
+
+
+@migration(3, "index the filterable columns of creature and explorer")
+def _index_filters(cursor: Cursor) -> None:
+    # Each filterable column is indexed together with `name`, so a filtered page is an index range scan
+    # that also yields the keyset order.
+    cursor.execute("CREATE INDEX IF NOT EXISTS creature_country ON creature (country, name)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS creature_area ON creature (area, name)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS creature_aka ON creature (aka, name)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS explorer_country ON explorer (country, name)")
+
+
+@migration(4, "index the text of creature and explorer for search")
+def _index_text(cursor: Cursor) -> None:
+    fts.create_index(cursor, "creature", ["name", "description", "aka"])
+    fts.create_index(cursor, "explorer", ["description"])
+
+
+@migration(5, "index the roles of user and xuser")
+def _index_roles(cursor: Cursor) -> None:
+    # `roles` stays the JSON list of the API, in its order, and `<table>_role` indexes its values by role,
+    # kept in sync by triggers. Users with a role are an index range scan in the order of `id`.
+    for table in ("user", "xuser"):
+        cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table}_role (
+            role TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            PRIMARY KEY (role, user_id)
+        ) WITHOUT ROWID
+        """)
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {table}_role_user_id ON {table}_role (user_id)")
+        _create_role_triggers(cursor, table)
+        cursor.execute(f"""
+        INSERT OR IGNORE INTO {table}_role (role, user_id)
+        SELECT value, {table}.id
+        FROM {table}, json_each({table}.roles)
+        """)
+
+
+def _create_role_triggers(cursor: Cursor, table: str) -> None:
+    insert = f"""
+        INSERT OR IGNORE INTO {table}_role (role, user_id)
+        SELECT value, new.id
+        FROM json_each(new.roles);
+    """
+    delete = f"DELETE FROM {table}_role WHERE user_id = old.id;"
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {table}_role_insert AFTER INSERT ON {table} BEGIN {insert} END")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {table}_role_delete AFTER DELETE ON {table} BEGIN {delete} END")
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {table}_role_update AFTER UPDATE OF id, roles ON {table} BEGIN
+        {delete}
+        {insert}
+    END
+    """)
+
+
+@migration(6, "index the deletion time of xuser")
+def _index_deleted_at(cursor: Cursor) -> None:
+    # Lets the retention job find the oldest deleted users without scanning `xuser`.
+    cursor.execute("CREATE INDEX IF NOT EXISTS xuser_deleted_at ON xuser (deleted_at)")
+
+
+@migration(7, "store the timestamps of user and xuser as epoch microseconds")
+def _store_epoch_micros(cursor: Cursor) -> None:
+    # The ISO 8601 text compared as strings, which misorders the `CURRENT_TIMESTAMP` format of the rows written
+    # before the app set the timestamps, and took 32 bytes. SQLite cannot change the type of a column, so both
+    # tables are rebuilt, and the triggers and indexes dropped with the old tables are created again.
+    cursor.connection.create_function("epoch_micros", 1, _epoch_micros, deterministic=True)
+    cursor.execute("""
+    CREATE TABLE user_new (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT UNIQUE NOT NULL,
+        hash TEXT NOT NULL,
+        roles TEXT NOT NULL CHECK(JSON_VALID(roles)),
+        created_at INTEGER NOT NULL,
+        updated_at INTEGER NOT NULL
+    )
+    """)
+    cursor.execute("""
+    INSERT INTO user_new (id, name, hash, roles, created_at, updated_at)
+    SELECT id, name, hash, roles, epoch_micros(created_at), epoch_micros(updated_at)
+    FROM user
+    """)
+    # The ids of deleted users live on in `xuser`, so the new table continues the sequence of the old one,
+    # even if its last users were deleted.
+    cursor.execute("DELETE FROM sqlite_sequence WHERE name = 'user_new'")
+    cursor.execute("""
+    INSERT INTO sqlite_sequence (name, seq)
+    SELECT 'user_new', seq
+    FROM sqlite_sequence
+    WHERE name = 'user'
+    """)
+    cursor.execute("""
+    CREATE TABLE xuser_new (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        hash TEXT NOT NULL,
+        roles TEXT NOT NULL CHECK(JSON_VALID(roles)),
+        created_at INTEGER NOT NULL,
+        updated_at INTEGER NOT NULL,
+        deleted_at INTEGER NOT NULL
+    )
+    """)
+    cursor.execute("""
+    INSERT INTO xuser_new (id, name, hash, roles, created_at, updated_at, deleted_at)
+    SELECT id, name, hash, roles, epoch_micros(created_at), epoch_micros(updated_at), epoch_micros(deleted_at)
+    FROM xuser
+    """)
+    for table in ("user", "xuser"):
+        cursor.execute(f"DROP TABLE {table}")
+        cursor.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+        _create_role_triggers(cursor, table)
+        # Besides `xuser_deleted_at`, which the retention job needs, the creation times are indexed for the range
+        # filters of the API. Every index ends with the rowid `id`, which is the keyset order within a time.
+        cursor.execute(f"CREATE INDEX {table}_created_at ON {table} (created_at)")
+    cursor.execute("CREATE INDEX xuser_deleted_at ON xuser (deleted_at)")
+
+
+def _epoch_micros(text: str) -> int:
+    return to_micros(datetime.fromisoformat(text))
+
+
+@migration(8, "add the row versions of creature, explorer and user")
+def _add_versions(cursor: Cursor) -> None:
+    # A write with a version only succeeds at that version and increments it, so concurrent edits of one row
+    # are detected without holding a lock between the read and the write.
+    for table in ("creature", "explorer", "user"):
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+
+
+@migration(9, "log the changed keys of creature, explorer and user")
+def _create_change_log(cursor: Cursor) -> None:
+    # Triggers log the key of every written row, which `cryptid.data.changes` reads to invalidate the caches of
+    # the other workers. A rename logs both names. Each insert trims the log to its last 10000 rows, which is
+    # one indexed delete, so the log needs no cleanup job.
+    cursor.execute("""
+    CREATE TABLE change_log (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        tbl TEXT NOT NULL,
+        key TEXT NOT NULL,
+        at INTEGER NOT NULL
+    )
+    """)
+    at = "CAST((julianday('now') - 2440587.5) * 86400000000 AS INTEGER)"  # epoch microseconds
+    cursor.execute("""
+    CREATE TRIGGER change_log_trim AFTER INSERT ON change_log BEGIN
+        DELETE FROM change_log WHERE seq <= new.seq - 10000;
+    END
+    """)
+    for table, key in (("creature", "name"), ("explorer", "name"), ("user", "id")):
+        log = f"INSERT INTO change_log (tbl, key, at) VALUES ('{table}', CAST({{}}.{key} AS TEXT), {at});"
+        cursor.execute(f"""
+        CREATE TRIGGER {table}_change_insert AFTER INSERT ON {table} BEGIN
+            {log.format("new")}
+        END
+        """)
+        cursor.execute(f"""
+        CREATE TRIGGER {table}_change_delete AFTER DELETE ON {table} BEGIN
+            {log.format("old")}
+        END
+        """)
+        cursor.execute(f"""
+        CREATE TRIGGER {table}_change_update AFTER UPDATE ON {table} BEGIN
+            {log.format("old")}
+            INSERT INTO change_log (tbl, key, at)
+            SELECT '{table}', CAST(new.{key} AS TEXT), {at}
+            WHERE new.{key} IS NOT old.{key};
+        END
+        """)
+
+
+def get_version(conn: Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+# Applies the migrations above the version of the database up to `target` (the latest by default),
+# each in its own transaction together with the new `user_version`, and returns the applied versions.
+# BEGIN IMMEDIATE takes the write lock before the version is read, so that workers starting together
+# apply each migration once: the others wait for the lock, and then find the migration applied.
+def apply_migrations(conn: Connection, target: int | None = None) -> list[int]:
+    applied = []
+    for m in MIGRATIONS:
+        if target is not None and m.version > target:
+            break
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if get_version(conn) < m.version:
+                m.apply(conn.cursor())
+                conn.execute(f"PRAGMA user_version = {m.version}")
+                applied.append(m.version)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    return applied
+
+
+def migrate(target: int | None = None) -> list[int]:
+    with pooled_conn() as conn:
+        return apply_migrations(conn, target)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Migrate the schema of the cryptid SQLite database.")
+    parser.add_argument("--target", type=int, help="the version to migrate to (default: the latest)")
+    parser.add_argument("--status", action="store_true", help="print the versions without migrating")
+    args = parser.parse_args()
+
+    with pooled_conn() as conn:
+        version = get_version(conn)
+        latest = MIGRATIONS[-1].version
+        if args.status:
+            print(f"current version: {version}, latest version: {latest}")
+            return
+        applied = apply_migrations(conn, args.target)
+    for m in MIGRATIONS:
+        if m.version in applied:
+            print(f"applied {m.version}: {m.name}")
+    if not applied:
+        print(f"already at version {version}")
+
+
+if __name__ == "__main__":
+    main()
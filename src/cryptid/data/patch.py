@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from typing import Iterable
+
+
+# Builds the SET clause of a partial update of `columns`, whose new values are bound to the parameters of
+# the same names, and the condition that any of them differs from the stored value. Adding the condition to
+# the WHERE clause makes an update to the current values match no row, so that SQLite writes nothing.
+def set_changed(columns: Iterable[str]) -> tuple[str, str]:
+    columns = list(columns)
+    assignments = ", ".join(f"{column} = :{column}" for column in columns)
+    changed = " OR ".join(f"{column} IS NOT :{column}" for column in columns)
+    return assignments, changed
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from sqlite3 import Connection
+from typing import Callable, Iterator
+
+from cryptid.error import PoolTimeoutError
+
+__all__ = [
+    "ConnectionPool",
+    "PoolStats",
+]
+
+
+@dataclass(frozen=True)
+class PoolStats:
+    size: int
+    opened: int
+    in_use: int
+    idle: int
+    waiters: int
+    checkouts: int
+    timeouts: int
+    wait_time_total: float  # seconds
+    wait_time_max: float  # seconds
+
+
+# A bounded checkout/return pool of SQLite connections.
+# Connections are opened lazily up to `size`. When every connection is checked out, `acquire` waits up to
+# `timeout` seconds for one to be returned, and raises PoolTimeoutError otherwise.
+class ConnectionPool:
+    def __init__(self, connect: Callable[[], Connection], *, size: int = 8, timeout: float = 30.0) -> None:
+        if size < 1:
+            raise ValueError(f"pool size must be positive, but got {size}")
+        self._connect = connect
+        self.size = size
+        self.timeout = timeout
+        self._idle: list[Connection] = []
+        self._opened = 0
+        self._in_use = 0
+        self._waiters = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout: float | None = None) -> Connection:
+        timeout = self.timeout if timeout is None else timeout
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("connection pool closed")
+            if not self._idle and self._opened >= self.size:
+                self._wait(timeout)
+            if self._idle:
+                conn = self._idle.pop()
+            else:
+                # Reserve the slot before connecting, so concurrent callers cannot overshoot `size`.
+                self._opened += 1
+                conn = None
+            self._in_use += 1
+            self._checkouts += 1
+        if conn is None:
+            try:
+                conn = self._connect()
+            except BaseException:
+                with self._cond:
+                    self._opened -= 1
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+        return conn
+
+    def _wait(self, timeout: float) -> None:
+        # The caller must hold `self._cond`.
+        start = time.perf_counter()
+        deadline = start + timeout
+        self._waiters += 1
+        try:
+            while not self._idle and self._opened >= self.size:
+                if (remaining := deadline - time.perf_counter()) <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(size=self.size, timeout=timeout)
+                self._cond.wait(remaining)
+                if self._closed:
+                    raise RuntimeError("connection pool closed")
+        finally:
+            self._waiters -= 1
+            waited = time.perf_counter() - start
+            self._wait_time_total += waited
+            self._wait_time_max = max(self._wait_time_max, waited)
+
+    def release(self, conn: Connection) -> None:
+        with self._cond:
+            self._in_use -= 1
+            if self._closed:
+                self._opened -= 1
+                conn.close()
+                return
+            if conn.in_transaction:
+                # Never hand a connection with a dangling transaction to the next caller.
+                conn.rollback()
+            self._idle.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout: float | None = None) -> Iterator[Connection]:
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            for conn in self._idle:
+                conn.close()
+            self._opened -= len(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+
+    def stats(self) -> PoolStats:
+        with self._cond:
+            return PoolStats(
+                size=self.size,
+                opened=self._opened,
+                in_use=self._in_use,
+                idle=len(self._idle),
+                waiters=self._waiters,
+                checkouts=self._checkouts,
+                timeouts=self._timeouts,
+                wait_time_total=self._wait_time_total,
+                wait_time_max=self._wait_time_max,
+            )
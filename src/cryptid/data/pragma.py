@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import os
+import re
+from sqlite3 import Connection
+from typing import TypeAlias
+
+__all__ = [
+    "PROFILES",
+    "Profile",
+    "apply_profile",
+    "get_profile",
+]
+
+Profile: TypeAlias = dict[str, str | int]
+
+# PRAGMA profiles applied to every connection the data layer opens.
+# - durable: WAL, and fsync on every commit. A committed transaction survives a power loss.
+# - balanced: WAL, and fsync only on checkpoints. A committed transaction survives an application crash,
+#   but the last few may roll back on a power loss.
+# - ephemeral: WAL, and never fsync. For tests and throwaway data, which may corrupt on a power loss.
+# - legacy: SQLite's built-in defaults, i.e. the rollback journal and `synchronous=FULL`.
+# * In WAL mode, readers never block a writer and a writer never blocks readers.
+# * A negative `cache_size` is in KiB, and `mmap_size` is in bytes.
+PROFILES: dict[str, Profile] = {
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -16_384,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 5_000,
+        "wal_autocheckpoint": 1_000,
+    },
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -65_536,
+        "mmap_size": 268_435_456,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5_000,
+        "wal_autocheckpoint": 1_000,
+    },
+    "ephemeral": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -65_536,
+        "mmap_size": 268_435_456,
+        "temp_store": "MEMORY",
+        "busy_timeout": 1_000,
+        "wal_autocheckpoint": 10_000,
+    },
+    "legacy": {},
+}
+
+
+def get_profile(name: str | None = None) -> Profile:
+    # Each PRAGMA of the profile can be overridden by the environment variable `CRYPTID_SQLITE_PRAGMA_<NAME>`,
+    # e.g. `CRYPTID_SQLITE_PRAGMA_CACHE_SIZE=-131072`.
+    if name is None:
+        name = os.getenv("CRYPTID_SQLITE_PROFILE", default="balanced")
+    if (profile := PROFILES.get(name)) is None:
+        raise ValueError(f"unknown SQLite profile '{name}', expected one of {list(PROFILES)}")
+    profile = profile.copy()
+    for pragma in PROFILES["balanced"]:
+        if (value := os.getenv(f"CRYPTID_SQLITE_PRAGMA_{pragma.upper()}")) is not None:
+            if not re.fullmatch(r"-?\w+", value):
+                raise ValueError(f"invalid value '{value}' for PRAGMA '{pragma}'")
+            profile[pragma] = value
+    return profile
+
+
+def apply_profile(conn: Connection, profile: Profile) -> None:
+    # PRAGMA does not accept bound parameters, so the values come only from PROFILES or the environment.
+    for pragma, value in profile.items():
+        conn.execute(f"PRAGMA {pragma} = {value}").fetchall()
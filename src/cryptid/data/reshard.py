@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import argparse
+from collections import defaultdict
+from contextlib import ExitStack
+
+from cryptid.data import creature, explorer
+from cryptid.data.shard import ShardSet, shard_of
+
+TABLES: dict[str, str] = {
+    "creature": creature.COLUMNS,
+    "explorer": explorer.COLUMNS,
+}
+
+
+# Copies `creature` and `explorer` from the shards of `source` to those of `target`, which must be empty,
+# `batch_size` rows at a time, and returns the number of rows copied per table. The source is left as it is,
+# and must not be written meanwhile, so the app should be stopped, and restarted with the new shard count.
+# A single shard is the main database, so this also shards an unsharded database, or merges the shards back.
+def reshard(source: ShardSet, target: ShardSet, *, batch_size: int = 1000) -> dict[str, int]:
+    target.migrate()
+    copied = {}
+    with ExitStack() as stack:
+        conns = [stack.enter_context(target.connection(i)) for i in range(target.count)]
+        for table, columns in TABLES.items():
+            for i, conn in enumerate(conns):
+                if conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone():
+                    raise ValueError(f"table '{table}' of target shard {i} must be empty")
+            # `name` is the first column.
+            sql = f"INSERT INTO {table} ({columns}) VALUES ({', '.join('?' * len(columns.split(',')))})"
+            copied[table] = 0
+            for i in range(source.count):
+                with source.connection(i) as source_conn:
+                    cursor = source_conn.execute(f"SELECT {columns} FROM {table}")
+                    while rows := cursor.fetchmany(batch_size):
+                        batches = defaultdict(list)
+                        for row in rows:
+                            batches[shard_of(row[0], target.count)].append(row)
+                        for j, batch in batches.items():
+                            with conns[j]:
+                                conns[j].executemany(sql, batch)
+                        copied[table] += len(rows)
+    return copied
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Copy the creatures and explorers to another number of shards.")
+    parser.add_argument("--from", dest="source", type=int, required=True, help="the current shard count")
+    parser.add_argument("--to", dest="target", type=int, required=True, help="the new shard count")
+    parser.add_argument("--batch-size", type=int, default=1000, help="the number of rows per transaction")
+    args = parser.parse_args()
+    if args.source == args.target:
+        parser.error("--from and --to must differ")
+
+    source, target = ShardSet(args.source), ShardSet(args.target)
+    try:
+        copied = reshard(source, target, batch_size=args.batch_size)
+    finally:
+        source.close()
+        target.close()
+    for table, count in copied.items():
+        print(f"copied {count} rows of {table} from {args.source} to {args.target} shards")
+    print(f"set CRYPTID_SQLITE_SHARDS={args.target}; the old shards are left as they were: {', '.join(source.paths)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, TypeVar
+
+from pydantic import BaseModel
+
+M = TypeVar("M", bound=BaseModel)
+
+_setattr = object.__setattr__
+
+_EPOCH: datetime = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND: timedelta = timedelta(microseconds=1)
+
+
+# Builds `model` from the decoded values of a row of our own schema, which were validated on write, without
+# validating them again. `model_construct` skips the validation too, but fills in the defaults and resolves the
+# aliases field by field in Python, which makes it slower than the validation itself. `values` must hold every
+# field of `model` in the order of declaration, which is also the order of serialization.
+def construct(model: type[M], values: dict[str, Any]) -> M:
+    obj = model.__new__(model)
+    _setattr(obj, "__dict__", values)
+    _setattr(obj, "__pydantic_fields_set__", set(values))
+    _setattr(obj, "__pydantic_extra__", None)
+    _setattr(obj, "__pydantic_private__", None)
+    return obj
+
+
+# Decodes a JSON list column whose values repeat across rows, like the roles of users, parsing each distinct
+# value once. Every call returns a new list, so that callers may modify it.
+def json_list(text: str) -> list[Any]:
+    return list(_json_tuple(text))
+
+
+@lru_cache(maxsize=1024)
+def _json_tuple(text: str) -> tuple[Any, ...]:
+    return tuple(json.loads(text))
+
+
+# Timestamps are stored as integer microseconds since the Unix epoch, which order and compare as numbers.
+# A naive `dt` is taken as UTC, like every time of the API.
+def to_micros(dt: datetime) -> int:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return (dt - _EPOCH) // _MICROSECOND
+
+
+# The float division is exact to the microsecond until the year 2106, and faster than adding a timedelta.
+def from_micros(micros: int) -> datetime:
+    return datetime.fromtimestamp(micros / 1_000_000, timezone.utc)
@@ -0,0 +1,305 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import itertools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from functools import partial
+from pathlib import Path
+from sqlite3 import Connection, Cursor, connect
+from typing import AsyncIterator, Callable, ContextManager, Iterator
+
+from cryptid.data import init
+from cryptid.data.init import AsyncTxWrapper, P, R, StreamFunc, TxFunc, TxWrapper
+from cryptid.data.migrate import apply_migrations
+from cryptid.data.migrate import migrate as migrate_database
+from cryptid.data.pool import ConnectionPool, PoolStats
+from cryptid.data.pragma import apply_profile, get_profile
+from cryptid.error import PoolTimeoutError
+
+__all__ = [
+    "ShardCursor",
+    "ShardSet",
+    "async_query",
+    "async_stream",
+    "async_transaction",
+    "change_logs",
+    "get_shards",
+    "migrate",
+    "open_shards",
+    "query",
+    "shard_of",
+    "shard_paths",
+    "stream",
+    "transaction",
+]
+
+# The runner of the sharded backend, which spreads `creature` and `explorer` over `CRYPTID_SQLITE_SHARDS`
+# SQLite files by a hash of `name`, while the users stay in the database of `cryptid.data.init`.
+# Each shard has its own write lock, so writes to different shards commit in parallel.
+SHARDS: int = int(os.getenv("CRYPTID_SQLITE_SHARDS", default="4"))
+
+_memory_set_ids: Iterator[int] = itertools.count(start=1)
+
+
+# The shard of `key` among `count` shards. `hash()` is salted per process, so the hash is a digest instead.
+def shard_of(key: str, count: int) -> int:
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % count
+
+
+# The files of `count` shards next to `database`, e.g. `cryptid.shard-0-of-4.db`. The count is part of the
+# names, so a change of `CRYPTID_SQLITE_SHARDS` without resharding finds empty shards instead of misrouting.
+# A single shard is the database itself, which lets `cryptid.data.reshard` move an unsharded database.
+def shard_paths(database: str, count: int) -> list[str]:
+    if count == 1 or database == ":memory:":
+        return [database] * count
+    path = Path(database)
+    return [str(path.with_name(f"{path.stem}.shard-{i}-of-{count}{path.suffix}")) for i in range(count)]
+
+
+class ShardSet:
+    def __init__(self, count: int) -> None:
+        if count < 1:
+            raise ValueError(f"shard count must be positive, but got {count}")
+        self.count = count
+        self.paths = shard_paths(init.database, count)
+        self._profile = get_profile()
+        size = int(os.getenv("CRYPTID_SQLITE_POOL_SIZE", default="8"))
+        timeout = float(os.getenv("CRYPTID_SQLITE_POOL_TIMEOUT", default="30"))
+        # Like the pooled connections of `cryptid.data.init`, the in-memory shards are named shared databases.
+        set_id = next(_memory_set_ids)
+        self._connects: list[Callable[[], Connection]] = [] if count == 1 else [
+            partial(self._connect, path, f"file:cryptid-shard-{set_id}-{i}?mode=memory&cache=shared")
+            for i, path in enumerate(self.paths)
+        ]
+        self._pools = [ConnectionPool(connect, size=size, timeout=timeout) for connect in self._connects]
+        # A query or transaction holds at most one connection of each shard while it runs on the executor, so the
+        # executor never outgrows the pools.
+        self.executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="cryptid-shard")
+        # A stream holds its connections for as long as its client reads, so the streams have pools and an executor
+        # of their own, like those of `cryptid.data.init`, and are admitted up to their size. An admitted stream
+        # holds at most one connection of each stream pool, so it never waits for one.
+        self.max_streams = int(os.getenv("CRYPTID_SQLITE_MAX_STREAMS", default="4"))
+        self.timeout = timeout
+        self._stream_pools = [ConnectionPool(connect, size=self.max_streams) for connect in self._connects]
+        self._stream_slots = threading.BoundedSemaphore(self.max_streams)
+        self.stream_executor = ThreadPoolExecutor(
+            max_workers=self.max_streams,
+            thread_name_prefix="cryptid-shard-stream",
+        )
+
+    def _connect(self, path: str, memory_uri: str) -> Connection:
+        if path == ":memory:":
+            conn = connect(memory_uri, isolation_level="DEFERRED", check_same_thread=False, uri=True)
+        else:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            conn = connect(path, isolation_level="DEFERRED", check_same_thread=False)
+        apply_profile(conn, self._profile)
+        return conn
+
+    def connection(self, index: int) -> ContextManager[Connection]:
+        return init.pooled_conn() if self.count == 1 else self._pools[index].connection()
+
+    def stream_connection(self, index: int) -> ContextManager[Connection]:
+        return init.stream_conn() if self.count == 1 else self._stream_pools[index].connection()
+
+    # Waits for a stream to end if `max_streams` are open, and raises PoolTimeoutError after the pool timeout.
+    def admit_stream(self) -> None:
+        if not self._stream_slots.acquire(timeout=self.timeout):
+            raise PoolTimeoutError(size=self.max_streams, timeout=self.timeout)
+
+    def end_stream(self) -> None:
+        self._stream_slots.release()
+
+    # Opens a connection to a shard outside the pools.
+    def connect(self, index: int) -> Connection:
+        return init.get_conn(new=True) if self.count == 1 else self._connects[index]()
+
+    # Each shard has the whole schema, though only `creature` and `explorer` are used, so that the shards
+    # follow the migrations of the database.
+    def migrate(self) -> None:
+        for i in range(self.count):
+            with self.connection(i) as conn:
+                apply_migrations(conn)
+
+    def stats(self) -> list[PoolStats]:
+        return [pool.stats() for pool in self._pools]
+
+    def close(self) -> None:
+        self.executor.shutdown()
+        self.stream_executor.shutdown()
+        for pool in self._pools + self._stream_pools:
+            pool.close()
+
+
+# The cursor passed to the repositories of the sharded backend. It checks out a connection of a shard, or of
+# the database of the users, on first use, and within a transaction begins it with BEGIN IMMEDIATE, so that the
+# write lock is taken before anything is read. A transaction over several shards must take them in index order
+# to never wait for a shard held by a transaction waiting for one of its own.
+class ShardCursor:
+    def __init__(self, shards: ShardSet, *, in_tx: bool, stream: bool = False) -> None:
+        self.shards = shards
+        self.in_tx = in_tx
+        self.stream = stream
+        self._conns: dict[int | None, Connection] = {}
+        self._stack = ExitStack()
+
+    @property
+    def count(self) -> int:
+        return self.shards.count
+
+    def index(self, key: str) -> int:
+        return shard_of(key, self.shards.count)
+
+    def route(self, key: str) -> Cursor:
+        return self.at(self.index(key))
+
+    def at(self, index: int) -> Cursor:
+        return self._cursor(None if self.shards.count == 1 else index)
+
+    def main(self) -> Cursor:
+        return self._cursor(None)
+
+    def _cursor(self, index: int | None) -> Cursor:
+        if (conn := self._conns.get(index)) is None:
+            conn = self._stack.enter_context(self._connection(index))
+            self._conns[index] = conn
+            if self.in_tx:
+                conn.execute("BEGIN IMMEDIATE")
+        return conn.cursor()
+
+    def _connection(self, index: int | None) -> ContextManager[Connection]:
+        if self.stream:
+            return init.stream_conn() if index is None else self.shards.stream_connection(index)
+        return init.pooled_conn() if index is None else self.shards.connection(index)
+
+    # The shards commit one by one, so a transaction over several shards is atomic on each shard but not across
+    # them. If a commit fails, the later shards are rolled back when their connections return to the pools.
+    def close(self, *, commit: bool) -> None:
+        with self._stack:
+            if commit and self.in_tx:
+                for conn in self._conns.values():
+                    conn.commit()
+
+
+_shards: ShardSet | None = None
+_lock: threading.Lock = threading.Lock()
+_local: threading.local = threading.local()
+
+
+def get_shards() -> ShardSet:
+    global _shards
+    if _shards is None:
+        with _lock:
+            if _shards is None:
+                _shards = ShardSet(SHARDS)
+    return _shards
+
+
+# Replaces the shards of the backend, e.g. in tests or after resharding.
+def open_shards(count: int) -> ShardSet:
+    global _shards
+    with _lock:
+        if _shards is not None:
+            _shards.close()
+        _shards = ShardSet(count)
+    return _shards
+
+
+def migrate() -> None:
+    migrate_database()
+    get_shards().migrate()
+
+
+def change_logs() -> list[Callable[[], Connection]]:
+    shards = get_shards()
+    logs = [partial(init.get_conn, new=True)]
+    if shards.count > 1:
+        logs.extend(partial(shards.connect, i) for i in range(shards.count))
+    return logs
+
+
+def _run(func: TxFunc, args: P.args, kwargs: P.kwargs, *, in_tx: bool = True) -> R:
+    # A nested call joins the transaction (or query) already running on this thread.
+    outer = getattr(_local, "cursor", None)
+    if outer is not None and (outer.in_tx or not in_tx):
+        return func(outer, *args, **kwargs)
+    cursor = ShardCursor(get_shards(), in_tx=in_tx)
+    _local.cursor = cursor
+    done = False
+    try:
+        result = func(cursor, *args, **kwargs)
+        done = True
+        return result
+    finally:
+        _local.cursor = outer
+        cursor.close(commit=done)
+
+
+def transaction(func: TxFunc) -> TxWrapper:
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        return _run(func, args, kwargs)
+    return wrapper
+
+
+def query(func: TxFunc) -> TxWrapper:
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        return _run(func, args, kwargs, in_tx=False)
+    return wrapper
+
+
+# There is no group commit writer, so that transactions on different shards run in parallel on the executor.
+def async_transaction(func: TxFunc) -> AsyncTxWrapper:
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_shards().executor, lambda: _run(func, args, kwargs))
+    return wrapper
+
+
+def async_query(func: TxFunc) -> AsyncTxWrapper:
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        return await asyncio.get_running_loop().run_in_executor(
+            get_shards().executor,
+            lambda: _run(func, args, kwargs, in_tx=False),
+        )
+    return wrapper
+
+
+def stream(func: StreamFunc) -> Callable[P, Iterator[R]]:
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> Iterator[R]:
+        shards = get_shards()
+        shards.admit_stream()
+        cursor = ShardCursor(shards, in_tx=False, stream=True)
+        try:
+            yield from func(cursor, *args, **kwargs)
+        finally:
+            cursor.close(commit=False)
+            shards.end_stream()
+    return wrapper
+
+
+# Like `cryptid.data.init.async_stream`, a stream waits to be admitted in a thread of the event loop, and then
+# advances on the stream executor.
+def async_stream(func: StreamFunc, *, batch_size: int = 1000) -> Callable[P, AsyncIterator[R]]:
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> AsyncIterator[R]:
+        loop = asyncio.get_running_loop()
+        shards = get_shards()
+        await asyncio.to_thread(shards.admit_stream)
+        cursor = ShardCursor(shards, in_tx=False, stream=True)
+        items = func(cursor, *args, **kwargs)
+        try:
+            while batch := await loop.run_in_executor(
+                shards.stream_executor,
+                lambda: list(itertools.islice(items, batch_size)),
+            ):
+                for item in batch:
+                    yield item
+        finally:
+            items.close()
+            cursor.close(commit=False)
+            shards.end_stream()
+    return wrapper
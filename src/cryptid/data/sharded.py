@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+from types import ModuleType
+from typing import Any, Callable, Generic, Iterator, TypeVar
+
+from cryptid.data import creature as creature_data
+from cryptid.data import explorer as explorer_data
+from cryptid.data import user as user_data
+from cryptid.data import xuser as xuser_data
+from cryptid.data.shard import ShardCursor
+from cryptid.model.bulk import BulkItem, BulkMode
+from cryptid.model.creature import Creature, CreatureFilter, CreatureHit, PartialCreature
+from cryptid.model.explorer import Explorer, ExplorerFilter, ExplorerHit, PartialExplorer
+
+M = TypeVar("M", Creature, Explorer)
+H = TypeVar("H", CreatureHit, ExplorerHit)
+
+
+# The repositories of the sharded backend, which run the functions of a `cryptid.data` module on the shards.
+# A name routes to one shard, and the lists of all shards are merged in their order. Each shard pages from
+# the same key, so a page of `limit` rows reads at most `limit` rows per shard.
+class ShardedRepository(Generic[M, H]):
+    def __init__(self, module: ModuleType, table: str, hit_key: Callable[[H], tuple[float, str]]) -> None:
+        self.module = module
+        self.table = table
+        self.hit_key = hit_key
+
+    def create(self, cursor: ShardCursor, model: M) -> M:
+        return self.module.create(cursor.route(model.name), model)
+
+    # Each shard writes its own items, which keeps a name repeated within `models` on one shard. The reported
+    # indexes are mapped back to the positions in `models`.
+    def create_many(self, cursor: ShardCursor, models: list[M], *, mode: BulkMode = "insert") -> list[BulkItem]:
+        positions: dict[int, list[int]] = {}
+        for position, model in enumerate(models):
+            positions.setdefault(cursor.index(model.name), []).append(position)
+        items: list[BulkItem | None] = [None] * len(models)
+        for index in sorted(positions):
+            shard_positions = positions[index]
+            shard_models = [models[position] for position in shard_positions]
+            for item in self.module.create_many(cursor.at(index), shard_models, mode=mode):
+                position = shard_positions[item.index]
+                items[position] = item.model_copy(update={"index": position})
+        return items
+
+    def get_all(
+        self,
+        cursor: ShardCursor,
+        *,
+        limit: int | None = None,
+        after: str | None = None,
+        filters: CreatureFilter | ExplorerFilter | None = None,
+    ) -> list[M]:
+        pages = [
+            self.module.get_all(cursor.at(i), limit=limit, after=after, filters=filters)
+            for i in range(cursor.count)
+        ]
+        return list(itertools.islice(heapq.merge(*pages, key=_name), limit))
+
+    def iter_all(self, cursor: ShardCursor, *, filters: CreatureFilter | ExplorerFilter | None = None) -> Iterator[M]:
+        items = [self.module.iter_all(cursor.at(i), filters=filters) for i in range(cursor.count)]
+        return heapq.merge(*items, key=_name)
+
+    # bm25 weighs the words by their frequency within each shard, so the scores of different shards are close,
+    # but not exactly those of one database.
+    def search(
+        self,
+        cursor: ShardCursor,
+        text: str,
+        *,
+        limit: int | None = None,
+        after: tuple[float, str] | None = None,
+    ) -> list[H]:
+        hits = [self.module.search(cursor.at(i), text, limit=limit, after=after) for i in range(cursor.count)]
+        return list(itertools.islice(heapq.merge(*hits, key=self.hit_key), limit))
+
+    def get_one(self, cursor: ShardCursor, name: str) -> M:
+        return self.module.get_one(cursor.route(name), name)
+
+    def replace(self, cursor: ShardCursor, name: str, model: M, *, version: int | None = None) -> M:
+        if cursor.index(model.name) == cursor.index(name):
+            return self.module.replace(cursor.route(name), name, model, version=version)
+        return self._move(cursor, name, model.name, version, lambda old: model)
+
+    def modify(
+        self,
+        cursor: ShardCursor,
+        name: str,
+        model: PartialCreature | PartialExplorer,
+        *,
+        version: int | None = None,
+    ) -> M:
+        if model.name is None or cursor.index(model.name) == cursor.index(name):
+            return self.module.modify(cursor.route(name), name, model, version=version)
+        update = model.model_dump(exclude_unset=True, exclude_none=True)
+        return self._move(cursor, name, model.name, version, lambda old: old.model_copy(update=update))
+
+    def delete(self, cursor: ShardCursor, name: str, *, version: int | None = None) -> None:
+        self.module.delete(cursor.route(name), name, version=version)
+
+    # A rename to a name of another shard moves the row: `build` makes the new row from the old one, which is
+    # created on the new shard at the next version and deleted from the old one, in one transaction on each.
+    def _move(self, cursor: ShardCursor, name: str, new_name: str, version: int | None, build: Callable[[M], M]) -> M:
+        source, target = cursor.index(name), cursor.index(new_name)
+        for index in sorted((source, target)):
+            cursor.at(index)
+        old = self.module.check_version(cursor.at(source), name, version)
+        new = build(old)
+        self.module.create(cursor.at(target), new, fetch=False)
+        sql = f"UPDATE {self.table} SET version = :version WHERE name = :name"
+        cursor.at(target).execute(sql, {"version": old.version + 1, "name": new.name})
+        self.module.delete(cursor.at(source), name)
+        return new.model_copy(update={"version": old.version + 1})
+
+
+def _name(model: Creature | Explorer) -> str:
+    return model.name
+
+
+# The users are not sharded, and run the functions of their module with the cursor of the main database.
+class MainRepository:
+    def __init__(self, module: ModuleType) -> None:
+        self.module = module
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        func = getattr(self.module, name)
+        return lambda cursor, *args, **kwargs: func(cursor.main(), *args, **kwargs)
+
+
+creature: ShardedRepository[Creature, CreatureHit] = ShardedRepository(
+    creature_data,
+    "creature",
+    lambda hit: (hit.score, hit.creature.name),
+)
+explorer: ShardedRepository[Explorer, ExplorerHit] = ShardedRepository(
+    explorer_data,
+    "explorer",
+    lambda hit: (hit.score, hit.explorer.name),
+)
+user: MainRepository = MainRepository(user_data)
+xuser: MainRepository = MainRepository(xuser_data)
@@ -2,32 +2,22 @@ from __future__ import annotations
 
 import json
 from datetime import datetime, timezone
-from typing import Any, TypeAlias
+from typing import Any, Iterator, TypeAlias
 
-from cryptid.data import xuser
-from cryptid.data.init import Cursor, IntegrityError, is_unique_constraint_failed, transaction_with
-from cryptid.error import EntityAlreadyExistsError, EntityNotFoundError
-from cryptid.model.user import PartialUser, PrivateUser, PublicUser
+from cryptid.data.init import Cursor, IntegrityError, is_unique_constraint_failed
+from cryptid.data.patch import set_changed
+from cryptid.data.row import construct, from_micros, json_list, to_micros
+from cryptid.error import EntityAlreadyExistsError, EntityNotFoundError, VersionMismatchError
+from cryptid.model.user import PartialUser, PrivateUser, PublicUser, UserFilter
 
-Row: TypeAlias = tuple[int, str, str, str, str, str]
+PublicRow: TypeAlias = tuple[int, str, str, int, int, int]
+PrivateRow: TypeAlias = tuple[int, str, str, int, int, int, str]
 
+# The orders of `PublicRow` and `PrivateRow`. Public views never read the password hash.
+PUBLIC_COLUMNS: str = "id, name, roles, created_at, updated_at, version"
+PRIVATE_COLUMNS: str = f"{PUBLIC_COLUMNS}, hash"
 
-@transaction_with(new_conn=False)
-def _create_table(cursor: Cursor) -> None:
-    # CURRENT_TIMESTAMP or DATETIME('now') creates the UTC time.
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS user (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT UNIQUE NOT NULL,
-        hash TEXT NOT NULL,
-        roles TEXT NOT NULL CHECK(JSON_VALID(roles)),
-        created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-        updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
-    )
-    """)
-
-
-_create_table()
+_AT_VERSION: str = "AND version = :version"
 
 
 def model_to_dict(
@@ -36,10 +26,10 @@ def model_to_dict(
     for_create: bool = False,
     for_update: bool = False,
 ) -> dict[str, Any]:
-    user_dict = user.model_dump(exclude={"roles", "created_at", "updated_at"})
+    user_dict = user.model_dump(exclude={"roles", "created_at", "updated_at", "version"})
     user_dict["roles"] = json.dumps(user.roles)
     if for_create or for_update:
-        now = datetime.now(timezone.utc).isoformat()
+        now = to_micros(datetime.now(timezone.utc))
         if for_create:
             user_dict["created_at"] = now
             user_dict["updated_at"] = now
@@ -48,37 +38,42 @@ def model_to_dict(
     return user_dict
 
 
-def row_to_model(row: Row, *, public: bool = True) -> PublicUser | PrivateUser:
-    id_, name, hash_, roles, created_at, updated_at = row
+def row_to_model(row: PublicRow | PrivateRow, *, public: bool = True) -> PublicUser | PrivateUser:
+    id_, name, roles, created_at, updated_at, version, *hash_ = row
     id_ = str(id_)
-    roles = json.loads(roles)
-    # Without the following conversions, pydantic.BaseModel automatically converts the type from str to datetime,
-    # but I prefer the explicit conversion.
-    created_at = datetime.fromisoformat(created_at)
-    updated_at = datetime.fromisoformat(updated_at)
+    roles = json_list(roles)
+    # The timestamps are stored as epoch microseconds. `construct` below converts nothing, so they are converted
+    # to datetime here.
+    created_at = from_micros(created_at)
+    updated_at = from_micros(updated_at)
     if public:
-        return PublicUser(
-            id=id_,
-            name=name,
-            roles=roles,
-            created_at=created_at,
-            updated_at=updated_at,
-        )
+        return construct(PublicUser, {
+            "id": id_,
+            "name": name,
+            "roles": roles,
+            "created_at": created_at,
+            "updated_at": updated_at,
+            "deleted_at": None,
+            "version": version,
+        })
     else:
-        return PrivateUser(
-            id=id_,
-            name=name,
-            roles=roles,
-            created_at=created_at,
-            updated_at=updated_at,
-            hash=hash_,
-        )
+        return construct(PrivateUser, {
+            "id": id_,
+            "name": name,
+            "roles": roles,
+            "created_at": created_at,
+            "updated_at": updated_at,
+            "deleted_at": None,
+            "version": version,
+            "hash": hash_[0],
+        })
 
 
 def create(cursor: Cursor, user: PrivateUser, *, fetch: bool = True) -> PublicUser | None:
-    sql = """
+    sql = f"""
     INSERT INTO user (name, hash, roles, created_at, updated_at)
     VALUES (:name, :hash, :roles, :created_at, :updated_at)
+    RETURNING {PUBLIC_COLUMNS}
     """
     try:
         cursor.execute(sql, model_to_dict(user, for_create=True))
@@ -86,21 +81,83 @@ def create(cursor: Cursor, user: PrivateUser, *, fetch: bool = True) -> PublicUs
         if is_unique_constraint_failed(e):
             raise EntityAlreadyExistsError(entity="user", key=user.name)
         raise e
-    return get_one(cursor, str(cursor.lastrowid)) if fetch else None
+    row = cursor.fetchone()
+    return row_to_model(row) if fetch else None
 
 
-def get_all(cursor: Cursor) -> list[PublicUser]:
-    sql = """
-    SELECT *
-    FROM user
+def select_all(
+    *,
+    limit: int | None = None,
+    after: str | tuple[datetime, str] | None = None,
+    role: str | None = None,
+    filters: UserFilter | None = None,
+) -> tuple[str, dict[str, Any]]:
+    conditions, source, key = [], "user", "user.id"
+    params: dict[str, Any] = {"role": role, "limit": -1 if limit is None else limit}
+    if role is not None:
+        # With `role`, the users are read from the range of the role in `user_role`, which is in the order of `id`.
+        source = "user_role JOIN user ON user.id = user_role.user_id"
+        key = "user_role.user_id"
+        conditions.append("user_role.role = :role")
+    if filters is not None:
+        if filters.created_after is not None:
+            conditions.append("user.created_at > :created_after")
+            params["created_after"] = to_micros(filters.created_after)
+        if filters.created_before is not None:
+            conditions.append("user.created_at < :created_before")
+            params["created_before"] = to_micros(filters.created_before)
+    # With a range filter, the users are ordered by the filtered time, and a page is a range scan of its index.
+    # `after` is then the (time, id) of the last user of the previous page.
+    column = filters.order_by if filters is not None else None
+    if column == "deleted_at":
+        raise ValueError("users not deleted have no deletion time to filter by")
+    if column is not None:
+        key = f"user.{column}, user.id"
+        if after is not None:
+            conditions.append(f"({key}) > (:after_at, :after)")
+            params["after_at"], params["after"] = to_micros(after[0]), after[1]
+    elif after is not None:
+        conditions.append(f"{key} > :after")
+        params["after"] = after
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    sql = f"""
+    SELECT {PUBLIC_COLUMNS}
+    FROM {source}
+    {where}
+    ORDER BY {key}
+    LIMIT :limit
     """
-    cursor.execute(sql)
+    return sql, params
+
+
+def get_all(
+    cursor: Cursor,
+    *,
+    limit: int | None = None,
+    after: str | tuple[datetime, str] | None = None,
+    role: str | None = None,
+    filters: UserFilter | None = None,
+) -> list[PublicUser]:
+    cursor.execute(*select_all(limit=limit, after=after, role=role, filters=filters))
     return [row_to_model(row) for row in cursor.fetchall()]
 
 
+def iter_all(
+    cursor: Cursor,
+    *,
+    batch_size: int = 1000,
+    role: str | None = None,
+    filters: UserFilter | None = None,
+) -> Iterator[PublicUser]:
+    cursor.execute(*select_all(role=role, filters=filters))
+    while rows := cursor.fetchmany(batch_size):
+        for row in rows:
+            yield row_to_model(row)
+
+
 def get_one(cursor: Cursor, id_: str, *, public: bool = True) -> PublicUser | PrivateUser:
-    sql = """
-    SELECT *
+    sql = f"""
+    SELECT {PUBLIC_COLUMNS if public else PRIVATE_COLUMNS}
     FROM user
     WHERE id = :id
     """
@@ -110,44 +167,110 @@ def get_one(cursor: Cursor, id_: str, *, public: bool = True) -> PublicUser | Pr
     return row_to_model(row, public=public)
 
 
-def replace(cursor: Cursor, id_: str, user: PublicUser, *, fetch: bool = True) -> PublicUser | None:
-    sql = """
+# Raises the error of a conditional write to `id_` that matched no row, like `cryptid.data.creature.check_version`.
+def check_version(cursor: Cursor, id_: str, version: int | None) -> PublicUser:
+    user = get_one(cursor, id_)
+    if version is not None and user.version != version:
+        raise VersionMismatchError(entity="user", key=id_, version=version)
+    return user
+
+
+def replace(
+    cursor: Cursor,
+    id_: str,
+    user: PublicUser,
+    *,
+    version: int | None = None,
+    fetch: bool = True,
+) -> PublicUser | None:
+    sql = f"""
     UPDATE user
     SET name = :name,
         roles = :roles,
-        updated_at = :updated_at
-    WHERE id = :id
+        updated_at = :updated_at,
+        version = version + 1
+    WHERE id = :id {_AT_VERSION if version is not None else ""}
+    RETURNING {PUBLIC_COLUMNS}
     """
     params = model_to_dict(user, for_update=True)
     params["id"] = id_
+    params["version"] = version
     try:
         cursor.execute(sql, params)
     except IntegrityError as e:
         if is_unique_constraint_failed(e):
             raise EntityAlreadyExistsError(entity="user", key=user.name)
         raise e
-    if cursor.rowcount == 0:
-        raise EntityNotFoundError(entity="user", key=id_)
-    return get_one(cursor, id_) if fetch else None
+    if (row := cursor.fetchone()) is None:
+        check_version(cursor, id_, version)
+    return row_to_model(row) if fetch else None
 
 
-def modify(cursor: Cursor, id_: str, user: PartialUser, *, fetch: bool = True) -> PublicUser | None:
-    updated = update_model(get_one(cursor, id_), user)
-    return replace(cursor, id_, updated, fetch=fetch)
+# Updates only the fields set in `user`, and `updated_at` with them, with one UPDATE that writes nothing if
+# the fields already hold their values, so a no-op PATCH keeps `updated_at`. Then, or if the user does not
+# exist or is at another version, the user is read back with `check_version`, which raises the error. A null
+# is ignored like in `cryptid.data.creature.modify`.
+def modify(
+    cursor: Cursor,
+    id_: str,
+    user: PartialUser,
+    *,
+    version: int | None = None,
+    fetch: bool = True,
+) -> PublicUser | None:
+    params = user.model_dump(exclude_unset=True, exclude_none=True)
+    if not params:
+        user_old = check_version(cursor, id_, version)
+        return user_old if fetch else None
+    if "roles" in params:
+        params["roles"] = json.dumps(params["roles"])
+    assignments, changed = set_changed(params)
+    sql = f"""
+    UPDATE user
+    SET {assignments}, updated_at = :updated_at, version = version + 1
+    WHERE id = :id {_AT_VERSION if version is not None else ""} AND ({changed})
+    RETURNING {PUBLIC_COLUMNS}
+    """
+    params["id"] = id_
+    params["updated_at"] = to_micros(datetime.now(timezone.utc))
+    params["version"] = version
+    try:
+        cursor.execute(sql, params)
+    except IntegrityError as e:
+        if is_unique_constraint_failed(e):
+            raise EntityAlreadyExistsError(entity="user", key=params["name"])
+        raise e
+    if (row := cursor.fetchone()) is None:
+        user_old = check_version(cursor, id_, version)
+        return user_old if fetch else None
+    return row_to_model(row) if fetch else None
+
 
+def delete(cursor: Cursor, id_: str, *, version: int | None = None) -> None:
+    where = f"id = :id {_AT_VERSION if version is not None else ''}"
+    if not _archive(cursor, where, {"id": id_, "version": version}):
+        check_version(cursor, id_, version)
 
-def update_model(user: PublicUser, update: PartialUser) -> PublicUser:
-    update_dict = update.model_dump(exclude_unset=True)
-    return user.model_copy(update=update_dict)
 
+# Archives the users of `ids` into `xuser` and deletes them with one INSERT ... SELECT and one DELETE, whatever
+# the number of users, so the rows never travel through Python. Returns the ids of the deleted users.
+def delete_many(cursor: Cursor, ids: list[str]) -> list[str]:
+    return _archive(cursor, "id IN (SELECT CAST(value AS INTEGER) FROM json_each(:ids))", {"ids": json.dumps(ids)})
 
-def delete(cursor: Cursor, id_: str) -> None:
-    user = get_one(cursor, id_, public=False)
-    sql = """
+
+def _archive(cursor: Cursor, where: str, params: dict[str, Any]) -> list[str]:
+    params["deleted_at"] = to_micros(datetime.now(timezone.utc))
+    sql = f"""
+    INSERT INTO xuser (id, name, hash, roles, created_at, updated_at, deleted_at)
+    SELECT id, name, hash, roles, created_at, updated_at, :deleted_at
+    FROM user
+    WHERE {where}
+    """
+    cursor.execute(sql, params)
+    sql = f"""
     DELETE FROM user
-    WHERE id = :id
+    WHERE {where}
+    RETURNING id
     """
-    cursor.execute(sql, {"id": id_})
-    if cursor.rowcount == 0:
-        raise EntityNotFoundError(entity="user", key=id_)
-    xuser.create(cursor, user, fetch=False)
+    cursor.execute(sql, params)
+    return [str(id_) for (id_,) in cursor.fetchall()]
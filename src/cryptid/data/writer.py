@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from sqlite3 import Connection
+from typing import Any, Callable, TypeAlias, TypeVar
+
+__all__ = [
+    "GroupCommitWriter",
+    "WriterStats",
+]
+
+R = TypeVar("R")
+Job: TypeAlias = Callable[[Connection], Any]
+
+_STOP: object = object()
+
+
+@dataclass(frozen=True)
+class WriterStats:
+    queue_depth: int
+    batches: int
+    transactions: int
+    failed: int
+    max_batch_size: int
+
+
+# A single writer thread, which owns the only write connection and commits the submitted jobs in batches.
+# Every job in a batch runs in its own SAVEPOINT, so a failing job rolls back only its own writes,
+# and then all the jobs in the batch are committed by one physical COMMIT (and thus one fsync).
+# A job submitted while the writer is committing a batch waits for the next batch, so the batch size grows
+# with the write load. `max_delay` (in seconds) additionally holds a batch open for late jobs.
+class GroupCommitWriter:
+    def __init__(self, connect: Callable[[], Connection], *, max_batch: int = 64, max_delay: float = 0.0) -> None:
+        if max_batch < 1:
+            raise ValueError(f"max batch must be positive, but got {max_batch}")
+        self._connect = connect
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue: queue.SimpleQueue[tuple[Job, Future] | object] = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._closed = False
+        self._batches = 0
+        self._transactions = 0
+        self._failed = 0
+        self._max_batch_size = 0
+
+    def submit_future(self, job: Callable[[Connection], R]) -> Future[R]:
+        future: Future[R] = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("group commit writer closed")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="cryptid-sqlite-writer", daemon=True)
+                self._thread.start()
+            self._queue.put((job, future))
+        return future
+
+    def submit(self, job: Callable[[Connection], R]) -> R:
+        return self.submit_future(job).result()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+
+    def stats(self) -> WriterStats:
+        return WriterStats(
+            queue_depth=self._queue.qsize(),
+            batches=self._batches,
+            transactions=self._transactions,
+            failed=self._failed,
+            max_batch_size=self._max_batch_size,
+        )
+
+    def _run(self) -> None:
+        conn = self._connect()
+        try:
+            stopping = False
+            while not stopping:
+                if (item := self._queue.get()) is _STOP:
+                    break
+                batch = [item]
+                deadline = time.monotonic() + self.max_delay
+                while len(batch) < self.max_batch:
+                    try:
+                        if (remaining := deadline - time.monotonic()) > 0:
+                            item = self._queue.get(timeout=remaining)
+                        else:
+                            item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    batch.append(item)
+                self._commit(conn, batch)
+        finally:
+            conn.close()
+
+    def _commit(self, conn: Connection, batch: list[tuple[Job, Future]]) -> None:
+        done: list[tuple[Future, Any, BaseException | None]] = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for job, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                conn.execute("SAVEPOINT job")
+                try:
+                    result = job(conn)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO job")
+                    conn.execute("RELEASE job")
+                    done.append((future, None, e))
+                else:
+                    conn.execute("RELEASE job")
+                    done.append((future, result, None))
+            conn.commit()
+        except Exception as e:
+            # The batch itself failed (e.g. BEGIN, ROLLBACK TO or COMMIT), so none of its jobs is committed.
+            if conn.in_transaction:
+                conn.rollback()
+            done = [
+                (future, None, e)
+                for _, future in batch
+                if future.running() or future.set_running_or_notify_cancel()
+            ]
+        self._batches += 1
+        self._max_batch_size = max(self._max_batch_size, len(batch))
+        for future, result, error in done:
+            self._transactions += 1
+            if error is None:
+                future.set_result(result)
+            else:
+                self._failed += 1
+                future.set_exception(error)
@@ -2,32 +2,20 @@ from __future__ import annotations
 
 import json
 from datetime import datetime, timezone
-from typing import Any, TypeAlias
+from typing import Any, Iterator, TypeAlias
 
-from cryptid.data.init import Cursor, IntegrityError, is_unique_constraint_failed, transaction_with
+from cryptid.data.init import Cursor, IntegrityError, is_unique_constraint_failed
+from cryptid.data.patch import set_changed
+from cryptid.data.row import construct, from_micros, json_list, to_micros
 from cryptid.error import EntityAlreadyExistsError, EntityNotFoundError
-from cryptid.model.user import PartialUser, PrivateUser, PublicUser
-
-Row: TypeAlias = tuple[int, str, str, str, str, str, str]
-
-
-@transaction_with(new_conn=False)
-def _create_table(cursor: Cursor) -> None:
-    # CURRENT_TIMESTAMP or DATETIME('now') creates the UTC time.
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS xuser (
-        id INTEGER PRIMARY KEY,
-        name TEXT NOT NULL,
-        hash TEXT NOT NULL,
-        roles TEXT NOT NULL CHECK(JSON_VALID(roles)),
-        created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-        updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-        deleted_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
-    )
-    """)
+from cryptid.model.user import PartialUser, PrivateUser, PublicUser, UserFilter
 
+PublicRow: TypeAlias = tuple[int, str, str, int, int, int]
+PrivateRow: TypeAlias = tuple[int, str, str, int, int, int, str]
 
-_create_table()
+# The orders of `PublicRow` and `PrivateRow`, like in `cryptid.data.user`.
+PUBLIC_COLUMNS: str = "id, name, roles, created_at, updated_at, deleted_at"
+PRIVATE_COLUMNS: str = f"{PUBLIC_COLUMNS}, hash"
 
 
 def model_to_dict(
@@ -36,54 +24,56 @@ def model_to_dict(
     for_create: bool = False,
     for_update: bool = False,
 ) -> dict[str, Any]:
-    user_dict = user.model_dump(exclude={"id", "roles", "created_at", "updated_at", "deleted_at"})
+    user_dict = user.model_dump(exclude={"id", "roles", "created_at", "updated_at", "deleted_at", "version"})
     user_dict["roles"] = json.dumps(user.roles)
     if for_create or for_update:
-        now = datetime.now(timezone.utc).isoformat()
+        now = to_micros(datetime.now(timezone.utc))
         if for_create:
             user_dict["id"] = int(user.id)
-            user_dict["created_at"] = user.created_at.isoformat()
-            user_dict["updated_at"] = user.updated_at.isoformat()
+            user_dict["created_at"] = to_micros(user.created_at)
+            user_dict["updated_at"] = to_micros(user.updated_at)
             user_dict["deleted_at"] = now
         else:
             user_dict["updated_at"] = now
     return user_dict
 
 
-def row_to_model(row: Row, *, public: bool = True) -> PublicUser | PrivateUser:
-    id_, name, hash_, roles, created_at, updated_at, deleted_at = row
+def row_to_model(row: PublicRow | PrivateRow, *, public: bool = True) -> PublicUser | PrivateUser:
+    id_, name, roles, created_at, updated_at, deleted_at, *hash_ = row
     id_ = str(id_)
-    roles = json.loads(roles)
-    # Without the following conversions, pydantic.BaseModel automatically converts the type from str to datetime,
-    # but I prefer the explicit conversion.
-    created_at = datetime.fromisoformat(created_at)
-    updated_at = datetime.fromisoformat(updated_at)
-    deleted_at = datetime.fromisoformat(deleted_at)
+    roles = json_list(roles)
+    # Converted and trusted like in `cryptid.data.user.row_to_model`.
+    created_at = from_micros(created_at)
+    updated_at = from_micros(updated_at)
+    deleted_at = from_micros(deleted_at)
     if public:
-        return PublicUser(
-            id=id_,
-            name=name,
-            roles=roles,
-            created_at=created_at,
-            updated_at=updated_at,
-            deleted_at=deleted_at,
-        )
+        return construct(PublicUser, {
+            "id": id_,
+            "name": name,
+            "roles": roles,
+            "created_at": created_at,
+            "updated_at": updated_at,
+            "deleted_at": deleted_at,
+            "version": None,
+        })
     else:
-        return PrivateUser(
-            id=id_,
-            name=name,
-            roles=roles,
-            created_at=created_at,
-            updated_at=updated_at,
-            deleted_at=deleted_at,
-            hash=hash_,
-        )
+        return construct(PrivateUser, {
+            "id": id_,
+            "name": name,
+            "roles": roles,
+            "created_at": created_at,
+            "updated_at": updated_at,
+            "deleted_at": deleted_at,
+            "version": None,
+            "hash": hash_[0],
+        })
 
 
 def create(cursor: Cursor, user: PrivateUser, *, fetch: bool = True) -> PublicUser | None:
-    sql = """
+    sql = f"""
     INSERT INTO xuser (id, name, hash, roles, created_at, updated_at, deleted_at)
     VALUES (:id, :name, :hash, :roles, :created_at, :updated_at, :deleted_at)
+    RETURNING {PUBLIC_COLUMNS}
     """
     try:
         cursor.execute(sql, model_to_dict(user, for_create=True))
@@ -91,21 +81,82 @@ def create(cursor: Cursor, user: PrivateUser, *, fetch: bool = True) -> PublicUs
         if is_unique_constraint_failed(e):
             raise EntityAlreadyExistsError(entity="xuser", key=user.id)
         raise e
-    return get_one(cursor, user.id) if fetch else None
+    row = cursor.fetchone()
+    return row_to_model(row) if fetch else None
 
 
-def get_all(cursor: Cursor) -> list[PublicUser]:
-    sql = """
-    SELECT *
-    FROM xuser
+def select_all(
+    *,
+    limit: int | None = None,
+    after: str | tuple[datetime, str] | None = None,
+    role: str | None = None,
+    filters: UserFilter | None = None,
+) -> tuple[str, dict[str, Any]]:
+    conditions, source, key = [], "xuser", "xuser.id"
+    params: dict[str, Any] = {"role": role, "limit": -1 if limit is None else limit}
+    if role is not None:
+        # Reads the range of `role` like `cryptid.data.user.select_all`.
+        source = "xuser_role JOIN xuser ON xuser.id = xuser_role.user_id"
+        key = "xuser_role.user_id"
+        conditions.append("xuser_role.role = :role")
+    if filters is not None:
+        for column in ("created_at", "deleted_at"):
+            name = column.removesuffix("_at")
+            if (value := getattr(filters, f"{name}_after")) is not None:
+                conditions.append(f"xuser.{column} > :{name}_after")
+                params[f"{name}_after"] = to_micros(value)
+            if (value := getattr(filters, f"{name}_before")) is not None:
+                conditions.append(f"xuser.{column} < :{name}_before")
+                params[f"{name}_before"] = to_micros(value)
+    # Orders by the time of a range filter like `cryptid.data.user.select_all`.
+    column = filters.order_by if filters is not None else None
+    if column is not None:
+        key = f"xuser.{column}, xuser.id"
+        if after is not None:
+            conditions.append(f"({key}) > (:after_at, :after)")
+            params["after_at"], params["after"] = to_micros(after[0]), after[1]
+    elif after is not None:
+        conditions.append(f"{key} > :after")
+        params["after"] = after
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    sql = f"""
+    SELECT {PUBLIC_COLUMNS}
+    FROM {source}
+    {where}
+    ORDER BY {key}
+    LIMIT :limit
     """
-    cursor.execute(sql)
+    return sql, params
+
+
+def get_all(
+    cursor: Cursor,
+    *,
+    limit: int | None = None,
+    after: str | tuple[datetime, str] | None = None,
+    role: str | None = None,
+    filters: UserFilter | None = None,
+) -> list[PublicUser]:
+    cursor.execute(*select_all(limit=limit, after=after, role=role, filters=filters))
     return [row_to_model(row) for row in cursor.fetchall()]
 
 
+def iter_all(
+    cursor: Cursor,
+    *,
+    batch_size: int = 1000,
+    role: str | None = None,
+    filters: UserFilter | None = None,
+) -> Iterator[PublicUser]:
+    cursor.execute(*select_all(role=role, filters=filters))
+    while rows := cursor.fetchmany(batch_size):
+        for row in rows:
+            yield row_to_model(row)
+
+
 def get_one(cursor: Cursor, id_: str, *, public: bool = True) -> PublicUser | PrivateUser:
-    sql = """
-    SELECT *
+    sql = f"""
+    SELECT {PUBLIC_COLUMNS if public else PRIVATE_COLUMNS}
     FROM xuser
     WHERE id = :id
     """
@@ -116,29 +167,44 @@ def get_one(cursor: Cursor, id_: str, *, public: bool = True) -> PublicUser | Pr
 
 
 def replace(cursor: Cursor, id_: str, user: PublicUser, *, fetch: bool = True) -> PublicUser | None:
-    sql = """
+    sql = f"""
     UPDATE xuser
     SET name = :name,
         roles = :roles,
         updated_at = :updated_at
     WHERE id = :id
+    RETURNING {PUBLIC_COLUMNS}
     """
     params = model_to_dict(user, for_update=True)
     params["id"] = id_
     cursor.execute(sql, params)
-    if cursor.rowcount == 0:
+    if (row := cursor.fetchone()) is None:
         raise EntityNotFoundError(entity="xuser", key=id_)
-    return get_one(cursor, id_) if fetch else None
+    return row_to_model(row) if fetch else None
 
 
+# A partial update like `cryptid.data.user.modify`.
 def modify(cursor: Cursor, id_: str, user: PartialUser, *, fetch: bool = True) -> PublicUser | None:
-    updated = update_model(get_one(cursor, id_), user)
-    return replace(cursor, id_, updated, fetch=fetch)
-
-
-def update_model(user: PublicUser, update: PartialUser) -> PublicUser:
-    update_dict = update.model_dump(exclude_unset=True)
-    return user.model_copy(update=update_dict)
+    params = user.model_dump(exclude_unset=True, exclude_none=True)
+    if not params:
+        user_old = get_one(cursor, id_)
+        return user_old if fetch else None
+    if "roles" in params:
+        params["roles"] = json.dumps(params["roles"])
+    assignments, changed = set_changed(params)
+    sql = f"""
+    UPDATE xuser
+    SET {assignments}, updated_at = :updated_at
+    WHERE id = :id AND ({changed})
+    RETURNING {PUBLIC_COLUMNS}
+    """
+    params["id"] = id_
+    params["updated_at"] = to_micros(datetime.now(timezone.utc))
+    cursor.execute(sql, params)
+    if (row := cursor.fetchone()) is None:
+        user_old = get_one(cursor, id_)
+        return user_old if fetch else None
+    return row_to_model(row) if fetch else None
 
 
 def delete(cursor: Cursor, id_: str) -> None:
@@ -149,3 +215,20 @@ def delete(cursor: Cursor, id_: str) -> None:
     cursor.execute(sql, {"id": id_})
     if cursor.rowcount == 0:
         raise EntityNotFoundError(entity="xuser", key=id_)
+
+
+# Deletes at most `limit` users deleted before `before`, oldest first, and returns their number.
+# The users are found through the index on `deleted_at`, so a small `limit` keeps the transaction short.
+def purge(cursor: Cursor, *, before: datetime, limit: int) -> int:
+    sql = """
+    DELETE FROM xuser
+    WHERE id IN (
+        SELECT id
+        FROM xuser
+        WHERE deleted_at < :before
+        ORDER BY deleted_at
+        LIMIT :limit
+    )
+    """
+    cursor.execute(sql, {"before": to_micros(before), "limit": limit})
+    return cursor.rowcount
@@ -15,4 +15,10 @@ load_dotenv()
 
 JWT_ALGORITHM: str = os.getenv("CRYPTID_JWT_ALGORITHM", default="HS256")
 JWT_EXPIRES_IN_MINUTES: float = float(os.getenv("CRYPTID_JWT_EXPIRES_IN_MINUTES", default="15"))
-JWT_SECRET_KEY: str = getenv_or_raise("CRYPTID_JWT_SECRET_KEY")
+# The shared secret of the HMAC algorithms (HS256), or the PEM file of the private key of the others (ES256, EdDSA).
+JWT_SECRET_KEY: str | None = os.getenv("CRYPTID_JWT_SECRET_KEY")
+JWT_PRIVATE_KEY_FILE: str | None = os.getenv("CRYPTID_JWT_PRIVATE_KEY_FILE")
+# A JSON file of the signing keys by `kid`, which replaces the single key above and is reloaded when it changes.
+JWT_KEYRING_FILE: str | None = os.getenv("CRYPTID_JWT_KEYRING_FILE")
+JWT_KEYRING_RELOAD_SECONDS: float = float(os.getenv("CRYPTID_JWT_KEYRING_RELOAD_SECONDS", default="10"))
+JWKS_MAX_AGE_SECONDS: int = int(os.getenv("CRYPTID_JWKS_MAX_AGE_SECONDS", default="300"))
@@ -19,6 +19,16 @@ class EntityNotFoundError(Exception):
         return f"{self.entity} '{self.key}' not found"
 
 
+class VersionMismatchError(Exception):
+    def __init__(self, entity: str, key: str, version: int) -> None:
+        self.entity = entity
+        self.key = key
+        self.version = version
+
+    def __str__(self) -> str:
+        return f"{self.entity} '{self.key}' is no longer at version {self.version}"
+
+
 class AuthenticationError(Exception):
     def __init__(self, msg: str) -> None:
         self.msg = msg
@@ -38,3 +48,20 @@ class JWTValidationError(AuthenticationError):
             return str(self.__cause__)
         else:
             return "jwt validation error"
+
+
+class PoolTimeoutError(Exception):
+    def __init__(self, size: int, timeout: float) -> None:
+        self.size = size
+        self.timeout = timeout
+
+    def __str__(self) -> str:
+        return f"no connection available in the pool of size {self.size} within {self.timeout} seconds"
+
+
+class HasherBusyError(Exception):
+    def __init__(self, pending: int) -> None:
+        self.pending = pending
+
+    def __str__(self) -> str:
+        return f"too many passwords being hashed ({self.pending}), retry later"
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+from typing import Iterator
+
 from cryptid.data.init import Cursor
-from cryptid.error import EntityAlreadyExistsError, EntityNotFoundError
-from cryptid.model.creature import Creature, PartialCreature
+from cryptid.error import EntityAlreadyExistsError, EntityNotFoundError, VersionMismatchError
+from cryptid.model.bulk import BulkItem, BulkMode
+from cryptid.model.creature import Creature, CreatureFilter, CreatureHit, PartialCreature
 
 _creatures: list[Creature] = [
     Creature(
@@ -11,6 +14,7 @@ _creatures: list[Creature] = [
         area="Himalayas",
         description="Hirsute Himalayan",
         aka="Abominable Snowman",
+        version=1,
     ),
     Creature(
         name="Bigfoot",
@@ -18,6 +22,7 @@ _creatures: list[Creature] = [
         area="*",
         description="Yeti's Cousin Eddie",
         aka="Sasquatch",
+        version=1,
     ),
 ]
 
@@ -33,12 +38,72 @@ def find_index(name: str) -> int | None:
 def create(_: Cursor | None, creature: Creature) -> Creature:
     if find(creature.name) is not None:
         raise EntityAlreadyExistsError(entity="creature", key=creature.name)
+    creature = creature.model_copy(update={"version": 1})
     _creatures.append(creature)
     return creature
 
 
-def get_all(_: Cursor | None) -> list[Creature]:
-    return _creatures
+def create_many(cursor: Cursor | None, creatures: list[Creature], *, mode: BulkMode = "insert") -> list[BulkItem]:
+    items = []
+    for index, creature in enumerate(creatures):
+        if (i := find_index(creature.name)) is None:
+            _creatures.append(creature.model_copy(update={"version": 1}))
+            items.append(BulkItem(index=index, name=creature.name, status="created"))
+        elif mode == "upsert":
+            _creatures[i] = creature.model_copy(update={"version": _creatures[i].version + 1})
+            items.append(BulkItem(index=index, name=creature.name, status="updated"))
+        elif mode == "skip":
+            items.append(BulkItem(index=index, name=creature.name, status="skipped"))
+        else:
+            error = EntityAlreadyExistsError(entity="creature", key=creature.name)
+            items.append(BulkItem(index=index, name=creature.name, status="failed", detail=str(error)))
+    return items
+
+
+def get_all(
+    _: Cursor | None,
+    *,
+    limit: int | None = None,
+    after: str | None = None,
+    filters: CreatureFilter | None = None,
+) -> list[Creature]:
+    conditions = filters.model_dump(exclude_none=True) if filters else {}
+    creatures = sorted(
+        (
+            c for c in _creatures
+            if (after is None or c.name > after) and all(getattr(c, k) == v for k, v in conditions.items())
+        ),
+        key=lambda c: c.name,
+    )
+    return creatures[:limit]
+
+
+def iter_all(
+    cursor: Cursor | None,
+    *,
+    batch_size: int = 1000,
+    filters: CreatureFilter | None = None,
+) -> Iterator[Creature]:
+    yield from get_all(cursor, filters=filters)
+
+
+def search(
+    _: Cursor | None,
+    text: str,
+    *,
+    limit: int | None = None,
+    after: tuple[float, str] | None = None,
+) -> list[CreatureHit]:
+    words = text.lower().split()
+    hits = sorted(
+        (
+            CreatureHit(creature=c, score=0.0, snippet=c.description)
+            for c in _creatures
+            if words and all(word in (c.name + " " + c.description + " " + c.aka).lower() for word in words)
+        ),
+        key=lambda h: (h.score, h.creature.name),
+    )
+    return [h for h in hits if after is None or (h.score, h.creature.name) > after][:limit]
 
 
 def get_one(_: Cursor | None, name: str) -> Creature:
@@ -47,24 +112,32 @@ def get_one(_: Cursor | None, name: str) -> Creature:
     return creature
 
 
-def replace(_: Cursor | None, name: str, creature: Creature) -> Creature:
-    if (index := find_index(name)) is None:
-        raise EntityNotFoundError(entity="creature", key=name)
-    _creatures[index] = creature
+def check_version(cursor: Cursor | None, name: str, version: int | None) -> Creature:
+    creature = get_one(cursor, name)
+    if version is not None and creature.version != version:
+        raise VersionMismatchError(entity="creature", key=name, version=version)
     return creature
 
 
-def modify(cursor: Cursor | None, name: str, creature: PartialCreature) -> Creature:
-    updated = update_model(get_one(cursor, name), creature)
+def replace(cursor: Cursor | None, name: str, creature: Creature, *, version: int | None = None) -> Creature:
+    creature_old = check_version(cursor, name, version)
+    creature = creature.model_copy(update={"version": creature_old.version + 1})
+    _creatures[find_index(name)] = creature
+    return creature
+
+
+def modify(cursor: Cursor | None, name: str, creature: PartialCreature, *, version: int | None = None) -> Creature:
+    creature_old = check_version(cursor, name, version)
+    updated = update_model(creature_old, creature)
+    if updated == creature_old:
+        return creature_old
     return replace(cursor, name, updated)
 
 
 def update_model(creature: Creature, update: PartialCreature) -> Creature:
-    update_dict = update.model_dump(exclude_unset=True)
+    update_dict = update.model_dump(exclude_unset=True, exclude_none=True)
     return creature.model_copy(update=update_dict)
 
 
-def delete(_: Cursor | None, name: str) -> None:
-    if (creature := find(name)) is None:
-        raise EntityNotFoundError(entity="creature", key=name)
-    _creatures.remove(creature)
+def delete(cursor: Cursor | None, name: str, *, version: int | None = None) -> None:
+    _creatures.remove(check_version(cursor, name, version))
@@ -1,19 +1,24 @@
 from __future__ import annotations
 
+from typing import Iterator
+
 from cryptid.data.init import Cursor
-from cryptid.error import EntityAlreadyExistsError, EntityNotFoundError
-from cryptid.model.explorer import Explorer, PartialExplorer
+from cryptid.error import EntityAlreadyExistsError, EntityNotFoundError, VersionMismatchError
+from cryptid.model.bulk import BulkItem, BulkMode
+from cryptid.model.explorer import Explorer, ExplorerFilter, ExplorerHit, PartialExplorer
 
 _explorers: list[Explorer] = [
     Explorer(
         name="Claude Hande",
         country="FR",
         description="Hard to meet when the full moon rises",
+        version=1,
     ),
     Explorer(
         name="Noah Weiser",
         country="DE",
         description="Has poor eyesight and carries an axe",
+        version=1,
     ),
 ]
 
@@ -29,12 +34,72 @@ def find_index(name: str) -> int | None:
 def create(_: Cursor | None, explorer: Explorer) -> Explorer:
     if find(explorer.name) is not None:
         raise EntityAlreadyExistsError(entity="explorer", key=explorer.name)
+    explorer = explorer.model_copy(update={"version": 1})
     _explorers.append(explorer)
     return explorer
 
 
-def get_all(_: Cursor | None) -> list[Explorer]:
-    return _explorers
+def create_many(cursor: Cursor | None, explorers: list[Explorer], *, mode: BulkMode = "insert") -> list[BulkItem]:
+    items = []
+    for index, explorer in enumerate(explorers):
+        if (i := find_index(explorer.name)) is None:
+            _explorers.append(explorer.model_copy(update={"version": 1}))
+            items.append(BulkItem(index=index, name=explorer.name, status="created"))
+        elif mode == "upsert":
+            _explorers[i] = explorer.model_copy(update={"version": _explorers[i].version + 1})
+            items.append(BulkItem(index=index, name=explorer.name, status="updated"))
+        elif mode == "skip":
+            items.append(BulkItem(index=index, name=explorer.name, status="skipped"))
+        else:
+            error = EntityAlreadyExistsError(entity="explorer", key=explorer.name)
+            items.append(BulkItem(index=index, name=explorer.name, status="failed", detail=str(error)))
+    return items
+
+
+def get_all(
+    _: Cursor | None,
+    *,
+    limit: int | None = None,
+    after: str | None = None,
+    filters: ExplorerFilter | None = None,
+) -> list[Explorer]:
+    conditions = filters.model_dump(exclude_none=True) if filters else {}
+    explorers = sorted(
+        (
+            c for c in _explorers
+            if (after is None or c.name > after) and all(getattr(c, k) == v for k, v in conditions.items())
+        ),
+        key=lambda c: c.name,
+    )
+    return explorers[:limit]
+
+
+def iter_all(
+    cursor: Cursor | None,
+    *,
+    batch_size: int = 1000,
+    filters: ExplorerFilter | None = None,
+) -> Iterator[Explorer]:
+    yield from get_all(cursor, filters=filters)
+
+
+def search(
+    _: Cursor | None,
+    text: str,
+    *,
+    limit: int | None = None,
+    after: tuple[float, str] | None = None,
+) -> list[ExplorerHit]:
+    words = text.lower().split()
+    hits = sorted(
+        (
+            ExplorerHit(explorer=c, score=0.0, snippet=c.description)
+            for c in _explorers
+            if words and all(word in (c.description).lower() for word in words)
+        ),
+        key=lambda h: (h.score, h.explorer.name),
+    )
+    return [h for h in hits if after is None or (h.score, h.explorer.name) > after][:limit]
 
 
 def get_one(_: Cursor | None, name: str) -> Explorer:
@@ -43,24 +108,32 @@ def get_one(_: Cursor | None, name: str) -> Explorer:
     return explorer
 
 
-def replace(_: Cursor | None, name: str, explorer: Explorer) -> Explorer:
-    if (index := find_index(name)) is None:
-        raise EntityNotFoundError(entity="explorer", key=name)
-    _explorers[index] = explorer
+def check_version(cursor: Cursor | None, name: str, version: int | None) -> Explorer:
+    explorer = get_one(cursor, name)
+    if version is not None and explorer.version != version:
+        raise VersionMismatchError(entity="explorer", key=name, version=version)
     return explorer
 
 
-def modify(cursor: Cursor | None, name: str, explorer: PartialExplorer) -> Explorer:
-    updated = update_model(get_one(cursor, name), explorer)
+def replace(cursor: Cursor | None, name: str, explorer: Explorer, *, version: int | None = None) -> Explorer:
+    explorer_old = check_version(cursor, name, version)
+    explorer = explorer.model_copy(update={"version": explorer_old.version + 1})
+    _explorers[find_index(name)] = explorer
+    return explorer
+
+
+def modify(cursor: Cursor | None, name: str, explorer: PartialExplorer, *, version: int | None = None) -> Explorer:
+    explorer_old = check_version(cursor, name, version)
+    updated = update_model(explorer_old, explorer)
+    if updated == explorer_old:
+        return explorer_old
     return replace(cursor, name, updated)
 
 
 def update_model(explorer: Explorer, update: PartialExplorer) -> Explorer:
-    update_dict = update.model_dump(exclude_unset=True)
+    update_dict = update.model_dump(exclude_unset=True, exclude_none=True)
     return explorer.model_copy(update=update_dict)
 
 
-def delete(_: Cursor | None, name: str) -> None:
-    if (explorer := find(name)) is None:
-        raise EntityNotFoundError(entity="explorer", key=name)
-    _explorers.remove(explorer)
+def delete(cursor: Cursor | None, name: str, *, version: int | None = None) -> None:
+    _explorers.remove(check_version(cursor, name, version))
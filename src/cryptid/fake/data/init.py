@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import AsyncIterator, Callable, Iterator
+
+from cryptid.data.init import AsyncTxWrapper, P, R, StreamFunc, TxFunc, TxWrapper
+
+# The runner of the in-memory backend, with the decorators of `cryptid.data.init`. There is no connection,
+# so the repositories are passed None for the cursor.
+# Transactions run one at a time, so that a write never sees another one half done, but are not rolled back
+# on errors: the repositories check everything before they change anything. Queries run without the lock.
+_lock: threading.RLock = threading.RLock()
+
+
+def transaction(func: TxFunc) -> TxWrapper:
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        return _locked(func, args, kwargs)
+    return wrapper
+
+
+def query(func: TxFunc) -> TxWrapper:
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        return func(None, *args, **kwargs)
+    return wrapper
+
+
+def _locked(func: TxFunc, args: P.args, kwargs: P.kwargs) -> R:
+    with _lock:
+        return func(None, *args, **kwargs)
+
+
+# A transaction may wait for the lock while a sync transaction holds it on another thread, so the async one
+# waits in a thread instead of on the event loop. Queries and streams take no lock and never block, so they
+# run `func` on the event loop.
+def async_transaction(func: TxFunc) -> AsyncTxWrapper:
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        return await asyncio.to_thread(_locked, func, args, kwargs)
+    return wrapper
+
+
+def async_query(func: TxFunc) -> AsyncTxWrapper:
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        return func(None, *args, **kwargs)
+    return wrapper
+
+
+def stream(func: StreamFunc) -> Callable[P, Iterator[R]]:
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> Iterator[R]:
+        yield from func(None, *args, **kwargs)
+    return wrapper
+
+
+def async_stream(func: StreamFunc) -> Callable[P, AsyncIterator[R]]:
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> AsyncIterator[R]:
+        for item in func(None, *args, **kwargs):
+            yield item
+    return wrapper
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
+from typing import Any, Iterable, Iterator
 
 from cryptid.data.init import Cursor
-from cryptid.error import EntityAlreadyExistsError, EntityNotFoundError
-from cryptid.model.user import PartialUser, PrivateUser, PublicUser
+from cryptid.error import EntityAlreadyExistsError, EntityNotFoundError, VersionMismatchError
+from cryptid.fake.data import xuser
+from cryptid.model.user import PartialUser, PrivateUser, PublicUser, UserFilter
 
 _users: dict[str, PublicUser] = {
     "1": PublicUser(
@@ -13,6 +15,7 @@ _users: dict[str, PublicUser] = {
         roles=["user", "admin"],
         created_at=datetime.now(timezone.utc),
         updated_at=datetime.now(timezone.utc),
+        version=1,
     ),
     "2": PublicUser(
         id="2",
@@ -20,9 +23,16 @@ _users: dict[str, PublicUser] = {
         roles=["user"],
         created_at=datetime.now(timezone.utc),
         updated_at=datetime.now(timezone.utc),
+        version=1,
     ),
 }
 
+# The hashes of the passwords of the seeded users, "mike1234" and "john1234".
+_hashes: dict[str, str] = {
+    "1": "$2b$12$258vPO6XvqYpdSU7vjuF5.3yRAuX0sQpau1H7Yt7JKFo8ts0Mocnm",
+    "2": "$2b$12$2FkRLxKn2uMPS9PQn8QGLuzJ3PocB93HX0EuYAmagCuzx40ODcc5u",
+}
+
 _last_id: int = len(_users)
 
 
@@ -51,41 +61,123 @@ def create(_: Cursor | None, user: PrivateUser) -> PublicUser:
         roles=user.roles,
         created_at=now,
         updated_at=now,
+        version=1,
     )
     _users[id_] = public_user
+    _hashes[id_] = user.hash
     return public_user
 
 
-def get_all(_: Cursor | None) -> list[PublicUser]:
-    return list(_users.values())
+def get_all(
+    _: Cursor | None,
+    *,
+    limit: int | None = None,
+    after: str | tuple[datetime, str] | None = None,
+    role: str | None = None,
+    filters: UserFilter | None = None,
+) -> list[PublicUser]:
+    return select(_users.values(), limit=limit, after=after, role=role, filters=filters)
+
+
+# Filters, orders and pages `users` like `cryptid.data.user.select_all`, for the users and the deleted users.
+def select(
+    users: Iterable[PublicUser],
+    *,
+    limit: int | None = None,
+    after: str | tuple[datetime, str] | None = None,
+    role: str | None = None,
+    filters: UserFilter | None = None,
+) -> list[PublicUser]:
+    filters = filters or UserFilter()
+    column = filters.order_by
+
+    def key(u: PublicUser) -> tuple[Any, ...]:
+        return (getattr(u, column), int(u.id)) if column else (int(u.id),)
+
+    def in_range(at: datetime | None, after_at: datetime | None, before_at: datetime | None) -> bool:
+        return (after_at is None or at > after_at) and (before_at is None or at < before_at)
+
+    if after is None:
+        after_key = None
+    else:
+        after_key = (after[0], int(after[1])) if column else (int(after),)
+    selected = sorted(
+        (
+            u for u in users
+            if (after_key is None or key(u) > after_key)
+            and (role is None or role in u.roles)
+            and in_range(u.created_at, filters.created_after, filters.created_before)
+            and in_range(u.deleted_at, filters.deleted_after, filters.deleted_before)
+        ),
+        key=key,
+    )
+    return selected[:limit]
+
+
+def iter_all(
+    cursor: Cursor | None,
+    *,
+    batch_size: int = 1000,
+    role: str | None = None,
+    filters: UserFilter | None = None,
+) -> Iterator[PublicUser]:
+    yield from get_all(cursor, role=role, filters=filters)
 
 
-def get_one(_: Cursor | None, id_: str) -> PublicUser:
+def get_one(_: Cursor | None, id_: str, *, public: bool = True) -> PublicUser | PrivateUser:
     if (user := find(id_)) is None:
         raise EntityNotFoundError(entity="user", key=id_)
-    return user
+    return user if public else PrivateUser(**user.model_dump(), hash=_hashes[id_])
 
 
-def replace(_: Cursor | None, id_: str, user: PublicUser) -> PublicUser:
-    if (existing_user := find(id_)) is None:
+def check_version(_: Cursor | None, id_: str, version: int | None) -> PublicUser:
+    if (user := find(id_)) is None:
         raise EntityNotFoundError(entity="user", key=id_)
+    if version is not None and user.version != version:
+        raise VersionMismatchError(entity="user", key=id_, version=version)
+    return user
+
+
+def replace(cursor: Cursor | None, id_: str, user: PublicUser, *, version: int | None = None) -> PublicUser:
+    existing_user = check_version(cursor, id_, version)
     existing_user.name = user.name
     existing_user.roles = user.roles
     existing_user.updated_at = datetime.now(timezone.utc)
+    existing_user.version += 1
     return existing_user
 
 
-def modify(cursor: Cursor | None, id_: str, user: PartialUser) -> PublicUser:
-    updated = update_model(get_one(cursor, id_), user)
+# Like `cryptid.data.user.modify`, a PATCH that changes nothing keeps `updated_at`.
+def modify(cursor: Cursor | None, id_: str, user: PartialUser, *, version: int | None = None) -> PublicUser:
+    existing_user = check_version(cursor, id_, version)
+    updated = update_model(existing_user, user)
+    if updated == existing_user:
+        return existing_user
     return replace(cursor, id_, updated)
 
 
 def update_model(user: PublicUser, update: PartialUser) -> PublicUser:
-    update_dict = update.model_dump(exclude_unset=True)
+    update_dict = update.model_dump(exclude_unset=True, exclude_none=True)
     return user.model_copy(update=update_dict)
 
 
-def delete(_: Cursor | None, id_: str) -> None:
-    if find(id_) is None:
-        raise EntityNotFoundError(entity="user", key=id_)
-    del _users[id_]
+def delete(cursor: Cursor | None, id_: str, *, version: int | None = None) -> None:
+    check_version(cursor, id_, version)
+    _archive([id_])
+
+
+def delete_many(_: Cursor | None, ids: list[str]) -> list[str]:
+    deleted = [id_ for id_ in dict.fromkeys(ids) if find(id_) is not None]
+    _archive(deleted)
+    return deleted
+
+
+# Moves the users to `cryptid.fake.data.xuser`, like `cryptid.data.user` moves them to `xuser`.
+def _archive(ids: list[str]) -> None:
+    deleted_at = datetime.now(timezone.utc)
+    for id_ in ids:
+        user = _users.pop(id_)
+        xuser.archive(
+            PrivateUser(**user.model_dump(exclude={"deleted_at", "version"}), hash=_hashes.pop(id_)),
+            deleted_at,
+        )
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Iterator
+
+from cryptid.data.init import Cursor
+from cryptid.error import EntityNotFoundError
+from cryptid.fake.data import user as fake_user
+from cryptid.model.user import PrivateUser, PublicUser, UserFilter
+
+_xusers: dict[str, PublicUser] = {}
+_hashes: dict[str, str] = {}
+
+
+def archive(user: PrivateUser, deleted_at: datetime) -> None:
+    _xusers[user.id] = PublicUser(**user.model_dump(exclude={"hash", "deleted_at"}), deleted_at=deleted_at)
+    _hashes[user.id] = user.hash
+
+
+def get_all(
+    _: Cursor | None,
+    *,
+    limit: int | None = None,
+    after: str | tuple[datetime, str] | None = None,
+    role: str | None = None,
+    filters: UserFilter | None = None,
+) -> list[PublicUser]:
+    return fake_user.select(_xusers.values(), limit=limit, after=after, role=role, filters=filters)
+
+
+def iter_all(
+    cursor: Cursor | None,
+    *,
+    batch_size: int = 1000,
+    role: str | None = None,
+    filters: UserFilter | None = None,
+) -> Iterator[PublicUser]:
+    yield from get_all(cursor, role=role, filters=filters)
+
+
+def get_one(_: Cursor | None, id_: str, *, public: bool = True) -> PublicUser | PrivateUser:
+    if (user := _xusers.get(id_)) is None:
+        raise EntityNotFoundError(entity="xuser", key=id_)
+    return user if public else PrivateUser(**user.model_dump(), hash=_hashes[id_])
+
+
+def purge(_: Cursor | None, *, before: datetime, limit: int) -> int:
+    expired = sorted((u for u in _xusers.values() if u.deleted_at < before), key=lambda u: u.deleted_at)[:limit]
+    for user in expired:
+        del _xusers[user.id], _hashes[user.id]
+    return len(expired)
@@ -1,13 +1,41 @@
 from __future__ import annotations
 
-from typing import Any
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
 
 import uvicorn
 from fastapi import FastAPI
 
+from cryptid.backend import configure
+from cryptid.service import cache, hasher
+from cryptid.service.aio import retention
 from cryptid.web import auth, creature, explorer, user
 
-app: FastAPI = FastAPI()
+
+# Every worker selects the storage backend and migrates its schema on startup unless disabled, e.g. when
+# `cryptid.data.migrate` runs as a deployment step instead. The retention job, and the change log watcher
+# that keeps the caches of the workers coherent, run only while the app is up. The processes of the password
+# hasher start before the first login rather than during it.
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    backend = configure()
+    if backend.migrate and os.getenv("CRYPTID_SQLITE_MIGRATE", default="true").lower() != "false":
+        await asyncio.to_thread(backend.migrate)
+    await asyncio.to_thread(cache.watch, backend)
+    await asyncio.to_thread(hasher.get_hasher().warm_up)
+    retention_task = asyncio.create_task(retention.run(retention.RETENTION)) if retention.RETENTION else None
+    try:
+        yield
+    finally:
+        if retention_task:
+            retention_task.cancel()
+        cache.unwatch()
+        hasher.get_hasher().shutdown()
+
+
+app: FastAPI = FastAPI(lifespan=lifespan)
 app.include_router(auth.router)
 app.include_router(user.router)
 app.include_router(explorer.router)
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from typing import Literal, TypeAlias
+
+from pydantic import BaseModel
+
+# insert: an existing name fails the item, upsert: an existing name is updated, skip: an existing name is kept as is
+BulkMode: TypeAlias = Literal["insert", "upsert", "skip"]
+
+
+class BulkItem(BaseModel):
+    index: int  # the position of the item in the request body
+    id: str | None = None  # the key of an item without a name
+    name: str | None = None
+    status: str  # created, updated, skipped, deleted, failed
+    detail: str | None = None
+
+
+class BulkReport(BaseModel):
+    created: int = 0
+    updated: int = 0
+    skipped: int = 0
+    deleted: int = 0
+    failed: int = 0
+    items: list[BulkItem] = []
+
+    @classmethod
+    def of(cls, items: list[BulkItem]) -> BulkReport:
+        report = cls(items=sorted(items, key=lambda item: item.index))
+        for item in items:
+            setattr(report, item.status, getattr(report, item.status) + 1)
+        return report
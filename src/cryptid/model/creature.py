@@ -9,6 +9,7 @@ class Creature(BaseModel):
     area: str
     description: str = ""
     aka: str = ""
+    version: int | None = None  # incremented by every write, and ignored in request bodies
 
     @field_validator("name")
     @staticmethod
@@ -33,3 +34,14 @@ class PartialCreature(BaseModel):
             return None
         return Creature.validate_name(name)
 
+
+class CreatureFilter(BaseModel):
+    country: str | None = None
+    area: str | None = None
+    aka: str | None = None
+
+
+class CreatureHit(BaseModel):
+    creature: Creature
+    score: float  # the bm25 rank, where lower is better
+    snippet: str
@@ -7,6 +7,7 @@ class Explorer(BaseModel):
     name: str
     country: str
     description: str = ""
+    version: int | None = None  # incremented by every write, and ignored in request bodies
 
     @field_validator("name")
     @staticmethod
@@ -28,3 +29,13 @@ class PartialExplorer(BaseModel):
         if name is None:
             return None
         return Explorer.validate_name(name)
+
+
+class ExplorerFilter(BaseModel):
+    country: str | None = None
+
+
+class ExplorerHit(BaseModel):
+    explorer: Explorer
+    score: float  # the bm25 rank, where lower is better
+    snippet: str
@@ -12,6 +12,7 @@ class PublicUser(BaseModel):
     created_at: datetime | None = None  # UTC
     updated_at: datetime | None = None  # UTC
     deleted_at: datetime | None = None  # UTC
+    version: int | None = None  # incremented by every write, and ignored in request bodies
 
     # Ignore the following warning from IntelliJ IDEA, which is a wrong inspection (false-positive warning).
     # Warning: This decorator will not receive a callable it may expect; the built-in decorator returns a special object
@@ -52,3 +53,21 @@ class PartialUser(BaseModel):
         if name is None:
             return None
         return PublicUser.validate_name(name)
+
+
+# The times are exclusive bounds. The deletion times filter only the deleted users.
+class UserFilter(BaseModel):
+    created_after: datetime | None = None
+    created_before: datetime | None = None
+    deleted_after: datetime | None = None
+    deleted_before: datetime | None = None
+
+    # The time column of the range filters, by which the users are ordered instead of by `id`, so that a page is
+    # read from the range of its index. The deletion time takes precedence over the creation time.
+    @property
+    def order_by(self) -> str | None:
+        if self.deleted_after is not None or self.deleted_before is not None:
+            return "deleted_at"
+        if self.created_after is not None or self.created_before is not None:
+            return "created_at"
+        return None
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+from cryptid.backend import async_query, get_backend
+from cryptid.data.init import Cursor
+from cryptid.env import JWT_EXPIRES_IN_MINUTES
+from cryptid.error import AuthenticationError, EntityNotFoundError
+from cryptid.model.auth import Token
+from cryptid.model.user import PrivateUser, PublicUser
+from cryptid.service.auth import create_jwt, get_user_from_jwt, parse_jwt
+from cryptid.service.hasher import async_make_hash, async_verify_password
+
+
+__all__ = [
+    "async_make_hash",
+    "async_verify_password",
+    "authenticate_user",
+    "create_jwt",
+    "create_token",
+    "find_user",
+    "find_user_by_jwt",
+    "get_user_from_jwt",
+    "parse_jwt",
+]
+
+
+async def create_token(user_id: str, password: str) -> Token:
+    user = await authenticate_user(user_id, password)
+    token = create_jwt(
+        claims={"sub": user.id, "roles": user.roles},
+        expires_in=timedelta(minutes=JWT_EXPIRES_IN_MINUTES),
+    )
+    return token
+
+
+async def authenticate_user(id_: str, password: str) -> PrivateUser:
+    user = await find_user(id_, public=False)
+    if not await async_verify_password(password, user.hash):
+        raise AuthenticationError(msg=f"wrong password '{password}' for user '{id_}'")
+    return user
+
+
+@async_query
+def find_user(cursor: Cursor, id_: str, public: bool = True) -> PublicUser | PrivateUser:
+    try:
+        return get_backend().user.get_one(cursor, id_, public=public)
+    except EntityNotFoundError:
+        raise AuthenticationError(msg=f"user '{id_}' does not exist")
+
+
+async def find_user_by_jwt(token: str) -> PublicUser:
+    user = get_user_from_jwt(token)
+    return await find_user(user.id)
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from typing import Iterator
+
+from cryptid.backend import async_query, async_stream, async_transaction, get_backend
+from cryptid.data.init import Cursor
+from cryptid.model.bulk import BulkItem, BulkMode
+from cryptid.model.creature import Creature, CreatureFilter, CreatureHit, PartialCreature
+from cryptid.service import cache as caches
+
+cache: caches.CatalogCache = caches.creature
+
+
+async def create(creature: Creature) -> Creature:
+    try:
+        return await _create(creature)
+    finally:
+        cache.invalidate(creature.name)
+
+
+@async_transaction
+def _create(cursor: Cursor, creature: Creature) -> Creature:
+    return get_backend().creature.create(cursor, creature)
+
+
+async def create_many(creatures: list[Creature], *, mode: BulkMode = "insert") -> list[BulkItem]:
+    try:
+        return await _create_many(creatures, mode=mode)
+    finally:
+        cache.invalidate(*(creature.name for creature in creatures))
+
+
+@async_transaction
+def _create_many(cursor: Cursor, creatures: list[Creature], *, mode: BulkMode) -> list[BulkItem]:
+    return get_backend().creature.create_many(cursor, creatures, mode=mode)
+
+
+async def get_all(
+    *,
+    limit: int | None = None,
+    after: str | None = None,
+    filters: CreatureFilter | None = None,
+) -> list[Creature]:
+    key = caches.page_key(limit, after, filters)
+    return await cache.pages.aget(key, lambda: _get_all(limit=limit, after=after, filters=filters))
+
+
+@async_query
+def _get_all(
+    cursor: Cursor,
+    *,
+    limit: int | None,
+    after: str | None,
+    filters: CreatureFilter | None,
+) -> list[Creature]:
+    return get_backend().creature.get_all(cursor, limit=limit, after=after, filters=filters)
+
+
+@async_stream
+def iter_all(cursor: Cursor, *, filters: CreatureFilter | None = None) -> Iterator[Creature]:
+    return get_backend().creature.iter_all(cursor, filters=filters)
+
+
+@async_query
+def search(
+    cursor: Cursor,
+    text: str,
+    *,
+    limit: int | None = None,
+    after: tuple[float, str] | None = None,
+) -> list[CreatureHit]:
+    return get_backend().creature.search(cursor, text, limit=limit, after=after)
+
+
+async def get_one(name: str) -> Creature:
+    return await cache.one.aget(name, lambda: _get_one(name))
+
+
+@async_query
+def _get_one(cursor: Cursor, name: str) -> Creature:
+    return get_backend().creature.get_one(cursor, name)
+
+
+async def replace(name: str, creature: Creature, *, version: int | None = None) -> Creature:
+    try:
+        return await _replace(name, creature, version=version)
+    finally:
+        cache.invalidate(name, creature.name)
+
+
+@async_transaction
+def _replace(cursor: Cursor, name: str, creature: Creature, *, version: int | None) -> Creature:
+    return get_backend().creature.replace(cursor, name, creature, version=version)
+
+
+async def modify(name: str, creature: PartialCreature, *, version: int | None = None) -> Creature:
+    try:
+        return await _modify(name, creature, version=version)
+    finally:
+        cache.invalidate(name, creature.name)
+
+
+@async_transaction
+def _modify(cursor: Cursor, name: str, creature: PartialCreature, *, version: int | None) -> Creature:
+    return get_backend().creature.modify(cursor, name, creature, version=version)
+
+
+async def delete(name: str, *, version: int | None = None) -> None:
+    try:
+        await _delete(name, version=version)
+    finally:
+        cache.invalidate(name)
+
+
+@async_transaction
+def _delete(cursor: Cursor, name: str, *, version: int | None) -> None:
+    get_backend().creature.delete(cursor, name, version=version)
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from typing import Iterator
+
+from cryptid.backend import async_query, async_stream, async_transaction, get_backend
+from cryptid.data.init import Cursor
+from cryptid.model.bulk import BulkItem, BulkMode
+from cryptid.model.explorer import Explorer, ExplorerFilter, ExplorerHit, PartialExplorer
+from cryptid.service import cache as caches
+
+cache: caches.CatalogCache = caches.explorer
+
+
+async def create(explorer: Explorer) -> Explorer:
+    try:
+        return await _create(explorer)
+    finally:
+        cache.invalidate(explorer.name)
+
+
+@async_transaction
+def _create(cursor: Cursor, explorer: Explorer) -> Explorer:
+    return get_backend().explorer.create(cursor, explorer)
+
+
+async def create_many(explorers: list[Explorer], *, mode: BulkMode = "insert") -> list[BulkItem]:
+    try:
+        return await _create_many(explorers, mode=mode)
+    finally:
+        cache.invalidate(*(explorer.name for explorer in explorers))
+
+
+@async_transaction
+def _create_many(cursor: Cursor, explorers: list[Explorer], *, mode: BulkMode) -> list[BulkItem]:
+    return get_backend().explorer.create_many(cursor, explorers, mode=mode)
+
+
+async def get_all(
+    *,
+    limit: int | None = None,
+    after: str | None = None,
+    filters: ExplorerFilter | None = None,
+) -> list[Explorer]:
+    key = caches.page_key(limit, after, filters)
+    return await cache.pages.aget(key, lambda: _get_all(limit=limit, after=after, filters=filters))
+
+
+@async_query
+def _get_all(
+    cursor: Cursor,
+    *,
+    limit: int | None,
+    after: str | None,
+    filters: ExplorerFilter | None,
+) -> list[Explorer]:
+    return get_backend().explorer.get_all(cursor, limit=limit, after=after, filters=filters)
+
+
+@async_stream
+def iter_all(cursor: Cursor, *, filters: ExplorerFilter | None = None) -> Iterator[Explorer]:
+    return get_backend().explorer.iter_all(cursor, filters=filters)
+
+
+@async_query
+def search(
+    cursor: Cursor,
+    text: str,
+    *,
+    limit: int | None = None,
+    after: tuple[float, str] | None = None,
+) -> list[ExplorerHit]:
+    return get_backend().explorer.search(cursor, text, limit=limit, after=after)
+
+
+async def get_one(name: str) -> Explorer:
+    return await cache.one.aget(name, lambda: _get_one(name))
+
+
+@async_query
+def _get_one(cursor: Cursor, name: str) -> Explorer:
+    return get_backend().explorer.get_one(cursor, name)
+
+
+async def replace(name: str, explorer: Explorer, *, version: int | None = None) -> Explorer:
+    try:
+        return await _replace(name, explorer, version=version)
+    finally:
+        cache.invalidate(name, explorer.name)
+
+
+@async_transaction
+def _replace(cursor: Cursor, name: str, explorer: Explorer, *, version: int | None) -> Explorer:
+    return get_backend().explorer.replace(cursor, name, explorer, version=version)
+
+
+async def modify(name: str, explorer: PartialExplorer, *, version: int | None = None) -> Explorer:
+    try:
+        return await _modify(name, explorer, version=version)
+    finally:
+        cache.invalidate(name, explorer.name)
+
+
+@async_transaction
+def _modify(cursor: Cursor, name: str, explorer: PartialExplorer, *, version: int | None) -> Explorer:
+    return get_backend().explorer.modify(cursor, name, explorer, version=version)
+
+
+async def delete(name: str, *, version: int | None = None) -> None:
+    try:
+        await _delete(name, version=version)
+    finally:
+        cache.invalidate(name)
+
+
+@async_transaction
+def _delete(cursor: Cursor, name: str, *, version: int | None) -> None:
+    get_backend().explorer.delete(cursor, name, version=version)
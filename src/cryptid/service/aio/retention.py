@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+
+from cryptid.service.aio import user
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# Deleted users are kept forever unless a retention period is set.
+_retention_days: str = os.getenv("CRYPTID_XUSER_RETENTION_DAYS", default="")
+RETENTION: timedelta | None = timedelta(days=float(_retention_days)) if _retention_days else None
+PURGE_INTERVAL: float = float(os.getenv("CRYPTID_XUSER_PURGE_INTERVAL_SECONDS", default="3600"))
+PURGE_BATCH_SIZE: int = int(os.getenv("CRYPTID_XUSER_PURGE_BATCH_SIZE", default="500"))
+
+
+async def purge_expired_users(retention: timedelta, *, batch_size: int = PURGE_BATCH_SIZE) -> int:
+    return await user.purge_deleted(datetime.now(timezone.utc) - retention, batch_size=batch_size)
+
+
+# Purges the expired users every `interval` seconds until cancelled. A failed run is logged and retried
+# at the next interval, so a busy database never stops the job.
+async def run(
+    retention: timedelta,
+    *,
+    interval: float = PURGE_INTERVAL,
+    batch_size: int = PURGE_BATCH_SIZE,
+) -> None:
+    while True:
+        try:
+            purged = await purge_expired_users(retention, batch_size=batch_size)
+            if purged:
+                logger.info("purged %d users deleted more than %s ago", purged, retention)
+        except Exception:
+            logger.exception("failed to purge the expired users")
+        await asyncio.sleep(interval)
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Iterator
+
+from cryptid.backend import async_query, async_stream, async_transaction, get_backend
+from cryptid.data.init import Cursor
+from cryptid.model.user import PartialUser, PrivateUser, PublicUser, SignInUser, UserFilter
+from cryptid.service.hasher import async_make_hash
+
+
+async def create(user: SignInUser) -> PublicUser:
+    # Hash in the hasher's worker processes, and before the transaction, so that bcrypt holds up neither the
+    # event loop nor the writer.
+    private_user = PrivateUser(
+        name=user.name,
+        roles=user.roles,
+        hash=await async_make_hash(user.password),
+    )
+    return await _create(private_user)
+
+
+@async_transaction
+def _create(cursor: Cursor, user: PrivateUser) -> PublicUser:
+    return get_backend().user.create(cursor, user)
+
+
+@async_query
+def get_all(
+    cursor: Cursor,
+    *,
+    deleted: bool = False,
+    limit: int | None = None,
+    after: str | tuple[datetime, str] | None = None,
+    role: str | None = None,
+    filters: UserFilter | None = None,
+) -> list[PublicUser]:
+    if deleted:
+        return get_backend().xuser.get_all(cursor, limit=limit, after=after, role=role, filters=filters)
+    return get_backend().user.get_all(cursor, limit=limit, after=after, role=role, filters=filters)
+
+
+@async_stream
+def iter_all(
+    cursor: Cursor,
+    *,
+    deleted: bool = False,
+    role: str | None = None,
+    filters: UserFilter | None = None,
+) -> Iterator[PublicUser]:
+    if deleted:
+        return get_backend().xuser.iter_all(cursor, role=role, filters=filters)
+    return get_backend().user.iter_all(cursor, role=role, filters=filters)
+
+
+@async_query
+def get_one(cursor: Cursor, id_: str, *, deleted: bool = False) -> PublicUser:
+    if deleted:
+        return get_backend().xuser.get_one(cursor, id_)
+    return get_backend().user.get_one(cursor, id_)
+
+
+@async_transaction
+def replace(cursor: Cursor, id_: str, user: PublicUser, *, version: int | None = None) -> PublicUser:
+    return get_backend().user.replace(cursor, id_, user, version=version)
+
+
+@async_transaction
+def modify(cursor: Cursor, id_: str, user: PartialUser, *, version: int | None = None) -> PublicUser:
+    return get_backend().user.modify(cursor, id_, user, version=version)
+
+
+@async_transaction
+def delete(cursor: Cursor, id_: str, *, version: int | None = None) -> None:
+    get_backend().user.delete(cursor, id_, version=version)
+
+
+@async_transaction
+def delete_many(cursor: Cursor, ids: list[str]) -> list[str]:
+    return get_backend().user.delete_many(cursor, ids)
+
+
+@async_transaction
+def _purge_deleted(cursor: Cursor, before: datetime, limit: int) -> int:
+    return get_backend().xuser.purge(cursor, before=before, limit=limit)
+
+
+# Purges in batches like `cryptid.service.user.purge_deleted`. Each batch is a separate submission to the
+# writer, so the writes queued meanwhile are committed before the next batch.
+async def purge_deleted(before: datetime, *, batch_size: int = 500) -> int:
+    total = 0
+    while (purged := await _purge_deleted(before, batch_size)) > 0:
+        total += purged
+        if purged < batch_size:
+            break
+    return total
@@ -1,22 +1,19 @@
 from __future__ import annotations
 
-import os
 from datetime import UTC, datetime, timedelta
 from typing import Any
 
-import bcrypt
-from jose import JWTError, jwt
+from jose import JWTError
 
-from cryptid.data.init import get_cursor
-from cryptid.env import JWT_ALGORITHM, JWT_EXPIRES_IN_MINUTES, JWT_SECRET_KEY
+from cryptid.backend import get_backend, query
+from cryptid.data.init import Cursor
+from cryptid.env import JWT_EXPIRES_IN_MINUTES
 from cryptid.error import AuthenticationError, EntityNotFoundError, JWTValidationError
 from cryptid.model.auth import AuthUser, Token
 from cryptid.model.user import PrivateUser, PublicUser
-
-if not os.getenv("CRYPTID_UNIT_TEST"):
-    from cryptid.data import user as data
-else:
-    from cryptid.fake.data import user as data
+from cryptid.service import cache
+from cryptid.service.codec import get_keyring
+from cryptid.service.hasher import verify_password
 
 
 def create_token(user_id: str, password: str) -> Token:
@@ -35,19 +32,14 @@ def authenticate_user(id_: str, password: str) -> PrivateUser:
     return user
 
 
-def find_user(id_: str, public: bool = True) -> PublicUser | PrivateUser:
+@query
+def find_user(cursor: Cursor, id_: str, public: bool = True) -> PublicUser | PrivateUser:
     try:
-        return data.get_one(get_cursor(), id_, public=public)
+        return get_backend().user.get_one(cursor, id_, public=public)
     except EntityNotFoundError:
         raise AuthenticationError(msg=f"user '{id_}' does not exist")
 
 
-def verify_password(plain: str, hashed: str) -> bool:
-    plain_bytes = plain.encode("utf-8")
-    hashed_bytes = hashed.encode("utf-8")
-    return bcrypt.checkpw(plain_bytes, hashed_bytes)
-
-
 def create_jwt(claims: dict[str, Any], expires_in: timedelta | None = timedelta(minutes=15)) -> Token:
     src = claims.copy()
     now = datetime.now(UTC)
@@ -60,7 +52,7 @@ def create_jwt(claims: dict[str, Any], expires_in: timedelta | None = timedelta(
         expires_at = None
     # The `iat`, `exp`, `nbf` claims will be converted from datetime to Unix timestamp (integer in seconds),
     # but the other claims with datetime will cause TypeError: Object of type datetime is not JSON serializable.
-    token = jwt.encode(src, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
+    token = get_keyring().encode(src)
     return Token(
         access=token,
         expires_in_seconds=int(expires_in.total_seconds()) if expires_in is not None else None,
@@ -71,28 +63,27 @@ def create_jwt(claims: dict[str, Any], expires_in: timedelta | None = timedelta(
 
 def parse_jwt(token: str) -> dict[str, Any]:
     try:
-        claims = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+        claims = get_keyring().decode(token)
         return claims
     except JWTError as e:
         raise JWTValidationError() from e
 
 
+# Every authenticated request presents its token many times over its life, so the user verified from a token is
+# cached until the token expires.
 def get_user_from_jwt(token: str) -> AuthUser:
+    return cache.token.get(token, _verify_user)
+
+
+def _verify_user(token: str) -> tuple[AuthUser, float | None]:
     claims = parse_jwt(token)
     if (user_id := claims.get("sub")) is None:
         raise JWTValidationError(msg="claim 'sub' required")
     if (roles := claims.get("roles")) is None:
         raise JWTValidationError(msg="claim 'roles' required")
-    return AuthUser(id=user_id, roles=roles)
+    return AuthUser(id=user_id, roles=roles), claims.get("exp")
 
 
 def find_user_by_jwt(token: str) -> PublicUser:
     user = get_user_from_jwt(token)
     return find_user(user.id)
-
-
-def make_hash(plain: str) -> str:
-    plain_bytes = plain.encode("utf-8")
-    salt = bcrypt.gensalt()
-    hashed_bytes = bcrypt.hashpw(plain_bytes, salt)
-    return hashed_bytes.decode("utf-8")
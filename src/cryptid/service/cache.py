@@ -0,0 +1,323 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Generic, Hashable, TypeVar
+
+from pydantic import BaseModel
+
+from cryptid.backend import Backend
+from cryptid.data import changes
+from cryptid.data.changes import ChangeStats, ChangeWatcher
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# The catalog caches of the services. A TTL of 0 disables them.
+TTL: float = float(os.getenv("CRYPTID_CACHE_TTL_SECONDS", default="60"))
+STALE: float = float(os.getenv("CRYPTID_CACHE_STALE_SECONDS", default="0"))
+MAX_ENTRIES: int = int(os.getenv("CRYPTID_CACHE_MAX_ENTRIES", default="10000"))
+# Milliseconds between polls of the change logs, which invalidate the writes of the other workers. 0 disables.
+POLL_INTERVAL: float = float(os.getenv("CRYPTID_CACHE_POLL_MS", default="5")) / 1000
+# The verified access tokens kept by `get_user_from_jwt`. 0 disables.
+TOKEN_MAX_ENTRIES: int = int(os.getenv("CRYPTID_JWT_CACHE_MAX_ENTRIES", default="10000"))
+
+_FRESH, _STALE, _REFRESH, _MISS = range(4)
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    size: int
+    hits: int
+    stale_hits: int  # served past their TTL while being refreshed
+    misses: int
+    evictions: int  # dropped as the least recently used, to make room
+    invalidations: int
+
+
+# A bounded LRU cache whose entries expire `ttl` seconds after they were loaded. With `stale`, an expired entry
+# is still served for `stale` more seconds, while the first caller to find it expired reloads it in the
+# background. Values are shared between callers, so they must never be mutated.
+# Every invalidation bumps the generation, and a value loaded during an older generation is returned to its
+# caller but not cached, so a read racing a write cannot cache what the write replaced.
+class Cache(Generic[K, V]):
+    def __init__(
+        self,
+        *,
+        max_entries: int = MAX_ENTRIES,
+        ttl: float = TTL,
+        stale: float = STALE,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale = stale
+        self._clock = clock
+        self._entries: OrderedDict[K, tuple[V, float]] = OrderedDict()  # the value and its load time
+        self._refreshing: set[K] = set()
+        self._generation = 0
+        self._hits = 0
+        self._stale_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: K, load: Callable[[], V]) -> V:
+        state, value, generation = self._lookup(key)
+        if state == _REFRESH:
+            _refresher().submit(self._refresh, key, load, generation)
+        if state != _MISS:
+            return value
+        value = load()
+        self._put(key, value, generation)
+        return value
+
+    async def aget(self, key: K, load: Callable[[], Awaitable[V]]) -> V:
+        state, value, generation = self._lookup(key)
+        if state == _REFRESH:
+            task = asyncio.create_task(self._arefresh(key, load, generation))
+            _tasks.add(task)
+            task.add_done_callback(_tasks.discard)
+        if state != _MISS:
+            return value
+        value = await load()
+        self._put(key, value, generation)
+        return value
+
+    def _lookup(self, key: K) -> tuple[int, V | None, int]:
+        if self.ttl <= 0:
+            return _MISS, None, -1
+        with self._lock:
+            if (entry := self._entries.get(key)) is not None:
+                value, loaded_at = entry
+                age = self._clock() - loaded_at
+                if age < self.ttl:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return _FRESH, value, self._generation
+                if age < self.ttl + self.stale:
+                    self._entries.move_to_end(key)
+                    self._stale_hits += 1
+                    if key in self._refreshing:
+                        return _STALE, value, self._generation
+                    self._refreshing.add(key)
+                    return _REFRESH, value, self._generation
+                del self._entries[key]
+            self._misses += 1
+            return _MISS, None, self._generation
+
+    def _put(self, key: K, value: V, generation: int) -> None:
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[key] = value, self._clock()
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def _refresh(self, key: K, load: Callable[[], V], generation: int) -> None:
+        try:
+            self._put(key, load(), generation)
+        except Exception:
+            logger.warning("failed to refresh the cached %r", key, exc_info=True)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    async def _arefresh(self, key: K, load: Callable[[], Awaitable[V]], generation: int) -> None:
+        try:
+            self._put(key, await load(), generation)
+        except Exception:
+            logger.warning("failed to refresh the cached %r", key, exc_info=True)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def invalidate(self, *keys: K) -> None:
+        with self._lock:
+            self._generation += 1
+            self._invalidations += 1
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._invalidations += 1
+            self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                size=len(self._entries),
+                hits=self._hits,
+                stale_hits=self._stale_hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                invalidations=self._invalidations,
+            )
+
+
+@dataclass(frozen=True)
+class TokenCacheStats:
+    size: int
+    hits: int
+    misses: int
+    expirations: int  # found past their `exp`, and verified again to fail as expired
+    evictions: int
+
+
+# A bounded LRU cache of what was verified from each token, until the `exp` of the token. A token is immutable
+# and signed, so verifying it again can only give the same result until it expires, or until the signing keys
+# change, which must `clear` the cache. Only tokens that verified are cached, keyed by their digest, so the
+# cache never holds a usable credential. Values are shared between requests, so they must never be mutated.
+class TokenCache(Generic[V]):
+    def __init__(self, *, max_entries: int = TOKEN_MAX_ENTRIES, clock: Callable[[], float] = time.time) -> None:
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict[bytes, tuple[V, float]] = OrderedDict()  # the value and its `exp`
+        self._hits = 0
+        self._misses = 0
+        self._expirations = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    # Returns what `verify` returned for `token`, and the `exp` it was verified with, if the token has one.
+    def get(self, token: str, verify: Callable[[str], tuple[V, float | None]]) -> V:
+        if self.max_entries <= 0:
+            return verify(token)[0]
+        key = hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+        with self._lock:
+            if (entry := self._entries.get(key)) is not None:
+                value, expires_at = entry
+                if self._clock() < expires_at:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return value
+                del self._entries[key]
+                self._expirations += 1
+            self._misses += 1
+        value, expires_at = verify(token)
+        with self._lock:
+            self._entries[key] = value, float("inf") if expires_at is None else expires_at
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> TokenCacheStats:
+        with self._lock:
+            return TokenCacheStats(
+                size=len(self._entries),
+                hits=self._hits,
+                misses=self._misses,
+                expirations=self._expirations,
+                evictions=self._evictions,
+            )
+
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock: threading.Lock = threading.Lock()
+_tasks: set[asyncio.Task[Any]] = set()  # the running async refreshes, which the event loop only holds weakly
+
+
+def _refresher() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cryptid-cache")
+        return _executor
+
+
+# The cache of a catalog entity, shared by its sync and async services: `one` holds `get_one` by name, and
+# `pages` holds `get_all` by its arguments. A write invalidates the names it wrote and every page, because
+# any write may move the rows of any page.
+class CatalogCache:
+    def __init__(self) -> None:
+        self.one: Cache[str, Any] = Cache()
+        self.pages: Cache[tuple[Hashable, ...], list[Any]] = Cache()
+
+    def invalidate(self, *names: str | None) -> None:
+        self.one.invalidate(*(name for name in names if name is not None))
+        self.pages.clear()
+
+    def clear(self) -> None:
+        self.one.clear()
+        self.pages.clear()
+
+    def on_change(self, names: set[str] | None) -> None:
+        if names is None:
+            self.clear()
+        else:
+            self.invalidate(*names)
+
+
+def page_key(limit: int | None, after: str | None, filters: BaseModel | None) -> tuple[Hashable, ...]:
+    return limit, after, tuple(filters.model_dump(exclude_none=True).items()) if filters else ()
+
+
+creature: CatalogCache = CatalogCache()
+explorer: CatalogCache = CatalogCache()
+token: TokenCache[Any] = TokenCache()
+changes.subscribe("creature", creature.on_change)
+changes.subscribe("explorer", explorer.on_change)
+
+_watcher: ChangeWatcher | None = None
+
+
+# Follows the change logs of `backend`, so that the writes of other workers invalidate the caches of this one
+# within milliseconds, until `unwatch`. Returns the watcher, if the caches and the backend have change logs.
+def watch(backend: Backend, *, interval: float = POLL_INTERVAL) -> ChangeWatcher | None:
+    global _watcher
+    unwatch()
+    if TTL <= 0 or interval <= 0 or backend.change_logs is None:
+        return None
+    _watcher = ChangeWatcher(backend.change_logs(), interval=interval)
+    _watcher.start()
+    return _watcher
+
+
+def unwatch() -> None:
+    global _watcher
+    if _watcher is not None:
+        _watcher.stop()
+        _watcher = None
+
+
+def get_change_stats() -> ChangeStats | None:
+    return _watcher.stats() if _watcher else None
+
+
+def get_cache_stats() -> dict[str, CacheStats]:
+    return {
+        "creature.one": creature.one.stats(),
+        "creature.pages": creature.pages.stats(),
+        "explorer.one": explorer.one.stats(),
+        "explorer.pages": explorer.pages.stats(),
+    }
+
+
+def get_token_cache_stats() -> TokenCacheStats:
+    return token.stats()
+
+
+# Drops every cached entry, e.g. after the storage backend was switched.
+def clear() -> None:
+    creature.clear()
+    explorer.clear()
+    token.clear()
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
+from jose import JWTError, jwk, jwt
+from jose.backends.base import Key
+from jose.constants import ALGORITHMS
+from jose.exceptions import JWKError
+from jose.utils import base64url_decode, base64url_encode
+
+from cryptid.env import (
+    JWT_ALGORITHM,
+    JWT_KEYRING_FILE,
+    JWT_KEYRING_RELOAD_SECONDS,
+    JWT_PRIVATE_KEY_FILE,
+    JWT_SECRET_KEY,
+)
+from cryptid.service import cache
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+# python-jose has no EdDSA, so this key of its registry signs with Ed25519 through cryptography.
+class Ed25519Key(Key):
+    def __init__(self, key: Any, algorithm: str) -> None:
+        if algorithm != "EdDSA":
+            raise JWKError(f"algorithm '{algorithm}' is not EdDSA")
+        if isinstance(key, dict):
+            if key.get("crv") != "Ed25519":
+                raise JWKError("curve 'Ed25519' required")
+            if "d" in key:
+                key = Ed25519PrivateKey.from_private_bytes(base64url_decode(key["d"].encode("ascii")))
+            else:
+                key = Ed25519PublicKey.from_public_bytes(base64url_decode(key["x"].encode("ascii")))
+        elif isinstance(key, (str, bytes)):
+            pem = key.encode("utf-8") if isinstance(key, str) else key
+            if b"PUBLIC KEY" in pem:
+                key = serialization.load_pem_public_key(pem)
+            else:
+                key = serialization.load_pem_private_key(pem, password=None)
+        if not isinstance(key, (Ed25519PrivateKey, Ed25519PublicKey)):
+            raise JWKError("Ed25519 key required")
+        self.prepared_key: Ed25519PrivateKey | Ed25519PublicKey = key
+
+    def sign(self, msg: bytes) -> bytes:
+        if not isinstance(self.prepared_key, Ed25519PrivateKey):
+            raise JWKError("a public key cannot sign")
+        return self.prepared_key.sign(msg)
+
+    def verify(self, msg: bytes, sig: bytes) -> bool:
+        try:
+            self._public().verify(sig, msg)
+        except InvalidSignature:
+            return False
+        return True
+
+    def public_key(self) -> Ed25519Key:
+        return Ed25519Key(self._public(), "EdDSA")
+
+    def to_dict(self) -> dict[str, str]:
+        raw = self._public().public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+        return {"alg": "EdDSA", "kty": "OKP", "crv": "Ed25519", "x": base64url_encode(raw).decode("ascii")}
+
+    def _public(self) -> Ed25519PublicKey:
+        key = self.prepared_key
+        return key.public_key() if isinstance(key, Ed25519PrivateKey) else key
+
+
+jwk.register_key("EdDSA", Ed25519Key)
+
+
+# Signs and verifies the tokens of one algorithm and key, whose key objects are prepared once instead of parsing
+# the key on every call. `key` is an HMAC secret, or a PEM or JWK dict of a private key to sign and verify, or
+# of a public key to verify only. Any algorithm of the python-jose registry works, e.g. HS256, ES256 and EdDSA.
+class JWTCodec:
+    def __init__(self, algorithm: str, key: str | bytes | dict[str, Any]) -> None:
+        self.algorithm = algorithm
+        self.symmetric = algorithm in ALGORITHMS.HMAC
+        self._signing_key: Key = jwk.construct(key, algorithm)
+        self._verifying_key: Key = self._signing_key if self.symmetric else self._signing_key.public_key()
+
+    def encode(self, claims: dict[str, Any], headers: dict[str, Any] | None = None) -> str:
+        return jwt.encode(claims, self._signing_key, algorithm=self.algorithm, headers=headers)
+
+    # Raises `JWTError` if the token is malformed, not signed by this key, or expired.
+    def decode(self, token: str) -> dict[str, Any]:
+        return jwt.decode(token, self._verifying_key, algorithms=[self.algorithm])
+
+    # The public key as a JWK, with which other services verify tokens, or None for a shared secret.
+    def public_jwk(self) -> dict[str, Any] | None:
+        return None if self.symmetric else self._verifying_key.to_dict()
+
+
+def load_codec(
+    algorithm: str = JWT_ALGORITHM,
+    secret_key: str | None = JWT_SECRET_KEY,
+    private_key_file: str | None = JWT_PRIVATE_KEY_FILE,
+) -> JWTCodec:
+    if algorithm in ALGORITHMS.HMAC:
+        if not secret_key:
+            raise EnvironmentError(f"environment variable 'CRYPTID_JWT_SECRET_KEY' required for {algorithm}")
+        return JWTCodec(algorithm, secret_key)
+    if not private_key_file:
+        raise EnvironmentError(f"environment variable 'CRYPTID_JWT_PRIVATE_KEY_FILE' required for {algorithm}")
+    with open(private_key_file, "rb") as f:
+        return JWTCodec(algorithm, f.read())
+
+
+# The codecs of the keys by their `kid`, every one of which verifies the tokens it signed, while only the first
+# signs new tokens. A key rotates in by being added, and becomes the first once the services verifying the
+# tokens have fetched it. The previous first key then retires, and is removed once the tokens it signed expired,
+# so that rotating logs nobody out.
+class Keyring:
+    def __init__(self, keys: dict[str, JWTCodec]) -> None:
+        if not keys:
+            raise ValueError("a keyring needs a key")
+        self._keys = dict(keys)
+        self.kid = next(iter(self._keys))
+
+    @property
+    def kids(self) -> list[str]:
+        return list(self._keys)
+
+    def encode(self, claims: dict[str, Any]) -> str:
+        return self._keys[self.kid].encode(claims, headers={"kid": self.kid})
+
+    # Tokens signed before the keys had ids have no `kid`, and are verified with the signing key.
+    def decode(self, token: str) -> dict[str, Any]:
+        kid = jwt.get_unverified_header(token).get("kid", self.kid)
+        if (codec := self._keys.get(kid)) is None:
+            raise JWTError(f"unknown key '{kid}'")
+        return codec.decode(token)
+
+    # The JWK set of the public keys, without the shared secrets.
+    def jwks(self) -> dict[str, list[dict[str, Any]]]:
+        return {
+            "keys": [
+                public | {"kid": kid, "use": "sig"}
+                for kid, codec in self._keys.items()
+                if (public := codec.public_jwk()) is not None
+            ]
+        }
+
+
+# Reads a keyring file like the following, where a relative path is relative to the file, and a key has either
+# a `secret_key` or a `private_key_file`:
+#   {"keys": [{"kid": "2026-10", "alg": "EdDSA", "private_key_file": "2026-10.pem"},
+#             {"kid": "2026-07", "alg": "HS256", "secret_key": "..."}]}
+def load_keyring(path: str) -> Keyring:
+    with open(path, "rb") as f:
+        spec = json.load(f)
+    keys = {}
+    for key in spec["keys"]:
+        if "secret_key" in key:
+            keys[key["kid"]] = JWTCodec(key["alg"], key["secret_key"])
+        elif "private_key_file" in key:
+            keys[key["kid"]] = JWTCodec(key["alg"], (Path(path).parent / key["private_key_file"]).read_bytes())
+        else:
+            raise ValueError(f"key '{key['kid']}' needs a 'secret_key' or a 'private_key_file'")
+    return Keyring(keys)
+
+
+# A keyring file that is read again when it changed, checked at most every `interval` seconds, so that keys rotate
+# without a restart. A file that fails to load keeps the previous keyring. Every reload clears the cache of the
+# verified tokens, whose keys may have been removed.
+class KeyringFile:
+    def __init__(
+        self,
+        path: str,
+        *,
+        interval: float = JWT_KEYRING_RELOAD_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.path = path
+        self.interval = interval
+        self._clock = clock
+        self._stamp = self._stat()
+        self._keyring = load_keyring(path)
+        self._checked_at = clock()
+        self._lock = threading.Lock()
+
+    def get(self) -> Keyring:
+        if self._clock() - self._checked_at >= self.interval:
+            self.reload()
+        return self._keyring
+
+    # Returns whether the keyring changed.
+    def reload(self) -> bool:
+        with self._lock:
+            self._checked_at = self._clock()
+            try:
+                if (stamp := self._stat()) == self._stamp:
+                    return False
+                keyring = load_keyring(self.path)
+            except Exception:
+                logger.warning("failed to reload the keyring %s", self.path, exc_info=True)
+                return False
+            self._stamp, self._keyring = stamp, keyring
+        cache.token.clear()
+        logger.info("reloaded the keyring %s with the keys %s", self.path, keyring.kids)
+        return True
+
+    def _stat(self) -> tuple[int, int]:
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+
+# Without a keyring file, the single key of the environment has the id `default`.
+_keyring_file: KeyringFile | None = KeyringFile(JWT_KEYRING_FILE) if JWT_KEYRING_FILE else None
+_keyring: Keyring | None = None if _keyring_file else Keyring({"default": load_codec()})
+
+
+def get_keyring() -> Keyring:
+    return _keyring_file.get() if _keyring_file else _keyring
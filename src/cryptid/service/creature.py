@@ -1,39 +1,119 @@
 from __future__ import annotations
 
-import os
+from typing import Iterator
 
-from cryptid.data.init import Cursor, get_cursor, transaction
-from cryptid.model.creature import Creature, PartialCreature
+from cryptid.backend import get_backend, query, stream, transaction
+from cryptid.data.init import Cursor
+from cryptid.model.bulk import BulkItem, BulkMode
+from cryptid.model.creature import Creature, CreatureFilter, CreatureHit, PartialCreature
+from cryptid.service import cache as caches
 
-if not os.getenv("CRYPTID_UNIT_TEST"):
-    from cryptid.data import creature as data
-else:
-    from cryptid.fake.data import creature as data
+cache: caches.CatalogCache = caches.creature
+
+
+# The writes invalidate the cache once they returned, so after the commit, and even if they failed, since a
+# failed commit may still have written.
+def create(creature: Creature) -> Creature:
+    try:
+        return _create(creature)
+    finally:
+        cache.invalidate(creature.name)
 
 
 @transaction
-def create(cursor: Cursor, creature: Creature) -> Creature:
-    return data.create(cursor, creature)
+def _create(cursor: Cursor, creature: Creature) -> Creature:
+    return get_backend().creature.create(cursor, creature)
+
+
+def create_many(creatures: list[Creature], *, mode: BulkMode = "insert") -> list[BulkItem]:
+    try:
+        return _create_many(creatures, mode=mode)
+    finally:
+        cache.invalidate(*(creature.name for creature in creatures))
+
+
+@transaction
+def _create_many(cursor: Cursor, creatures: list[Creature], *, mode: BulkMode) -> list[BulkItem]:
+    return get_backend().creature.create_many(cursor, creatures, mode=mode)
+
+
+def get_all(
+    *,
+    limit: int | None = None,
+    after: str | None = None,
+    filters: CreatureFilter | None = None,
+) -> list[Creature]:
+    key = caches.page_key(limit, after, filters)
+    return cache.pages.get(key, lambda: _get_all(limit=limit, after=after, filters=filters))
+
+
+@query
+def _get_all(
+    cursor: Cursor,
+    *,
+    limit: int | None,
+    after: str | None,
+    filters: CreatureFilter | None,
+) -> list[Creature]:
+    return get_backend().creature.get_all(cursor, limit=limit, after=after, filters=filters)
 
 
-def get_all() -> list[Creature]:
-    return data.get_all(get_cursor())
+@stream
+def iter_all(cursor: Cursor, *, filters: CreatureFilter | None = None) -> Iterator[Creature]:
+    return get_backend().creature.iter_all(cursor, filters=filters)
+
+
+@query
+def search(
+    cursor: Cursor,
+    text: str,
+    *,
+    limit: int | None = None,
+    after: tuple[float, str] | None = None,
+) -> list[CreatureHit]:
+    return get_backend().creature.search(cursor, text, limit=limit, after=after)
 
 
 def get_one(name: str) -> Creature:
-    return data.get_one(get_cursor(), name)
+    return cache.one.get(name, lambda: _get_one(name))
+
+
+@query
+def _get_one(cursor: Cursor, name: str) -> Creature:
+    return get_backend().creature.get_one(cursor, name)
+
+
+def replace(name: str, creature: Creature, *, version: int | None = None) -> Creature:
+    try:
+        return _replace(name, creature, version=version)
+    finally:
+        cache.invalidate(name, creature.name)
 
 
 @transaction
-def replace(cursor: Cursor, name: str, creature: Creature) -> Creature:
-    return data.replace(cursor, name, creature)
+def _replace(cursor: Cursor, name: str, creature: Creature, *, version: int | None) -> Creature:
+    return get_backend().creature.replace(cursor, name, creature, version=version)
+
+
+def modify(name: str, creature: PartialCreature, *, version: int | None = None) -> Creature:
+    try:
+        return _modify(name, creature, version=version)
+    finally:
+        cache.invalidate(name, creature.name)
 
 
 @transaction
-def modify(cursor: Cursor, name: str, creature: PartialCreature) -> Creature:
-    return data.modify(cursor, name, creature)
+def _modify(cursor: Cursor, name: str, creature: PartialCreature, *, version: int | None) -> Creature:
+    return get_backend().creature.modify(cursor, name, creature, version=version)
+
+
+def delete(name: str, *, version: int | None = None) -> None:
+    try:
+        _delete(name, version=version)
+    finally:
+        cache.invalidate(name)
 
 
 @transaction
-def delete(cursor: Cursor, name: str) -> None:
-    data.delete(cursor, name)
+def _delete(cursor: Cursor, name: str, *, version: int | None) -> None:
+    get_backend().creature.delete(cursor, name, version=version)
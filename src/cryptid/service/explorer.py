@@ -1,39 +1,117 @@
 from __future__ import annotations
 
-import os
+from typing import Iterator
 
-from cryptid.data.init import Cursor, get_cursor, transaction
-from cryptid.model.explorer import Explorer, PartialExplorer
+from cryptid.backend import get_backend, query, stream, transaction
+from cryptid.data.init import Cursor
+from cryptid.model.bulk import BulkItem, BulkMode
+from cryptid.model.explorer import Explorer, ExplorerFilter, ExplorerHit, PartialExplorer
+from cryptid.service import cache as caches
 
-if not os.getenv("CRYPTID_UNIT_TEST"):
-    from cryptid.data import explorer as data
-else:
-    from cryptid.fake.data import explorer as data
+cache: caches.CatalogCache = caches.explorer
+
+
+def create(explorer: Explorer) -> Explorer:
+    try:
+        return _create(explorer)
+    finally:
+        cache.invalidate(explorer.name)
 
 
 @transaction
-def create(cursor: Cursor, explorer: Explorer) -> Explorer:
-    return data.create(cursor, explorer)
+def _create(cursor: Cursor, explorer: Explorer) -> Explorer:
+    return get_backend().explorer.create(cursor, explorer)
+
+
+def create_many(explorers: list[Explorer], *, mode: BulkMode = "insert") -> list[BulkItem]:
+    try:
+        return _create_many(explorers, mode=mode)
+    finally:
+        cache.invalidate(*(explorer.name for explorer in explorers))
+
+
+@transaction
+def _create_many(cursor: Cursor, explorers: list[Explorer], *, mode: BulkMode) -> list[BulkItem]:
+    return get_backend().explorer.create_many(cursor, explorers, mode=mode)
+
+
+def get_all(
+    *,
+    limit: int | None = None,
+    after: str | None = None,
+    filters: ExplorerFilter | None = None,
+) -> list[Explorer]:
+    key = caches.page_key(limit, after, filters)
+    return cache.pages.get(key, lambda: _get_all(limit=limit, after=after, filters=filters))
+
+
+@query
+def _get_all(
+    cursor: Cursor,
+    *,
+    limit: int | None,
+    after: str | None,
+    filters: ExplorerFilter | None,
+) -> list[Explorer]:
+    return get_backend().explorer.get_all(cursor, limit=limit, after=after, filters=filters)
 
 
-def get_all() -> list[Explorer]:
-    return data.get_all(get_cursor())
+@stream
+def iter_all(cursor: Cursor, *, filters: ExplorerFilter | None = None) -> Iterator[Explorer]:
+    return get_backend().explorer.iter_all(cursor, filters=filters)
+
+
+@query
+def search(
+    cursor: Cursor,
+    text: str,
+    *,
+    limit: int | None = None,
+    after: tuple[float, str] | None = None,
+) -> list[ExplorerHit]:
+    return get_backend().explorer.search(cursor, text, limit=limit, after=after)
 
 
 def get_one(name: str) -> Explorer:
-    return data.get_one(get_cursor(), name)
+    return cache.one.get(name, lambda: _get_one(name))
+
+
+@query
+def _get_one(cursor: Cursor, name: str) -> Explorer:
+    return get_backend().explorer.get_one(cursor, name)
+
+
+def replace(name: str, explorer: Explorer, *, version: int | None = None) -> Explorer:
+    try:
+        return _replace(name, explorer, version=version)
+    finally:
+        cache.invalidate(name, explorer.name)
 
 
 @transaction
-def replace(cursor: Cursor, name: str, explorer: Explorer) -> Explorer:
-    return data.replace(cursor, name, explorer)
+def _replace(cursor: Cursor, name: str, explorer: Explorer, *, version: int | None) -> Explorer:
+    return get_backend().explorer.replace(cursor, name, explorer, version=version)
+
+
+def modify(name: str, explorer: PartialExplorer, *, version: int | None = None) -> Explorer:
+    try:
+        return _modify(name, explorer, version=version)
+    finally:
+        cache.invalidate(name, explorer.name)
 
 
 @transaction
-def modify(cursor: Cursor, name: str, explorer: PartialExplorer) -> Explorer:
-    return data.modify(cursor, name, explorer)
+def _modify(cursor: Cursor, name: str, explorer: PartialExplorer, *, version: int | None) -> Explorer:
+    return get_backend().explorer.modify(cursor, name, explorer, version=version)
+
+
+def delete(name: str, *, version: int | None = None) -> None:
+    try:
+        _delete(name, version=version)
+    finally:
+        cache.invalidate(name)
 
 
 @transaction
-def delete(cursor: Cursor, name: str) -> None:
-    data.delete(cursor, name)
+def _delete(cursor: Cursor, name: str, *, version: int | None) -> None:
+    get_backend().explorer.delete(cursor, name, version=version)
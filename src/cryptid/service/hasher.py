@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, TypeVar
+
+import bcrypt
+
+from cryptid.error import HasherBusyError
+
+R = TypeVar("R")
+
+# bcrypt is slow on purpose, so it runs in worker processes, where it neither blocks the event loop nor holds
+# the GIL of the request threads. 0 workers hash on the calling thread instead, or in the default executor
+# of the event loop for the async entry points.
+WORKERS: int = int(os.getenv("CRYPTID_HASH_WORKERS", default=str(min(4, os.cpu_count() or 1))))
+# The hashes admitted at once, queued or running. Beyond that, a hash fails fast with `HasherBusyError`
+# instead of queueing logins for longer than any client would wait.
+MAX_PENDING: int = int(os.getenv("CRYPTID_HASH_MAX_PENDING", default=str(max(1, WORKERS) * 16)))
+
+
+def _hashpw(plain: str) -> str:
+    return bcrypt.hashpw(plain.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+
+
+def _checkpw(plain: str, hashed: str) -> bool:
+    return bcrypt.checkpw(plain.encode("utf-8"), hashed.encode("utf-8"))
+
+
+def _ping() -> None:
+    pass
+
+
+@dataclass(frozen=True)
+class HasherStats:
+    workers: int
+    max_pending: int
+    pending: int  # admitted and not done, queued or running
+    queued: int  # pending beyond the workers, waiting for one
+    peak_pending: int
+    completed: int
+    rejected: int
+    time_total: float  # seconds from admission to completion
+
+
+class PasswordHasher:
+    def __init__(self, *, workers: int = WORKERS, max_pending: int = MAX_PENDING) -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: ProcessPoolExecutor | None = None
+        self._pending = 0
+        self._peak_pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._time_total = 0.0
+        self._lock = threading.Lock()
+
+    def make_hash(self, plain: str) -> str:
+        return self._run(_hashpw, plain)
+
+    def verify_password(self, plain: str, hashed: str) -> bool:
+        return self._run(_checkpw, plain, hashed)
+
+    async def async_make_hash(self, plain: str) -> str:
+        return await self._async_run(_hashpw, plain)
+
+    async def async_verify_password(self, plain: str, hashed: str) -> bool:
+        return await self._async_run(_checkpw, plain, hashed)
+
+    # Starts every worker process now, e.g. on startup, rather than on the first logins.
+    def warm_up(self) -> None:
+        if self.workers > 0:
+            for future in [self._pool().submit(_ping) for _ in range(self.workers)]:
+                future.result()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Forking a process with threads may copy held locks into the child, so workers are spawned.
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def _run(self, func: Callable[..., R], *args: Any) -> R:
+        if self.workers > 0:
+            return self._submit(func, *args).result()
+        start = self._admit()
+        try:
+            return func(*args)
+        finally:
+            self._done(start)
+
+    async def _async_run(self, func: Callable[..., R], *args: Any) -> R:
+        if self.workers > 0:
+            return await asyncio.wrap_future(self._submit(func, *args))
+        start = self._admit()
+        try:
+            return await asyncio.to_thread(func, *args)
+        finally:
+            self._done(start)
+
+    # A hash stays pending until its worker is done with it, even if its caller stopped waiting.
+    def _submit(self, func: Callable[..., R], *args: Any) -> Future[R]:
+        start = self._admit()
+        try:
+            future = self._pool().submit(func, *args)
+        except BaseException:
+            self._done(start)
+            raise
+        future.add_done_callback(lambda _: self._done(start))
+        return future
+
+    def _admit(self) -> float:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise HasherBusyError(pending=self._pending)
+            self._pending += 1
+            self._peak_pending = max(self._peak_pending, self._pending)
+        return time.perf_counter()
+
+    def _done(self, start: float) -> None:
+        with self._lock:
+            self._pending -= 1
+            self._completed += 1
+            self._time_total += time.perf_counter() - start
+
+    def stats(self) -> HasherStats:
+        with self._lock:
+            return HasherStats(
+                workers=self.workers,
+                max_pending=self.max_pending,
+                pending=self._pending,
+                queued=max(0, self._pending - self.workers),
+                peak_pending=self._peak_pending,
+                completed=self._completed,
+                rejected=self._rejected,
+                time_total=self._time_total,
+            )
+
+
+_hasher: PasswordHasher = PasswordHasher()
+
+
+def get_hasher() -> PasswordHasher:
+    return _hasher
+
+
+def make_hash(plain: str) -> str:
+    return _hasher.make_hash(plain)
+
+
+def verify_password(plain: str, hashed: str) -> bool:
+    return _hasher.verify_password(plain, hashed)
+
+
+async def async_make_hash(plain: str) -> str:
+    return await _hasher.async_make_hash(plain)
+
+
+async def async_verify_password(plain: str, hashed: str) -> bool:
+    return await _hasher.async_verify_password(plain, hashed)
+
+
+def get_hasher_stats() -> HasherStats:
+    return _hasher.stats()
@@ -1,49 +1,95 @@
 from __future__ import annotations
 
-import os
+from datetime import datetime
+from typing import Iterator
 
-from cryptid.data.init import Cursor, get_cursor, transaction
-from cryptid.model.user import PartialUser, PrivateUser, PublicUser, SignInUser
-from cryptid.service.auth import make_hash
+from cryptid.backend import get_backend, query, stream, transaction
+from cryptid.data.init import Cursor
+from cryptid.model.user import PartialUser, PrivateUser, PublicUser, SignInUser, UserFilter
+from cryptid.service.hasher import make_hash
 
-if not os.getenv("CRYPTID_UNIT_TEST"):
-    from cryptid.data import user as data, xuser
-else:
-    from cryptid.fake.data import user as data
 
-
-@transaction
-def create(cursor: Cursor, user: SignInUser) -> PublicUser:
+def create(user: SignInUser) -> PublicUser:
+    # Hash outside the transaction, so that bcrypt never holds up the writer.
     private_user = PrivateUser(
         name=user.name,
         roles=user.roles,
         hash=make_hash(user.password),
     )
-    return data.create(cursor, private_user)
+    return _create(private_user)
+
+
+@transaction
+def _create(cursor: Cursor, user: PrivateUser) -> PublicUser:
+    return get_backend().user.create(cursor, user)
+
+
+@query
+def get_all(
+    cursor: Cursor,
+    *,
+    deleted: bool = False,
+    limit: int | None = None,
+    after: str | tuple[datetime, str] | None = None,
+    role: str | None = None,
+    filters: UserFilter | None = None,
+) -> list[PublicUser]:
+    if deleted:
+        return get_backend().xuser.get_all(cursor, limit=limit, after=after, role=role, filters=filters)
+    return get_backend().user.get_all(cursor, limit=limit, after=after, role=role, filters=filters)
 
 
-def get_all(*, deleted: bool = False) -> list[PublicUser]:
+@stream
+def iter_all(
+    cursor: Cursor,
+    *,
+    deleted: bool = False,
+    role: str | None = None,
+    filters: UserFilter | None = None,
+) -> Iterator[PublicUser]:
     if deleted:
-        return xuser.get_all(get_cursor())
-    return data.get_all(get_cursor())
+        return get_backend().xuser.iter_all(cursor, role=role, filters=filters)
+    return get_backend().user.iter_all(cursor, role=role, filters=filters)
 
 
-def get_one(id_: str, *, deleted: bool = False) -> PublicUser:
+@query
+def get_one(cursor: Cursor, id_: str, *, deleted: bool = False) -> PublicUser:
     if deleted:
-        return xuser.get_one(get_cursor(), id_)
-    return data.get_one(get_cursor(), id_)
+        return get_backend().xuser.get_one(cursor, id_)
+    return get_backend().user.get_one(cursor, id_)
 
 
 @transaction
-def replace(cursor: Cursor, id_: str, user: PublicUser) -> PublicUser:
-    return data.replace(cursor, id_, user)
+def replace(cursor: Cursor, id_: str, user: PublicUser, *, version: int | None = None) -> PublicUser:
+    return get_backend().user.replace(cursor, id_, user, version=version)
 
 
 @transaction
-def modify(cursor: Cursor, id_: str, user: PartialUser) -> PublicUser:
-    return data.modify(cursor, id_, user)
+def modify(cursor: Cursor, id_: str, user: PartialUser, *, version: int | None = None) -> PublicUser:
+    return get_backend().user.modify(cursor, id_, user, version=version)
 
 
 @transaction
-def delete(cursor: Cursor, id_: str) -> None:
-    data.delete(cursor, id_)
+def delete(cursor: Cursor, id_: str, *, version: int | None = None) -> None:
+    get_backend().user.delete(cursor, id_, version=version)
+
+
+@transaction
+def delete_many(cursor: Cursor, ids: list[str]) -> list[str]:
+    return get_backend().user.delete_many(cursor, ids)
+
+
+@transaction
+def _purge_deleted(cursor: Cursor, before: datetime, limit: int) -> int:
+    return get_backend().xuser.purge(cursor, before=before, limit=limit)
+
+
+# Purges the users deleted before `before`, `batch_size` users per transaction, so that every transaction
+# holds the write lock briefly and other writes run between them. Returns the number of purged users.
+def purge_deleted(before: datetime, *, batch_size: int = 500) -> int:
+    total = 0
+    while (purged := _purge_deleted(before, batch_size)) > 0:
+        total += purged
+        if purged < batch_size:
+            break
+    return total
@@ -1,21 +1,25 @@
 from __future__ import annotations
 
+import hashlib
+import json
 from datetime import datetime, timezone
 from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from starlette import status
 
-from cryptid.error import AuthenticationError, JWTValidationError
+from cryptid.env import JWKS_MAX_AGE_SECONDS
+from cryptid.error import AuthenticationError, HasherBusyError, JWTValidationError
 from cryptid.model.auth import AuthUser, Token, TokenResponse
-from cryptid.service import auth as service
+from cryptid.service.aio import auth as service
+from cryptid.service.codec import get_keyring
 
 router: APIRouter = APIRouter(prefix="/auth")
 oauth2_scheme: OAuth2PasswordBearer = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
 
-def get_auth_user(token: str = Depends(oauth2_scheme)) -> AuthUser:
+async def get_auth_user(token: str = Depends(oauth2_scheme)) -> AuthUser:
     try:
         return service.get_user_from_jwt(token)
     except AuthenticationError as e:
@@ -26,6 +30,15 @@ def get_auth_user(token: str = Depends(oauth2_scheme)) -> AuthUser:
         )
 
 
+# The password hasher sheds load with 503, which clients may retry after a second.
+def hasher_busy(error: HasherBusyError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(error),
+        headers={"Retry-After": "1"},
+    )
+
+
 def _require_role(role: str, user: AuthUser) -> AuthUser:
     if role not in user.roles:
         raise HTTPException(
@@ -35,11 +48,11 @@ def _require_role(role: str, user: AuthUser) -> AuthUser:
     return user
 
 
-def user_role(user: AuthUser = Depends(get_auth_user)) -> AuthUser:
+async def user_role(user: AuthUser = Depends(get_auth_user)) -> AuthUser:
     return _require_role("user", user)
 
 
-def admin_role(user: AuthUser = Depends(get_auth_user)) -> AuthUser:
+async def admin_role(user: AuthUser = Depends(get_auth_user)) -> AuthUser:
     return _require_role("admin", user)
 
 
@@ -47,7 +60,9 @@ def admin_role(user: AuthUser = Depends(get_auth_user)) -> AuthUser:
 @router.post("/token/", status_code=status.HTTP_201_CREATED, response_model=TokenResponse)
 async def create_token(form: OAuth2PasswordRequestForm = Depends()) -> Token:
     try:
-        return service.create_token(form.username, form.password)
+        return await service.create_token(form.username, form.password)
+    except HasherBusyError as e:
+        raise hasher_busy(e)
     except AuthenticationError as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -59,7 +74,7 @@ async def create_token(form: OAuth2PasswordRequestForm = Depends()) -> Token:
 
 @router.get("/token")
 @router.get("/token/")
-def verify_token(token: str = Depends(oauth2_scheme)) -> dict[str, Any]:
+async def verify_token(token: str = Depends(oauth2_scheme)) -> dict[str, Any]:
     try:
         claims = service.parse_jwt(token)
     except AuthenticationError as e:
@@ -72,7 +87,7 @@ def verify_token(token: str = Depends(oauth2_scheme)) -> dict[str, Any]:
     sub = claims.get("sub")
     try:
         if sub:
-            _ = service.find_user(sub)
+            _ = await service.find_user(sub)
         else:
             raise JWTValidationError(msg="claim 'sub' required")
     except AuthenticationError:
@@ -95,3 +110,16 @@ def verify_token(token: str = Depends(oauth2_scheme)) -> dict[str, Any]:
         },
         "user_exists": user_exists,
     }
+
+
+# The public keys that verify the tokens, for other services to cache. A key is added to the keyring at least
+# `max-age` before it signs, so that they never see a `kid` they have not fetched yet.
+@router.get("/jwks.json", response_model=None)
+async def jwks(response: Response, if_none_match: str | None = Header(None)) -> dict[str, Any] | Response:
+    keys = get_keyring().jwks()
+    etag = '"' + hashlib.blake2b(json.dumps(keys, sort_keys=True).encode("utf-8"), digest_size=16).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={JWKS_MAX_AGE_SECONDS}"}
+    if if_none_match is not None and etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return keys
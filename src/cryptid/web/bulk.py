@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import json
+import os
+from typing import Any, TypeVar
+
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+from starlette import status
+
+from cryptid.model.bulk import BulkItem
+from cryptid.web.stream import NDJSON
+
+M = TypeVar("M", bound=BaseModel)
+
+MAX_BULK_SIZE: int = int(os.getenv("CRYPTID_MAX_BULK_SIZE", default="10000"))
+
+
+# The request body of a bulk endpoint, which is either a JSON array or NDJSON of `model`.
+def openapi_body(model: type[BaseModel]) -> dict[str, Any]:
+    ref = {"$ref": f"#/components/schemas/{model.__name__}"}
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": {"type": "array", "items": ref}},
+                NDJSON: {"schema": {"type": "string"}},
+            },
+        },
+    }
+
+
+# Parses the request body into the valid items with their positions, and the failures of the invalid items.
+# An invalid item fails alone, but a body that is not a JSON array or NDJSON fails the whole request.
+async def parse_items(request: Request, model: type[M]) -> tuple[list[tuple[int, M]], list[BulkItem]]:
+    body = await request.body()
+    try:
+        if request.headers.get("content-type", "").startswith(NDJSON):
+            raw_items = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            raw_items = json.loads(body)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"invalid request body: {e}")
+    if not isinstance(raw_items, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="request body must be a JSON array")
+    if len(raw_items) > MAX_BULK_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"at most {MAX_BULK_SIZE} items are allowed, but got {len(raw_items)}",
+        )
+    items, failures = [], []
+    for index, raw_item in enumerate(raw_items):
+        try:
+            items.append((index, model.model_validate(raw_item)))
+        except ValidationError as e:
+            name = raw_item.get("name") if isinstance(raw_item, dict) else None
+            failures.append(BulkItem(
+                index=index,
+                name=name if isinstance(name, str) else None,
+                status="failed",
+                detail="; ".join(error["msg"] for error in e.errors()),
+            ))
+    return items, failures
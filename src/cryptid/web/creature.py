@@ -1,66 +1,120 @@
 from __future__ import annotations
 
-import os
-
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from starlette import status
 
-from cryptid.error import EntityAlreadyExistsError, EntityNotFoundError
-from cryptid.model.creature import Creature, PartialCreature
+from cryptid.error import EntityAlreadyExistsError, EntityNotFoundError, VersionMismatchError
+from cryptid.model.bulk import BulkMode, BulkReport
+from cryptid.model.creature import Creature, CreatureFilter, CreatureHit, PartialCreature
+from cryptid.service.aio import creature as service
 from cryptid.web.auth import admin_role
-
-if not os.getenv("CRYPTID_UNIT_TEST"):
-    from cryptid.service import creature as service
-else:
-    from cryptid.fake import creature as service
+from cryptid.web.bulk import openapi_body, parse_items
+from cryptid.web.etag import if_match, set_etag
+from cryptid.web.page import Page, decode_search_key, encode_search_key, page_params, paginate
+from cryptid.web.stream import ndjson_response, wants_stream
 
 router: APIRouter = APIRouter(prefix="/creatures")
 
 
 @router.post("", status_code=status.HTTP_201_CREATED, dependencies=[Depends(admin_role)])
 @router.post("/", status_code=status.HTTP_201_CREATED, dependencies=[Depends(admin_role)])
-def create(creature: Creature) -> Creature:
+async def create(creature: Creature, response: Response) -> Creature:
     try:
-        return service.create(creature)
+        created = await service.create(creature)
     except EntityAlreadyExistsError as e:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    set_etag(response, created.version)
+    return created
+
+
+@router.post("/bulk", dependencies=[Depends(admin_role)], openapi_extra=openapi_body(Creature))
+@router.post("/bulk/", dependencies=[Depends(admin_role)], openapi_extra=openapi_body(Creature))
+async def create_many(request: Request, mode: BulkMode = Query("insert")) -> BulkReport:
+    items, failures = await parse_items(request, Creature)
+    results = await service.create_many([creature for _, creature in items], mode=mode)
+    for result in results:
+        result.index = items[result.index][0]
+    return BulkReport.of(results + failures)
 
 
 @router.get("")
 @router.get("/")
-def get_all() -> list[Creature]:
-    return service.get_all()
+async def get_all(
+    request: Request,
+    response: Response,
+    page: Page = Depends(page_params),
+    filters: CreatureFilter = Depends(),
+    stream: bool = Query(False),
+) -> list[Creature]:
+    if wants_stream(request, stream):
+        return ndjson_response(service.iter_all(filters=filters))
+    creatures = await service.get_all(limit=page.limit + 1, after=page.after, filters=filters)
+    return paginate(request, response, page, creatures, key=lambda c: c.name)
+
+
+# Declared before `/{name}`, which would otherwise match `/search`.
+@router.get("/search")
+@router.get("/search/")
+async def search(
+    request: Request,
+    response: Response,
+    q: str = Query(min_length=1),
+    page: Page = Depends(page_params),
+) -> list[CreatureHit]:
+    after = decode_search_key(page.after) if page.after is not None else None
+    hits = await service.search(q, limit=page.limit + 1, after=after)
+    return paginate(request, response, page, hits, key=lambda h: encode_search_key(h.score, h.creature.name))
 
 
 @router.get("/{name}")
 @router.get("/{name}/")
-def get_one(name: str) -> Creature:
+async def get_one(name: str, response: Response) -> Creature:
     try:
-        return service.get_one(name)
+        creature = await service.get_one(name)
     except EntityNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    set_etag(response, creature.version)
+    return creature
 
 
 @router.put("/{name}", dependencies=[Depends(admin_role)])
 @router.put("/{name}/", dependencies=[Depends(admin_role)])
-def replace(name: str, creature: Creature) -> Creature:
+async def replace(
+    name: str,
+    creature: Creature,
+    response: Response,
+    version: int | None = Depends(if_match),
+) -> Creature:
     try:
-        return service.replace(name, creature)
+        replaced = await service.replace(name, creature, version=version)
     except EntityNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except EntityAlreadyExistsError as e:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except VersionMismatchError as e:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
+    set_etag(response, replaced.version)
+    return replaced
 
 
 @router.patch("/{name}", dependencies=[Depends(admin_role)])
 @router.patch("/{name}/", dependencies=[Depends(admin_role)])
-def modify(name: str, creature: PartialCreature) -> Creature:
+async def modify(
+    name: str,
+    creature: PartialCreature,
+    response: Response,
+    version: int | None = Depends(if_match),
+) -> Creature:
     try:
-        return service.modify(name, creature)
+        modified = await service.modify(name, creature, version=version)
     except EntityNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except EntityAlreadyExistsError as e:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except VersionMismatchError as e:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
+    set_etag(response, modified.version)
+    return modified
 
 
 @router.delete(
@@ -75,8 +129,10 @@ def modify(name: str, creature: PartialCreature) -> Creature:
     response_model=None,
     dependencies=[Depends(admin_role)],
 )
-def delete(name: str) -> None:
+async def delete(name: str, version: int | None = Depends(if_match)) -> None:
     try:
-        service.delete(name)
+        await service.delete(name, version=version)
     except EntityNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except VersionMismatchError as e:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from fastapi import Header, HTTPException, Response
+from starlette import status
+
+
+# The entity tag of a row is its quoted version, which every write increments, so it is a strong validator.
+def set_etag(response: Response, version: int | None) -> None:
+    if version is not None:
+        response.headers["ETag"] = f'"{version}"'
+
+
+# Parses `If-Match` into the version that a write requires, or None without the header or with `*`.
+# Anything other than one strong tag of a version, like a weak tag, can never match, so it fails with 412.
+async def if_match(if_match: str | None = Header(None)) -> int | None:
+    if if_match is None or (tag := if_match.strip()) == "*":
+        return None
+    if len(tag) < 3 or tag[0] != '"' or tag[-1] != '"' or not tag[1:-1].isdigit():
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail=f"If-Match {if_match} matches no version",
+        )
+    return int(tag[1:-1])
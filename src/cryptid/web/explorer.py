@@ -1,66 +1,120 @@
 from __future__ import annotations
 
-import os
-
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from starlette import status
 
-from cryptid.error import EntityAlreadyExistsError, EntityNotFoundError
-from cryptid.model.explorer import Explorer, PartialExplorer
+from cryptid.error import EntityAlreadyExistsError, EntityNotFoundError, VersionMismatchError
+from cryptid.model.bulk import BulkMode, BulkReport
+from cryptid.model.explorer import Explorer, ExplorerFilter, ExplorerHit, PartialExplorer
+from cryptid.service.aio import explorer as service
 from cryptid.web.auth import admin_role
-
-if not os.getenv("CRYPTID_UNIT_TEST"):
-    from cryptid.service import explorer as service
-else:
-    from cryptid.fake import explorer as service
+from cryptid.web.bulk import openapi_body, parse_items
+from cryptid.web.etag import if_match, set_etag
+from cryptid.web.page import Page, decode_search_key, encode_search_key, page_params, paginate
+from cryptid.web.stream import ndjson_response, wants_stream
 
 router: APIRouter = APIRouter(prefix="/explorers")
 
 
 @router.post("", status_code=status.HTTP_201_CREATED, dependencies=[Depends(admin_role)])
 @router.post("/", status_code=status.HTTP_201_CREATED, dependencies=[Depends(admin_role)])
-def create(explorer: Explorer) -> Explorer:
+async def create(explorer: Explorer, response: Response) -> Explorer:
     try:
-        return service.create(explorer)
+        created = await service.create(explorer)
     except EntityAlreadyExistsError as e:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    set_etag(response, created.version)
+    return created
+
+
+@router.post("/bulk", dependencies=[Depends(admin_role)], openapi_extra=openapi_body(Explorer))
+@router.post("/bulk/", dependencies=[Depends(admin_role)], openapi_extra=openapi_body(Explorer))
+async def create_many(request: Request, mode: BulkMode = Query("insert")) -> BulkReport:
+    items, failures = await parse_items(request, Explorer)
+    results = await service.create_many([explorer for _, explorer in items], mode=mode)
+    for result in results:
+        result.index = items[result.index][0]
+    return BulkReport.of(results + failures)
 
 
 @router.get("")
 @router.get("/")
-def get_all() -> list[Explorer]:
-    return service.get_all()
+async def get_all(
+    request: Request,
+    response: Response,
+    page: Page = Depends(page_params),
+    filters: ExplorerFilter = Depends(),
+    stream: bool = Query(False),
+) -> list[Explorer]:
+    if wants_stream(request, stream):
+        return ndjson_response(service.iter_all(filters=filters))
+    explorers = await service.get_all(limit=page.limit + 1, after=page.after, filters=filters)
+    return paginate(request, response, page, explorers, key=lambda e: e.name)
+
+
+# Declared before `/{name}`, which would otherwise match `/search`.
+@router.get("/search")
+@router.get("/search/")
+async def search(
+    request: Request,
+    response: Response,
+    q: str = Query(min_length=1),
+    page: Page = Depends(page_params),
+) -> list[ExplorerHit]:
+    after = decode_search_key(page.after) if page.after is not None else None
+    hits = await service.search(q, limit=page.limit + 1, after=after)
+    return paginate(request, response, page, hits, key=lambda h: encode_search_key(h.score, h.explorer.name))
 
 
 @router.get("/{name}")
 @router.get("/{name}/")
-def get_one(name: str) -> Explorer:
+async def get_one(name: str, response: Response) -> Explorer:
     try:
-        return service.get_one(name)
+        explorer = await service.get_one(name)
     except EntityNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    set_etag(response, explorer.version)
+    return explorer
 
 
 @router.put("/{name}", dependencies=[Depends(admin_role)])
 @router.put("/{name}/", dependencies=[Depends(admin_role)])
-def replace(name: str, explorer: Explorer) -> Explorer:
+async def replace(
+    name: str,
+    explorer: Explorer,
+    response: Response,
+    version: int | None = Depends(if_match),
+) -> Explorer:
     try:
-        return service.replace(name, explorer)
+        replaced = await service.replace(name, explorer, version=version)
     except EntityNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except EntityAlreadyExistsError as e:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except VersionMismatchError as e:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
+    set_etag(response, replaced.version)
+    return replaced
 
 
 @router.patch("/{name}", dependencies=[Depends(admin_role)])
 @router.patch("/{name}/", dependencies=[Depends(admin_role)])
-def modify(name: str, explorer: PartialExplorer) -> Explorer:
+async def modify(
+    name: str,
+    explorer: PartialExplorer,
+    response: Response,
+    version: int | None = Depends(if_match),
+) -> Explorer:
     try:
-        return service.modify(name, explorer)
+        modified = await service.modify(name, explorer, version=version)
     except EntityNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except EntityAlreadyExistsError as e:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except VersionMismatchError as e:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
+    set_etag(response, modified.version)
+    return modified
 
 
 @router.delete(
@@ -75,8 +129,10 @@ def modify(name: str, explorer: PartialExplorer) -> Explorer:
     response_model=None,
     dependencies=[Depends(admin_role)],
 )
-def delete(name: str) -> None:
+async def delete(name: str, version: int | None = Depends(if_match)) -> None:
     try:
-        service.delete(name)
+        await service.delete(name, version=version)
     except EntityNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except VersionMismatchError as e:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+import os
+from datetime import datetime
+from typing import Callable, TypeVar
+
+from fastapi import HTTPException, Query, Request, Response
+from pydantic import BaseModel
+from starlette import status
+
+T = TypeVar("T")
+
+DEFAULT_PAGE_SIZE: int = int(os.getenv("CRYPTID_DEFAULT_PAGE_SIZE", default="100"))
+MAX_PAGE_SIZE: int = int(os.getenv("CRYPTID_MAX_PAGE_SIZE", default="1000"))
+
+
+class Page(BaseModel):
+    limit: int = DEFAULT_PAGE_SIZE
+    after: str | None = None  # the decoded key of the last item of the previous page
+
+
+# The cursor is opaque to clients, which must only pass back the cursor from the `Link` header.
+def encode_cursor(key: str) -> str:
+    return base64.urlsafe_b64encode(key.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return base64.b64decode(padded, altchars=b"-_", validate=True).decode("utf-8")
+    except (binascii.Error, UnicodeDecodeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"invalid cursor '{cursor}'")
+
+
+# Search results are ordered by (score, name), so their key holds both. `repr` round-trips the float exactly.
+def encode_search_key(score: float, name: str) -> str:
+    return json.dumps([score, name])
+
+
+def decode_search_key(key: str) -> tuple[float, str]:
+    try:
+        score, name = json.loads(key)
+        if isinstance(score, (int, float)) and isinstance(name, str):
+            return float(score), name
+    except (ValueError, TypeError):
+        pass
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"invalid cursor '{encode_cursor(key)}'")
+
+
+# Users filtered by a time range are ordered by (time, id), so their key holds both.
+def encode_time_key(at: datetime, id_: str) -> str:
+    return json.dumps([at.isoformat(), id_])
+
+
+def decode_time_key(key: str) -> tuple[datetime, str]:
+    try:
+        at, id_ = json.loads(key)
+        if isinstance(at, str) and isinstance(id_, str):
+            return datetime.fromisoformat(at), id_
+    except (ValueError, TypeError):
+        pass
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"invalid cursor '{encode_cursor(key)}'")
+
+
+async def page_params(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1),
+    after: str | None = Query(None),
+) -> Page:
+    return Page(
+        limit=min(limit, MAX_PAGE_SIZE),
+        after=decode_cursor(after) if after is not None else None,
+    )
+
+
+# `items` must be fetched with `limit=page.limit + 1`, so that one extra item tells whether a next page exists
+# without querying it.
+def paginate(request: Request, response: Response, page: Page, items: list[T], key: Callable[[T], str]) -> list[T]:
+    if len(items) <= page.limit:
+        return items
+    items = items[:page.limit]
+    next_url = request.url.include_query_params(limit=page.limit, after=encode_cursor(key(items[-1])))
+    response.headers["Link"] = f'<{next_url}>; rel="next"'
+    return items
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from typing import AsyncIterator
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+NDJSON: str = "application/x-ndjson"
+
+
+def wants_stream(request: Request, stream: bool) -> bool:
+    return stream or NDJSON in request.headers.get("accept", "")
+
+
+# Streams `items` as newline-delimited JSON, so the memory stays flat at any table size.
+# Lines are sent in chunks of `chunk_size` items, to avoid a write per item.
+def ndjson_response(items: AsyncIterator[BaseModel], *, chunk_size: int = 100) -> StreamingResponse:
+    async def encode() -> AsyncIterator[str]:
+        lines = []
+        async for item in items:
+            lines.append(item.model_dump_json() + "\n")
+            if len(lines) >= chunk_size:
+                yield "".join(lines)
+                lines.clear()
+        if lines:
+            yield "".join(lines)
+    return StreamingResponse(encode(), media_type=NDJSON)
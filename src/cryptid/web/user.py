@@ -1,109 +1,193 @@
 from __future__ import annotations
 
-import os
-
-from fastapi import APIRouter, Body, Depends, HTTPException, Query
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response
 from starlette import status
 
-from cryptid.error import EntityAlreadyExistsError, EntityNotFoundError
+from cryptid.error import EntityAlreadyExistsError, EntityNotFoundError, HasherBusyError, VersionMismatchError
 from cryptid.model.auth import AuthUser
-from cryptid.model.user import PartialUser, PublicUser, SignInUser
-from cryptid.web.auth import admin_role, user_role
-
-if not os.getenv("CRYPTID_UNIT_TEST"):
-    from cryptid.service import user as service
-else:
-    from cryptid.fake import user as service
+from cryptid.model.bulk import BulkItem, BulkReport
+from cryptid.model.user import PartialUser, PublicUser, SignInUser, UserFilter
+from cryptid.service.aio import user as service
+from cryptid.web.auth import admin_role, hasher_busy, user_role
+from cryptid.web.bulk import MAX_BULK_SIZE
+from cryptid.web.etag import if_match, set_etag
+from cryptid.web.page import Page, decode_time_key, encode_time_key, page_params, paginate
+from cryptid.web.stream import ndjson_response, wants_stream
 
 router: APIRouter = APIRouter(prefix="/users")
 
 
 @router.post("", status_code=status.HTTP_201_CREATED)
 @router.post("/", status_code=status.HTTP_201_CREATED)
-def create(user: SignInUser) -> PublicUser:
+async def create(user: SignInUser, response: Response) -> PublicUser:
     try:
-        return service.create(user)
+        created = await service.create(user)
     except EntityAlreadyExistsError as e:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except HasherBusyError as e:
+        raise hasher_busy(e)
+    set_etag(response, created.version)
+    return created
 
 
 @router.get("", dependencies=[Depends(admin_role)])
 @router.get("/", dependencies=[Depends(admin_role)])
-def get_all(*, deleted: bool = Query(False)) -> list[PublicUser]:
-    return service.get_all(deleted=deleted)
+async def get_all(
+    request: Request,
+    response: Response,
+    *,
+    deleted: bool = Query(False),
+    role: str | None = Query(None),
+    page: Page = Depends(page_params),
+    filters: UserFilter = Depends(),
+    stream: bool = Query(False),
+) -> list[PublicUser]:
+    if not deleted and filters.order_by == "deleted_at":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'deleted_after' and 'deleted_before' require 'deleted=true'",
+        )
+    if wants_stream(request, stream):
+        return ndjson_response(service.iter_all(deleted=deleted, role=role, filters=filters))
+    if (column := filters.order_by) is None:
+        users = await service.get_all(deleted=deleted, limit=page.limit + 1, after=page.after, role=role)
+        return paginate(request, response, page, users, key=lambda u: u.id)
+    after = decode_time_key(page.after) if page.after is not None else None
+    users = await service.get_all(deleted=deleted, limit=page.limit + 1, after=after, role=role, filters=filters)
+    return paginate(request, response, page, users, key=lambda u: encode_time_key(getattr(u, column), u.id))
 
 
 @router.get("/me")
 @router.get("/me/")
-def get_me(me: AuthUser = Depends(user_role)) -> PublicUser:
+async def get_me(response: Response, me: AuthUser = Depends(user_role)) -> PublicUser:
     try:
-        return service.get_one(me.id)
+        user = await service.get_one(me.id)
     except EntityNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    set_etag(response, user.version)
+    return user
 
 
 @router.get("/{id_}", dependencies=[Depends(admin_role)])
 @router.get("/{id_}/", dependencies=[Depends(admin_role)])
-def get_one(id_: str, *, deleted: bool = Query(False)) -> PublicUser:
+async def get_one(id_: str, response: Response, *, deleted: bool = Query(False)) -> PublicUser:
     try:
-        return service.get_one(id_, deleted=deleted)
+        user = await service.get_one(id_, deleted=deleted)
     except EntityNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    set_etag(response, user.version)
+    return user
 
 
 @router.put("/me")
 @router.put("/me/")
-def replace_me(me: AuthUser = Depends(user_role), user: PublicUser = Body(...)) -> PublicUser:
+async def replace_me(
+    response: Response,
+    me: AuthUser = Depends(user_role),
+    user: PublicUser = Body(...),
+    version: int | None = Depends(if_match),
+) -> PublicUser:
     try:
-        return service.replace(me.id, user)
+        replaced = await service.replace(me.id, user, version=version)
     except EntityNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except EntityAlreadyExistsError as e:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except VersionMismatchError as e:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
+    set_etag(response, replaced.version)
+    return replaced
 
 
 @router.put("/{id_}", dependencies=[Depends(admin_role)])
 @router.put("/{id_}/", dependencies=[Depends(admin_role)])
-def replace(id_: str, user: PublicUser) -> PublicUser:
+async def replace(
+    id_: str,
+    user: PublicUser,
+    response: Response,
+    version: int | None = Depends(if_match),
+) -> PublicUser:
     try:
-        return service.replace(id_, user)
+        replaced = await service.replace(id_, user, version=version)
     except EntityNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except EntityAlreadyExistsError as e:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except VersionMismatchError as e:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
+    set_etag(response, replaced.version)
+    return replaced
 
 
 @router.patch("/me")
 @router.patch("/me/")
-def modify_me(me: AuthUser = Depends(user_role), user: PartialUser = Body(...)) -> PublicUser:
+async def modify_me(
+    response: Response,
+    me: AuthUser = Depends(user_role),
+    user: PartialUser = Body(...),
+    version: int | None = Depends(if_match),
+) -> PublicUser:
     try:
-        return service.modify(me.id, user)
+        modified = await service.modify(me.id, user, version=version)
     except EntityNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except EntityAlreadyExistsError as e:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except VersionMismatchError as e:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
+    set_etag(response, modified.version)
+    return modified
 
 
 @router.patch("/{id_}", dependencies=[Depends(admin_role)])
 @router.patch("/{id_}/", dependencies=[Depends(admin_role)])
-def modify(id_: str, user: PartialUser) -> PublicUser:
+async def modify(
+    id_: str,
+    user: PartialUser,
+    response: Response,
+    version: int | None = Depends(if_match),
+) -> PublicUser:
     try:
-        return service.modify(id_, user)
+        modified = await service.modify(id_, user, version=version)
     except EntityNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except EntityAlreadyExistsError as e:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except VersionMismatchError as e:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
+    set_etag(response, modified.version)
+    return modified
+
+
+# Deletes the users of the repeated `id` parameter, e.g. `DELETE /users?id=1&id=2`, and reports each of them.
+@router.delete("", dependencies=[Depends(admin_role)])
+@router.delete("/", dependencies=[Depends(admin_role)])
+async def delete_many(id_: list[str] = Query(alias="id", min_length=1)) -> BulkReport:
+    if len(id_) > MAX_BULK_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"at most {MAX_BULK_SIZE} items are allowed, but got {len(id_)}",
+        )
+    deleted = set(await service.delete_many(id_))
+    return BulkReport.of([
+        BulkItem(index=index, id=key, status="deleted")
+        if key in deleted else
+        BulkItem(index=index, id=key, status="failed", detail=str(EntityNotFoundError(entity="user", key=key)))
+        for index, key in enumerate(id_)
+    ])
 
 
 @router.delete("/me", status_code=status.HTTP_204_NO_CONTENT, response_model=None)
 @router.delete("/me/", status_code=status.HTTP_204_NO_CONTENT, response_model=None)
-def delete_me(me: AuthUser = Depends(user_role)) -> None:
+async def delete_me(me: AuthUser = Depends(user_role), version: int | None = Depends(if_match)) -> None:
     try:
-        service.delete(me.id)
+        await service.delete(me.id, version=version)
     except EntityNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except EntityAlreadyExistsError as e:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except VersionMismatchError as e:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
 
 
 @router.delete(
@@ -118,10 +202,12 @@ def delete_me(me: AuthUser = Depends(user_role)) -> None:
     response_model=None,
     dependencies=[Depends(admin_role)],
 )
-def delete(id_: str) -> None:
+async def delete(id_: str, version: int | None = Depends(if_match)) -> None:
     try:
-        service.delete(id_)
+        await service.delete(id_, version=version)
     except EntityNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except EntityAlreadyExistsError as e:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except VersionMismatchError as e:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
@@ -7,6 +7,7 @@ from httpx import Response
 from pydantic import BaseModel
 from starlette import status
 
+from cryptid.data.migrate import migrate
 from cryptid.main import app
 from cryptid.model.auth import TokenResponse
 from cryptid.model.user import PublicUser, SignInUser
@@ -14,6 +15,8 @@ from cryptid.model.user import PublicUser, SignInUser
 from tests.common import count
 
 key_num: int = count()
+# The lifespan, which migrates the database, runs only within `with client`, so the tests migrate beforehand.
+migrate()
 client: TestClient = TestClient(app)
 
 
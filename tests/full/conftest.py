@@ -1,7 +1,12 @@
 from __future__ import annotations
 
-import os
+import pytest
 
+from cryptid.backend import configure
+from cryptid.service import cache
 
-def pytest_configure() -> None:
-    os.environ["CRYPTID_UNIT_TEST"] = ""
+
+@pytest.fixture(autouse=True)
+def sqlite_backend() -> None:
+    configure("sqlite")
+    cache.clear()
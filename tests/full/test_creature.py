@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import json
+
 import pytest
 from fastapi.testclient import TestClient
 from starlette import status
@@ -38,7 +40,7 @@ def bigfoot() -> Creature:
 
 def test_create(yeti: Creature) -> None:
     resp = client.post("/creatures", headers=make_headers(token=admin_token), json=yeti.model_dump())
-    assert_response(resp, status_code=status.HTTP_201_CREATED, json=yeti)
+    assert_response(resp, status_code=status.HTTP_201_CREATED, json=yeti.model_copy(update={"version": 1}))
 
 
 def test_create_already_exists(yeti: Creature) -> None:
@@ -46,14 +48,94 @@ def test_create_already_exists(yeti: Creature) -> None:
     assert_response(resp, status_code=status.HTTP_409_CONFLICT)
 
 
+def test_create_many(yeti: Creature) -> None:
+    creatures = [Creature(name=f"Bulk {key_num} {i}", country="US", area="*").model_dump() for i in range(3)]
+    creatures_and_existing = creatures + [yeti.model_dump()]
+    resp = client.post("/creatures/bulk", headers=make_headers(token=admin_token), json=creatures_and_existing)
+    assert_response(resp, status_code=status.HTTP_200_OK)
+    assert (resp.json()["created"], resp.json()["failed"]) == (3, 1)
+    creatures[0]["description"] = "updated"
+    headers = make_headers(token=admin_token) | {"Content-Type": "application/x-ndjson"}
+    content = "\n".join(json.dumps(creature) for creature in creatures[:1] + [{"name": ""}])
+    resp = client.post("/creatures/bulk", params={"mode": "upsert"}, headers=headers, content=content)
+    assert_response(resp, status_code=status.HTTP_200_OK)
+    assert [item["status"] for item in resp.json()["items"]] == ["updated", "failed"]
+    resp = client.get(f"/creatures/Bulk {key_num} 0")
+    assert resp.json()["description"] == "updated"
+
+
+def test_create_many_unauthorized() -> None:
+    resp = client.post("/creatures/bulk", json=[])
+    assert resp.status_code in (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN)
+
+
 def test_get_all() -> None:
     resp = client.get("/creatures")
     assert_response(resp, status_code=status.HTTP_200_OK)
 
 
+def test_get_all_paginated() -> None:
+    for suffix in ("a", "b"):
+        creature = Creature(name=f"Page {key_num} {suffix}", country="US", area="*")
+        client.post("/creatures", headers=make_headers(token=admin_token), json=creature.model_dump())
+    resp = client.get("/creatures", params={"limit": 1})
+    assert_response(resp, status_code=status.HTTP_200_OK)
+    assert len(resp.json()) == 1
+    resp_next = client.get(resp.links["next"]["url"])
+    assert_response(resp_next, status_code=status.HTTP_200_OK)
+    assert resp_next.json()[0]["name"] > resp.json()[0]["name"]
+
+
+def test_get_all_invalid_cursor() -> None:
+    resp = client.get("/creatures", params={"after": "%"})
+    assert_response(resp, status_code=status.HTTP_400_BAD_REQUEST)
+
+
+def test_get_all_stream() -> None:
+    for resp in (
+        client.get("/creatures", params={"stream": "true"}),
+        client.get("/creatures", headers={"Accept": "application/x-ndjson"}),
+    ):
+        assert_response(resp, status_code=status.HTTP_200_OK)
+        assert resp.headers["content-type"] == "application/x-ndjson"
+        creatures = [Creature.model_validate_json(line) for line in resp.text.splitlines()]
+        assert len(creatures) > 0
+
+
+def test_get_all_filtered() -> None:
+    resp = client.get("/creatures", params={"country": "US"})
+    assert_response(resp, status_code=status.HTTP_200_OK)
+    assert len(resp.json()) > 0
+    assert all(creature["country"] == "US" for creature in resp.json())
+    resp_stream = client.get("/creatures", params={"country": "US", "stream": "true"})
+    assert len(resp_stream.text.splitlines()) == len(resp.json())
+
+
+def test_search() -> None:
+    for suffix in ("a", "b"):
+        creature = Creature(name=f"Search {key_num} {suffix}", country="US", area="*", description=f"lore{key_num}")
+        client.post("/creatures", headers=make_headers(token=admin_token), json=creature.model_dump())
+    resp = client.get("/creatures/search", params={"q": f"lore{key_num}", "limit": 1})
+    assert_response(resp, status_code=status.HTTP_200_OK)
+    assert len(resp.json()) == 1
+    assert resp.json()[0]["snippet"] == f"<mark>lore{key_num}</mark>"
+    resp_next = client.get(resp.links["next"]["url"])
+    assert_response(resp_next, status_code=status.HTTP_200_OK)
+    assert [hit["creature"]["name"] for hit in resp.json() + resp_next.json()] == [
+        f"Search {key_num} a",
+        f"Search {key_num} b",
+    ]
+
+
+def test_search_invalid() -> None:
+    assert_response(client.get("/creatures/search"), status_code=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    resp = client.get("/creatures/search", params={"q": "lore", "after": "bm90IGpzb24"})
+    assert_response(resp, status_code=status.HTTP_400_BAD_REQUEST)
+
+
 def test_get_one(yeti: Creature) -> None:
     resp = client.get(f"/creatures/{yeti.name}")
-    assert_response(resp, status_code=status.HTTP_200_OK, json=yeti)
+    assert_response(resp, status_code=status.HTTP_200_OK, json=yeti.model_copy(update={"version": 1}))
 
 
 def test_get_one_not_found(bigfoot: Creature) -> None:
@@ -63,7 +145,7 @@ def test_get_one_not_found(bigfoot: Creature) -> None:
 
 def test_replace(yeti: Creature, bigfoot: Creature) -> None:
     resp = client.put(f"/creatures/{yeti.name}", headers=make_headers(token=admin_token), json=bigfoot.model_dump())
-    assert_response(resp, status_code=status.HTTP_200_OK, json=bigfoot)
+    assert_response(resp, status_code=status.HTTP_200_OK, json=bigfoot.model_copy(update={"version": 2}))
 
 
 def test_replace_not_found(yeti: Creature) -> None:
@@ -75,7 +157,24 @@ def test_modify(bigfoot: Creature) -> None:
     bigfoot.description = f"I'm Bigfoot {key_num}"
     creature = PartialCreature(description=bigfoot.description).model_dump(exclude_unset=True)
     resp = client.patch(f"/creatures/{bigfoot.name}", headers=make_headers(token=admin_token), json=creature)
-    assert_response(resp, status_code=status.HTTP_200_OK, json=bigfoot)
+    assert_response(resp, status_code=status.HTTP_200_OK, json=bigfoot.model_copy(update={"version": 3}))
+
+
+def test_if_match(bigfoot: Creature) -> None:
+    url = f"/creatures/{bigfoot.name}"
+    etag = client.get(url).headers["ETag"]
+    assert etag == '"3"'
+    for stale in ('"2"', 'W/"3"', "3"):
+        headers = make_headers(token=admin_token) | {"If-Match": stale}
+        resp = client.patch(url, headers=headers, json={"area": "Pacific Northwest"})
+        assert_response(resp, status_code=status.HTTP_412_PRECONDITION_FAILED)
+        resp = client.delete(url, headers=headers)
+        assert_response(resp, status_code=status.HTTP_412_PRECONDITION_FAILED)
+    headers = make_headers(token=admin_token) | {"If-Match": etag}
+    resp = client.patch(url, headers=headers, json={"area": "Pacific Northwest"})
+    assert_response(resp, status_code=status.HTTP_200_OK)
+    assert resp.json()["version"] == 4
+    assert resp.headers["ETag"] == '"4"'
 
 
 def test_modify_not_found(yeti: Creature) -> None:
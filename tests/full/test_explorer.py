@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import json
+
 import pytest
 from fastapi.testclient import TestClient
 from starlette import status
@@ -34,7 +36,7 @@ def noah() -> Explorer:
 
 def test_create(claude: Explorer) -> None:
     resp = client.post("/explorers", headers=make_headers(token=admin_token), json=claude.model_dump())
-    assert_response(resp, status_code=status.HTTP_201_CREATED, json=claude)
+    assert_response(resp, status_code=status.HTTP_201_CREATED, json=claude.model_copy(update={"version": 1}))
 
 
 def test_create_already_exists(claude: Explorer) -> None:
@@ -42,14 +44,94 @@ def test_create_already_exists(claude: Explorer) -> None:
     assert_response(resp, status_code=status.HTTP_409_CONFLICT)
 
 
+def test_create_many(claude: Explorer) -> None:
+    explorers = [Explorer(name=f"Bulk {key_num} {i}", country="US").model_dump() for i in range(3)]
+    explorers_and_existing = explorers + [claude.model_dump()]
+    resp = client.post("/explorers/bulk", headers=make_headers(token=admin_token), json=explorers_and_existing)
+    assert_response(resp, status_code=status.HTTP_200_OK)
+    assert (resp.json()["created"], resp.json()["failed"]) == (3, 1)
+    explorers[0]["description"] = "updated"
+    headers = make_headers(token=admin_token) | {"Content-Type": "application/x-ndjson"}
+    content = "\n".join(json.dumps(explorer) for explorer in explorers[:1] + [{"name": ""}])
+    resp = client.post("/explorers/bulk", params={"mode": "upsert"}, headers=headers, content=content)
+    assert_response(resp, status_code=status.HTTP_200_OK)
+    assert [item["status"] for item in resp.json()["items"]] == ["updated", "failed"]
+    resp = client.get(f"/explorers/Bulk {key_num} 0")
+    assert resp.json()["description"] == "updated"
+
+
+def test_create_many_unauthorized() -> None:
+    resp = client.post("/explorers/bulk", json=[])
+    assert resp.status_code in (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN)
+
+
 def test_get_all() -> None:
     resp = client.get("/explorers")
     assert_response(resp, status_code=status.HTTP_200_OK)
 
 
+def test_get_all_paginated() -> None:
+    for suffix in ("a", "b"):
+        explorer = Explorer(name=f"Page {key_num} {suffix}", country="FR")
+        client.post("/explorers", headers=make_headers(token=admin_token), json=explorer.model_dump())
+    resp = client.get("/explorers", params={"limit": 1})
+    assert_response(resp, status_code=status.HTTP_200_OK)
+    assert len(resp.json()) == 1
+    resp_next = client.get(resp.links["next"]["url"])
+    assert_response(resp_next, status_code=status.HTTP_200_OK)
+    assert resp_next.json()[0]["name"] > resp.json()[0]["name"]
+
+
+def test_get_all_invalid_cursor() -> None:
+    resp = client.get("/explorers", params={"after": "%"})
+    assert_response(resp, status_code=status.HTTP_400_BAD_REQUEST)
+
+
+def test_get_all_stream() -> None:
+    for resp in (
+        client.get("/explorers", params={"stream": "true"}),
+        client.get("/explorers", headers={"Accept": "application/x-ndjson"}),
+    ):
+        assert_response(resp, status_code=status.HTTP_200_OK)
+        assert resp.headers["content-type"] == "application/x-ndjson"
+        explorers = [Explorer.model_validate_json(line) for line in resp.text.splitlines()]
+        assert len(explorers) > 0
+
+
+def test_get_all_filtered() -> None:
+    resp = client.get("/explorers", params={"country": "FR"})
+    assert_response(resp, status_code=status.HTTP_200_OK)
+    assert len(resp.json()) > 0
+    assert all(explorer["country"] == "FR" for explorer in resp.json())
+    resp_stream = client.get("/explorers", params={"country": "FR", "stream": "true"})
+    assert len(resp_stream.text.splitlines()) == len(resp.json())
+
+
+def test_search() -> None:
+    for suffix in ("a", "b"):
+        explorer = Explorer(name=f"Search {key_num} {suffix}", country="US", description=f"lore{key_num}")
+        client.post("/explorers", headers=make_headers(token=admin_token), json=explorer.model_dump())
+    resp = client.get("/explorers/search", params={"q": f"lore{key_num}", "limit": 1})
+    assert_response(resp, status_code=status.HTTP_200_OK)
+    assert len(resp.json()) == 1
+    assert resp.json()[0]["snippet"] == f"<mark>lore{key_num}</mark>"
+    resp_next = client.get(resp.links["next"]["url"])
+    assert_response(resp_next, status_code=status.HTTP_200_OK)
+    assert [hit["explorer"]["name"] for hit in resp.json() + resp_next.json()] == [
+        f"Search {key_num} a",
+        f"Search {key_num} b",
+    ]
+
+
+def test_search_invalid() -> None:
+    assert_response(client.get("/explorers/search"), status_code=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    resp = client.get("/explorers/search", params={"q": "lore", "after": "bm90IGpzb24"})
+    assert_response(resp, status_code=status.HTTP_400_BAD_REQUEST)
+
+
 def test_get_one(claude: Explorer) -> None:
     resp = client.get(f"/explorers/{claude.name}")
-    assert_response(resp, status_code=status.HTTP_200_OK, json=claude)
+    assert_response(resp, status_code=status.HTTP_200_OK, json=claude.model_copy(update={"version": 1}))
 
 
 def test_get_one_not_found(noah: Explorer) -> None:
@@ -59,7 +141,7 @@ def test_get_one_not_found(noah: Explorer) -> None:
 
 def test_replace(claude: Explorer, noah: Explorer) -> None:
     resp = client.put(f"/explorers/{claude.name}", headers=make_headers(token=admin_token), json=noah.model_dump())
-    assert_response(resp, status_code=status.HTTP_200_OK, json=noah)
+    assert_response(resp, status_code=status.HTTP_200_OK, json=noah.model_copy(update={"version": 2}))
 
 
 def test_replace_not_found(claude: Explorer) -> None:
@@ -71,7 +153,23 @@ def test_modify(noah: Explorer) -> None:
     noah.description = f"I'm Noah Weiser {key_num}"
     explorer = PartialExplorer(description=noah.description).model_dump(exclude_unset=True)
     resp = client.patch(f"/explorers/{noah.name}", headers=make_headers(token=admin_token), json=explorer)
-    assert_response(resp, status_code=status.HTTP_200_OK, json=noah)
+    assert_response(resp, status_code=status.HTTP_200_OK, json=noah.model_copy(update={"version": 3}))
+
+
+def test_if_match(noah: Explorer) -> None:
+    url = f"/explorers/{noah.name}"
+    etag = client.get(url).headers["ETag"]
+    assert etag == '"3"'
+    for stale in ('"2"', 'W/"3"', "3"):
+        headers = make_headers(token=admin_token) | {"If-Match": stale}
+        resp = client.patch(url, headers=headers, json={"country": "CA"})
+        assert_response(resp, status_code=status.HTTP_412_PRECONDITION_FAILED)
+        resp = client.delete(url, headers=headers)
+        assert_response(resp, status_code=status.HTTP_412_PRECONDITION_FAILED)
+    resp = client.patch(url, headers=make_headers(token=admin_token) | {"If-Match": etag}, json={"country": "CA"})
+    assert_response(resp, status_code=status.HTTP_200_OK)
+    assert resp.json()["version"] == 4
+    assert resp.headers["ETag"] == '"4"'
 
 
 def test_modify_not_found(claude: Explorer) -> None:
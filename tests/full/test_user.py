@@ -9,7 +9,7 @@ from cryptid.main import app
 from cryptid.model.user import PartialUser, SignInUser
 
 from tests.common import count
-from tests.full.common import admin_token, assert_response, create_token, make_headers
+from tests.full.common import admin, admin_token, assert_response, create_token, make_headers
 
 key_num: int = count()
 client: TestClient = TestClient(app)
@@ -23,6 +23,7 @@ class PublicUser(BaseModel):
     created_at: str | None = None
     updated_at: str | None = None
     deleted_at: str | None = None
+    version: int | None = None
 
 
 _mike = PublicUser(
@@ -62,6 +63,7 @@ def test_create(mike: PublicUser, mike_password: str) -> None:
     mike.id = resp_dict["id"]
     mike.created_at = resp_dict["created_at"]
     mike.updated_at = resp_dict["updated_at"]
+    mike.version = 1
     assert_response(resp, status_code=status.HTTP_201_CREATED, json=mike)
 
     user.id = resp_dict["id"]
@@ -83,6 +85,34 @@ def test_get_all() -> None:
     assert_response(resp, status_code=status.HTTP_200_OK)
 
 
+def test_get_all_by_role() -> None:
+    resp = client.get("/users", params={"role": "admin"}, headers=make_headers(token=admin_token))
+    assert_response(resp, status_code=status.HTTP_200_OK)
+    assert admin.id in [user["id"] for user in resp.json()]
+    assert all("admin" in user["roles"] for user in resp.json())
+
+
+def test_get_all_by_created_range(mike: PublicUser) -> None:
+    params = {"created_after": "2000-01-01T00:00:00Z", "limit": 1}
+    resp = client.get("/users", params=params, headers=make_headers(token=admin_token))
+    assert_response(resp, status_code=status.HTTP_200_OK)
+    assert len(resp.json()) == 1
+    resp_next = client.get(resp.links["next"]["url"], headers=make_headers(token=admin_token))
+    assert_response(resp_next, status_code=status.HTTP_200_OK)
+    assert resp_next.json()[0]["created_at"] >= resp.json()[0]["created_at"]
+    params = {"created_before": mike.created_at}
+    resp = client.get("/users", params=params, headers=make_headers(token=admin_token))
+    assert mike.id not in [user["id"] for user in resp.json()]
+
+
+def test_get_all_by_deleted_range() -> None:
+    params = {"deleted_after": "2000-01-01T00:00:00Z"}
+    resp = client.get("/users", params=params, headers=make_headers(token=admin_token))
+    assert_response(resp, status_code=status.HTTP_400_BAD_REQUEST)
+    resp = client.get("/users", params={**params, "deleted": True}, headers=make_headers(token=admin_token))
+    assert_response(resp, status_code=status.HTTP_200_OK)
+
+
 def test_get_all_unauthorized() -> None:
     resp = client.get("/users")
     assert_response(resp, status_code=status.HTTP_401_UNAUTHORIZED)
@@ -109,6 +139,7 @@ def test_replace(mike: PublicUser, john: PublicUser) -> None:
     mike.name = resp_dict["name"]
     mike.roles = resp_dict["roles"]
     mike.updated_at = resp_dict["updated_at"]
+    mike.version = 2
     assert_response(resp, status_code=status.HTTP_200_OK, json=mike)
 
 
@@ -123,6 +154,7 @@ def test_modify(mike: PublicUser) -> None:
     resp = client.patch(f"/users/{mike.id}", headers=make_headers(token=admin_token), json=user)
     resp_dict = resp.json()
     mike.updated_at = resp_dict["updated_at"]
+    mike.version = 3
     assert_response(resp, status_code=status.HTTP_200_OK, json=mike)
 
 
@@ -137,6 +169,25 @@ def test_delete(mike: PublicUser) -> None:
     assert_response(resp, status_code=status.HTTP_204_NO_CONTENT, body_none=True)
 
 
+def test_delete_many(john: PublicUser) -> None:
+    ids = []
+    for i in range(2):
+        resp = client.post("/users", json=SignInUser(name=f"Bulk {key_num} {i}", password="bulk1234").model_dump())
+        ids.append(resp.json()["id"])
+    resp = client.delete("/users", headers=make_headers(token=admin_token), params={"id": [ids[0], john.id, ids[1]]})
+    assert resp.status_code == status.HTTP_200_OK
+    assert [(item["id"], item["status"]) for item in resp.json()["items"]] == [
+        (ids[0], "deleted"), (john.id, "failed"), (ids[1], "deleted"),
+    ]
+    resp = client.get(f"/users/{ids[0]}", headers=make_headers(token=admin_token), params={"deleted": True})
+    assert resp.status_code == status.HTTP_200_OK
+
+
+def test_delete_many_without_ids() -> None:
+    resp = client.delete("/users", headers=make_headers(token=admin_token))
+    assert resp.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
 def test_delete_not_found(john: PublicUser) -> None:
     resp = client.delete(f"/users/{john.id}", headers=make_headers(token=admin_token))
     assert_response(resp, status_code=status.HTTP_404_NOT_FOUND)
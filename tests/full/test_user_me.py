@@ -25,6 +25,7 @@ class PublicUser(BaseModel):
     created_at: str | None = None
     updated_at: str | None = None
     deleted_at: str | None = None
+    version: int | None = None
 
     def to_auth_user(self) -> AuthUser:
         return AuthUser(
@@ -74,6 +75,7 @@ def test_create_mike(mike: PublicUser, mike_password: str) -> None:
     mike.id = resp_dict["id"]
     mike.created_at = resp_dict["created_at"]
     mike.updated_at = resp_dict["updated_at"]
+    mike.version = 1
     assert_response(resp, status_code=status.HTTP_201_CREATED, json=mike)
 
     user.id = resp_dict["id"]
@@ -92,6 +94,7 @@ def test_create_and_delete_john(john: PublicUser, john_password: str) -> None:
     john.id = resp_dict["id"]
     john.created_at = resp_dict["created_at"]
     john.updated_at = resp_dict["updated_at"]
+    john.version = 1
     assert_response(resp, status_code=status.HTTP_201_CREATED, json=john)
 
     user.id = resp_dict["id"]
@@ -117,6 +120,7 @@ def test_replace_me(mike: PublicUser, john: PublicUser) -> None:
     mike.name = resp_dict["name"]
     mike.roles = resp_dict["roles"]
     mike.updated_at = resp_dict["updated_at"]
+    mike.version = 2
     assert_response(resp, status_code=status.HTTP_200_OK, json=mike)
 
 
@@ -131,9 +135,22 @@ def test_modify_me(mike: PublicUser) -> None:
     resp = client.patch(f"/users/me", headers=make_headers(token=mike_token), json=user)
     resp_dict = resp.json()
     mike.updated_at = resp_dict["updated_at"]
+    mike.version = 3
     assert_response(resp, status_code=status.HTTP_200_OK, json=mike)
 
 
+def test_modify_me_if_match(mike: PublicUser) -> None:
+    resp = client.get("/users/me", headers=make_headers(token=mike_token))
+    assert resp.headers["ETag"] == f'"{mike.version}"'
+    headers = make_headers(token=mike_token) | {"If-Match": f'"{mike.version - 1}"'}
+    resp = client.patch("/users/me", headers=headers, json={"roles": ["user"]})
+    assert_response(resp, status_code=status.HTTP_412_PRECONDITION_FAILED)
+    headers = make_headers(token=mike_token) | {"If-Match": f'"{mike.version}"'}
+    resp = client.patch("/users/me", headers=headers, json={})
+    assert_response(resp, status_code=status.HTTP_200_OK, json=mike)
+    assert resp.headers["ETag"] == f'"{mike.version}"'
+
+
 def test_modify_me_not_found() -> None:
     user = PartialUser().model_dump(exclude_unset=True)
     resp = client.patch(f"/users/me", headers=make_headers(token=john_token), json=user)
@@ -1,15 +1,14 @@
 from __future__ import annotations
 
-import os
+import pytest
 
+from cryptid.backend import configure
+from cryptid.service import cache
 
-# The `pytest_configure` hook occurs before running the `import` statement in test modules.
-def pytest_configure() -> None:
-    os.environ["CRYPTID_UNIT_TEST"] = "true"
 
-
-# The `pytest.fixture` hook occurs after running the `import` statement in test modules.
-# import pytest
-# @pytest.fixture(autouse=True, scope="session")
-# def set_env() -> None:
-#     os.environ["CRYPTID_UNIT_TEST"] = "true"
+# The services and routes of the unit tests run on the in-memory backend, while the tests of `cryptid.data`
+# use SQLite directly.
+@pytest.fixture(autouse=True)
+def memory_backend() -> None:
+    configure("memory")
+    cache.clear()
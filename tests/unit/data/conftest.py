@@ -0,0 +1,10 @@
+from __future__ import annotations
+
+import pytest
+
+from cryptid.data.migrate import migrate
+
+
+@pytest.fixture(autouse=True, scope="session")
+def schema() -> None:
+    migrate()
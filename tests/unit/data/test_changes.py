@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from pathlib import Path
+from sqlite3 import Connection, connect
+from typing import Iterator
+
+import pytest
+
+from cryptid.data import changes
+from cryptid.data.changes import ChangeWatcher
+from cryptid.data.migrate import apply_migrations
+
+
+@pytest.fixture
+def path(tmp_path: Path) -> str:
+    path = str(tmp_path / "test.db")
+    with connect(path) as conn:
+        apply_migrations(conn)
+    return path
+
+
+@pytest.fixture
+def writer(path: str) -> Iterator[Connection]:
+    conn = connect(path)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def notified(monkeypatch: pytest.MonkeyPatch) -> list[tuple[str, set[str] | None]]:
+    monkeypatch.setattr(changes, "_listeners", {})
+    notified = []
+    for table in ("creature", "explorer", "user"):
+        changes.subscribe(table, lambda keys, table=table: notified.append((table, keys)))
+    return notified
+
+
+@pytest.fixture
+def watcher(path: str) -> Iterator[ChangeWatcher]:
+    watcher = ChangeWatcher([lambda: connect(path)])
+    yield watcher
+    watcher.stop()
+
+
+def test_poll(writer: Connection, watcher: ChangeWatcher, notified: list) -> None:
+    assert watcher.poll() == 0
+    with writer:
+        writer.execute("INSERT INTO creature (name, country, area, description, aka) VALUES ('Yeti', 'CN', '', '', '')")
+        writer.execute("UPDATE creature SET name = 'Abominable' WHERE name = 'Yeti'")
+        writer.execute("INSERT INTO user (name, hash, roles, created_at, updated_at) VALUES ('mike', '', '[]', 0, 0)")
+    assert watcher.poll() == 4
+    assert sorted(notified, key=lambda n: n[0]) == [("creature", {"Yeti", "Abominable"}), ("user", {"1"})]
+    assert watcher.poll() == 0
+    stats = watcher.stats()
+    assert (stats.polls, stats.changes, stats.resets) == (3, 4, 0)
+    assert 0 <= stats.lag_last <= stats.lag_max
+
+
+def test_poll_after_trim(writer: Connection, watcher: ChangeWatcher, notified: list) -> None:
+    with writer:
+        writer.execute("INSERT INTO change_log (seq, tbl, key, at) VALUES (100, 'explorer', 'Beau', 0)")
+    assert watcher.poll() == 1
+    assert sorted(notified, key=lambda n: n[0]) == [("creature", None), ("explorer", None), ("user", None)]
+    assert watcher.stats().resets == 1
+
+
+def test_log_is_trimmed(writer: Connection) -> None:
+    with writer:
+        writer.execute("INSERT INTO change_log (seq, tbl, key, at) VALUES (20000, 'explorer', 'Beau', 0)")
+        writer.execute("INSERT INTO change_log (tbl, key, at) VALUES ('explorer', 'Beau', 0)")
+    assert writer.execute("SELECT MIN(seq), MAX(seq) FROM change_log").fetchone() == (20000, 20001)
@@ -4,8 +4,9 @@ import pytest
 
 from cryptid.data import creature as data
 from cryptid.data.init import Cursor, get_cursor, transaction_with
-from cryptid.error import EntityAlreadyExistsError, EntityNotFoundError
-from cryptid.model.creature import Creature, PartialCreature
+from cryptid.error import EntityAlreadyExistsError, EntityNotFoundError, VersionMismatchError
+from cryptid.model.bulk import BulkMode
+from cryptid.model.creature import Creature, CreatureFilter, PartialCreature
 
 from tests.common import count
 
@@ -38,7 +39,7 @@ def test_create(yeti: Creature) -> None:
     @transaction_with(new_conn=False)
     def inner(cursor: Cursor) -> None:
         resp = data.create(cursor, yeti)
-        assert resp == yeti
+        assert resp == yeti.model_copy(update={"version": 1})
     inner()
 
 
@@ -50,14 +51,88 @@ def test_create_already_exists(yeti: Creature) -> None:
     inner()
 
 
+@pytest.mark.parametrize(("mode", "statuses"), [
+    ("insert", ["created", "failed", "failed"]),
+    ("upsert", ["created", "updated", "updated"]),
+    ("skip", ["created", "skipped", "skipped"]),
+])
+def test_create_many(yeti: Creature, mode: BulkMode, statuses: list[str]) -> None:
+    @transaction_with(new_conn=False)
+    def inner(cursor: Cursor) -> None:
+        name = f"Bulk {key_num} {mode}"
+        creatures = [
+            Creature(name=name, country="US", area="*"),
+            Creature(name=name, country="US", area="*", description="again"),
+            yeti,
+        ]
+        resp = data.create_many(cursor, creatures, mode=mode)
+        assert [item.status for item in resp] == statuses
+        assert [item.index for item in resp] == [0, 1, 2]
+        assert data.get_one(cursor, name).description == ("again" if mode == "upsert" else "")
+        assert data.get_one(cursor, name).version == (2 if mode == "upsert" else 1)
+        assert data.get_one(cursor, yeti.name).model_copy(update={"version": None}) == yeti
+    inner()
+
+
 def test_get_all() -> None:
     resp = data.get_all(get_cursor())
     assert len(resp) > 0
 
 
+def test_iter_all() -> None:
+    resp = list(data.iter_all(get_cursor(), batch_size=1))
+    assert resp == data.get_all(get_cursor())
+
+
+def test_get_all_filtered() -> None:
+    resp = data.get_all(get_cursor(), filters=CreatureFilter(country="US"))
+    assert len(resp) > 0
+    assert all(creature.country == "US" for creature in resp)
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [CreatureFilter(country="US"), CreatureFilter(area="Himalayas"), CreatureFilter(aka="Sasquatch")],
+)
+def test_get_all_filtered_uses_index(filters: CreatureFilter) -> None:
+    for after in (None, "A"):
+        sql, params = data.select_all(limit=10, after=after, filters=filters)
+        plan = [detail for *_, detail in get_cursor().execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+        assert any("USING INDEX creature_" in detail for detail in plan), plan
+        assert not any(detail.startswith("SCAN creature") and "INDEX" not in detail for detail in plan), plan
+        assert not any("TEMP B-TREE" in detail for detail in plan), plan
+
+
+def test_search(yeti: Creature) -> None:
+    resp = data.search(get_cursor(), "hirsute")
+    assert yeti.name in [hit.creature.name for hit in resp]
+    assert all("<mark>" in hit.snippet for hit in resp)
+    assert data.search(get_cursor(), "   ") == []
+
+
+def test_search_follows_writes() -> None:
+    @transaction_with(new_conn=False)
+    def inner(cursor: Cursor) -> None:
+        name = f"Search {key_num}"
+        data.create(cursor, Creature(name=name, country="US", area="*", description=f"old{key_num}"))
+        assert [hit.creature.name for hit in data.search(cursor, f"old{key_num}")] == [name]
+        data.modify(cursor, name, PartialCreature(description=f"new{key_num}"))
+        assert data.search(cursor, f"old{key_num}") == []
+        assert [hit.creature.name for hit in data.search(cursor, f"new{key_num}")] == [name]
+        data.delete(cursor, name)
+        assert data.search(cursor, f"new{key_num}") == []
+    inner()
+
+
 def test_get_one(yeti: Creature) -> None:
     resp = data.get_one(get_cursor(), yeti.name)
-    assert resp == yeti
+    assert resp == yeti.model_copy(update={"version": 2})
+
+
+def test_row_to_model_matches_validation(yeti: Creature) -> None:
+    resp = data.get_one(get_cursor(), yeti.name)
+    assert resp == Creature.model_validate(resp.model_dump())
+    assert resp.model_dump_json() == yeti.model_copy(update={"version": 2}).model_dump_json()
 
 
 def test_get_one_not_found(bigfoot: Creature) -> None:
@@ -69,7 +144,7 @@ def test_replace(yeti: Creature, bigfoot: Creature) -> None:
     @transaction_with(new_conn=False)
     def inner(cursor: Cursor) -> None:
         resp = data.replace(cursor, yeti.name, bigfoot)
-        assert resp == bigfoot
+        assert resp == bigfoot.model_copy(update={"version": 3})
     inner()
 
 
@@ -86,7 +161,34 @@ def test_modify(bigfoot: Creature) -> None:
     def inner(cursor: Cursor) -> None:
         bigfoot.description = f"I'm Bigfoot {key_num}"
         resp = data.modify(cursor, bigfoot.name, PartialCreature(description=bigfoot.description))
-        assert resp == bigfoot
+        assert resp == bigfoot.model_copy(update={"version": 4})
+    inner()
+
+
+def test_modify_unchanged_writes_nothing(bigfoot: Creature) -> None:
+    @transaction_with(new_conn=False)
+    def inner(cursor: Cursor) -> None:
+        stored = data.get_one(cursor, bigfoot.name)
+        changes = cursor.connection.total_changes
+        resp = data.modify(cursor, bigfoot.name, PartialCreature(description=stored.description, aka=None))
+        assert resp == stored
+        assert cursor.connection.total_changes == changes
+        assert data.modify(cursor, bigfoot.name, PartialCreature()) == stored
+    inner()
+
+
+def test_write_at_version(bigfoot: Creature) -> None:
+    @transaction_with(new_conn=False)
+    def inner(cursor: Cursor) -> None:
+        version = data.get_one(cursor, bigfoot.name).version
+        with pytest.raises(VersionMismatchError):
+            _ = data.modify(cursor, bigfoot.name, PartialCreature(area="Pacific Northwest"), version=version - 1)
+        resp = data.modify(cursor, bigfoot.name, PartialCreature(area="Pacific Northwest"), version=version)
+        assert resp.version == version + 1
+        with pytest.raises(VersionMismatchError):
+            _ = data.replace(cursor, bigfoot.name, bigfoot, version=version)
+        with pytest.raises(VersionMismatchError):
+            data.delete(cursor, bigfoot.name, version=version)
     inner()
 
 
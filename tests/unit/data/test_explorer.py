@@ -4,8 +4,9 @@ import pytest
 
 from cryptid.data import explorer as data
 from cryptid.data.init import Cursor, get_cursor, transaction_with
-from cryptid.error import EntityAlreadyExistsError, EntityNotFoundError
-from cryptid.model.explorer import Explorer, PartialExplorer
+from cryptid.error import EntityAlreadyExistsError, EntityNotFoundError, VersionMismatchError
+from cryptid.model.bulk import BulkMode
+from cryptid.model.explorer import Explorer, ExplorerFilter, PartialExplorer
 
 from tests.common import count
 
@@ -34,7 +35,7 @@ def test_create(claude: Explorer) -> None:
     @transaction_with(new_conn=False)
     def inner(cursor: Cursor) -> None:
         resp = data.create(cursor, claude)
-        assert resp == claude
+        assert resp == claude.model_copy(update={"version": 1})
     inner()
 
 
@@ -46,14 +47,75 @@ def test_create_already_exists(claude: Explorer) -> None:
     inner()
 
 
+@pytest.mark.parametrize(("mode", "statuses"), [
+    ("insert", ["created", "failed", "failed"]),
+    ("upsert", ["created", "updated", "updated"]),
+    ("skip", ["created", "skipped", "skipped"]),
+])
+def test_create_many(claude: Explorer, mode: BulkMode, statuses: list[str]) -> None:
+    @transaction_with(new_conn=False)
+    def inner(cursor: Cursor) -> None:
+        name = f"Bulk {key_num} {mode}"
+        explorers = [Explorer(name=name, country="US"), Explorer(name=name, country="US", description="again"), claude]
+        resp = data.create_many(cursor, explorers, mode=mode)
+        assert [item.status for item in resp] == statuses
+        assert [item.index for item in resp] == [0, 1, 2]
+        assert data.get_one(cursor, name).description == ("again" if mode == "upsert" else "")
+        assert data.get_one(cursor, name).version == (2 if mode == "upsert" else 1)
+        assert data.get_one(cursor, claude.name).model_copy(update={"version": None}) == claude
+    inner()
+
+
 def test_get_all() -> None:
     resp = data.get_all(get_cursor())
     assert len(resp) > 0
 
 
+def test_iter_all() -> None:
+    resp = list(data.iter_all(get_cursor(), batch_size=1))
+    assert resp == data.get_all(get_cursor())
+
+
+def test_get_all_filtered() -> None:
+    resp = data.get_all(get_cursor(), filters=ExplorerFilter(country="FR"))
+    assert len(resp) > 0
+    assert all(explorer.country == "FR" for explorer in resp)
+
+
+@pytest.mark.parametrize("filters", [ExplorerFilter(country="FR")])
+def test_get_all_filtered_uses_index(filters: ExplorerFilter) -> None:
+    for after in (None, "A"):
+        sql, params = data.select_all(limit=10, after=after, filters=filters)
+        plan = [detail for *_, detail in get_cursor().execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+        assert any("USING INDEX explorer_" in detail for detail in plan), plan
+        assert not any(detail.startswith("SCAN explorer") and "INDEX" not in detail for detail in plan), plan
+        assert not any("TEMP B-TREE" in detail for detail in plan), plan
+
+
+def test_search(claude: Explorer) -> None:
+    resp = data.search(get_cursor(), "moon")
+    assert claude.name in [hit.explorer.name for hit in resp]
+    assert all("<mark>" in hit.snippet for hit in resp)
+    assert data.search(get_cursor(), "   ") == []
+
+
+def test_search_follows_writes() -> None:
+    @transaction_with(new_conn=False)
+    def inner(cursor: Cursor) -> None:
+        name = f"Search {key_num}"
+        data.create(cursor, Explorer(name=name, country="US", description=f"old{key_num}"))
+        assert [hit.explorer.name for hit in data.search(cursor, f"old{key_num}")] == [name]
+        data.modify(cursor, name, PartialExplorer(description=f"new{key_num}"))
+        assert data.search(cursor, f"old{key_num}") == []
+        assert [hit.explorer.name for hit in data.search(cursor, f"new{key_num}")] == [name]
+        data.delete(cursor, name)
+        assert data.search(cursor, f"new{key_num}") == []
+    inner()
+
+
 def test_get_one(claude: Explorer) -> None:
     resp = data.get_one(get_cursor(), claude.name)
-    assert resp == claude
+    assert resp == claude.model_copy(update={"version": 2})
 
 
 def test_get_one_not_found(noah: Explorer) -> None:
@@ -65,7 +127,7 @@ def test_replace(claude: Explorer, noah: Explorer) -> None:
     @transaction_with(new_conn=False)
     def inner(cursor: Cursor) -> None:
         resp = data.replace(cursor, claude.name, noah)
-        assert resp == noah
+        assert resp == noah.model_copy(update={"version": 3})
     inner()
 
 
@@ -82,7 +144,32 @@ def test_modify(noah: Explorer) -> None:
     def inner(cursor: Cursor) -> None:
         noah.description = f"I'm Noah Weiser {key_num}"
         resp = data.modify(cursor, noah.name, PartialExplorer(description=noah.description))
-        assert resp == noah
+        assert resp == noah.model_copy(update={"version": 4})
+    inner()
+
+
+def test_modify_unchanged(noah: Explorer) -> None:
+    @transaction_with(new_conn=False)
+    def inner(cursor: Cursor) -> None:
+        stored = data.get_one(cursor, noah.name)
+        changes = cursor.connection.total_changes
+        assert data.modify(cursor, noah.name, PartialExplorer(description=stored.description)) == stored
+        assert cursor.connection.total_changes == changes
+    inner()
+
+
+def test_write_at_version(noah: Explorer) -> None:
+    @transaction_with(new_conn=False)
+    def inner(cursor: Cursor) -> None:
+        version = data.get_one(cursor, noah.name).version
+        with pytest.raises(VersionMismatchError):
+            _ = data.modify(cursor, noah.name, PartialExplorer(country="CA"), version=version - 1)
+        resp = data.modify(cursor, noah.name, PartialExplorer(country="CA"), version=version)
+        assert resp.version == version + 1
+        with pytest.raises(VersionMismatchError):
+            _ = data.replace(cursor, noah.name, noah, version=version)
+        with pytest.raises(VersionMismatchError):
+            data.delete(cursor, noah.name, version=version)
     inner()
 
 
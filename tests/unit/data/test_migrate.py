@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from pathlib import Path
+from sqlite3 import Connection, connect
+from typing import Iterator
+
+import pytest
+
+from cryptid.data import creature, xuser
+from cryptid.data.init import get_conn
+from cryptid.data.migrate import MIGRATIONS, apply_migrations, get_version, migration
+
+
+@pytest.fixture
+def conn(tmp_path: Path) -> Iterator[Connection]:
+    conn = connect(str(tmp_path / "test.db"))
+    yield conn
+    conn.close()
+
+
+def names(conn: Connection, type_: str) -> set[str]:
+    return {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = ?", (type_,))}
+
+
+def test_migrate() -> None:
+    assert get_version(get_conn()) == MIGRATIONS[-1].version
+
+
+def test_apply_migrations(conn: Connection) -> None:
+    assert apply_migrations(conn, target=2) == [1, 2]
+    assert get_version(conn) == 2
+    assert {"user", "xuser", "creature", "explorer"} <= names(conn, "table")
+    assert "creature_country" not in names(conn, "index")
+    assert apply_migrations(conn) == [m.version for m in MIGRATIONS[2:]]
+    assert "creature_country" in names(conn, "index")
+    assert apply_migrations(conn) == []
+
+
+def test_apply_migrations_adopts_unversioned_tables(conn: Connection) -> None:
+    conn.execute("CREATE TABLE creature (name TEXT PRIMARY KEY, country TEXT, area TEXT, description TEXT, aka TEXT)")
+    conn.execute("INSERT INTO creature VALUES ('Yeti', 'CN', 'Himalayas', 'Hirsute Himalayan', '')")
+    conn.commit()
+    apply_migrations(conn)
+    assert [hit.creature.name for hit in creature.search(conn.cursor(), "hirsute")] == ["Yeti"]
+
+
+def test_apply_migrations_failure_rolls_back(conn: Connection) -> None:
+    @migration(MIGRATIONS[-1].version + 1, "fail")
+    def fail(cursor) -> None:
+        cursor.execute("CREATE TABLE half_done (x)")
+        raise RuntimeError("failed")
+
+    try:
+        with pytest.raises(RuntimeError):
+            apply_migrations(conn)
+        assert get_version(conn) == MIGRATIONS[-2].version
+        assert "half_done" not in names(conn, "table")
+    finally:
+        MIGRATIONS.pop()
+
+
+def test_migration_version_must_be_next() -> None:
+    with pytest.raises(ValueError):
+        migration(MIGRATIONS[-1].version + 2, "skip")(lambda cursor: None)
+
+
+def test_epoch_micros_migration_keeps_users(conn: Connection) -> None:
+    apply_migrations(conn, target=6)
+    conn.execute("""
+    INSERT INTO user (name, hash, roles, created_at, updated_at)
+    VALUES ('Mike', 'hash', '["user"]', '2020-01-01T00:00:00.000001+00:00', '2020-01-01 00:00:01')
+    """)
+    conn.execute("INSERT INTO user (name, hash, roles) VALUES ('John', 'hash', '[\"admin\"]')")
+    conn.execute("INSERT INTO xuser SELECT *, CURRENT_TIMESTAMP FROM user WHERE name = 'John'")
+    conn.execute("DELETE FROM user WHERE name = 'John'")
+    conn.commit()
+    apply_migrations(conn)
+    assert conn.execute("SELECT created_at, updated_at FROM user").fetchall() == [
+        (1577836800000001, 1577836801000000),
+    ]
+    assert [user.name for user in xuser.get_all(conn.cursor(), role="admin")] == ["John"]
+    # A new user must not reuse the id of the deleted user.
+    conn.execute("INSERT INTO user (name, hash, roles, created_at, updated_at) VALUES ('Noah', 'hash', '[]', 0, 0)")
+    assert conn.execute("SELECT id FROM user WHERE name = 'Noah'").fetchone() == (3,)
+    assert {"user_created_at", "xuser_created_at", "xuser_deleted_at"} <= names(conn, "index")
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from sqlite3 import Connection, connect
+
+import pytest
+
+from cryptid.data import init
+from cryptid.data.init import Cursor, async_query, async_stream, get_conn, get_pool_stats, query, transaction
+from cryptid.data.pool import ConnectionPool
+from cryptid.error import PoolTimeoutError
+
+
+def make_pool(size: int = 2, timeout: float = 0.1) -> ConnectionPool:
+    return ConnectionPool(lambda: connect(":memory:", check_same_thread=False), size=size, timeout=timeout)
+
+
+def test_acquire_opens_lazily() -> None:
+    pool = make_pool()
+    assert pool.stats().opened == 0
+    conn = pool.acquire()
+    stats = pool.stats()
+    assert stats.opened == 1
+    assert stats.in_use == 1
+    pool.release(conn)
+    stats = pool.stats()
+    assert stats.in_use == 0
+    assert stats.idle == 1
+
+
+def test_release_reuses_connection() -> None:
+    pool = make_pool()
+    with pool.connection() as conn1:
+        pass
+    with pool.connection() as conn2:
+        pass
+    assert conn1 is conn2
+    assert pool.stats().opened == 1
+
+
+def test_acquire_timeout() -> None:
+    pool = make_pool(size=1)
+    with pool.connection():
+        with pytest.raises(PoolTimeoutError):
+            _ = pool.acquire()
+    stats = pool.stats()
+    assert stats.timeouts == 1
+    assert stats.waiters == 0
+    assert stats.wait_time_max > 0
+
+
+def test_acquire_waits_for_release() -> None:
+    pool = make_pool(size=1, timeout=5)
+    conn = pool.acquire()
+    acquired: list[Connection] = []
+    waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+    waiter.start()
+    while pool.stats().waiters == 0:
+        pass
+    pool.release(conn)
+    waiter.join()
+    assert acquired == [conn]
+
+
+def test_release_rolls_back() -> None:
+    pool = make_pool(size=1)
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.commit()
+        conn.execute("INSERT INTO t VALUES (1)")
+        assert conn.in_transaction
+    with pool.connection() as conn:
+        assert not conn.in_transaction
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone() == (0,)
+
+
+def test_transaction_binds_conn() -> None:
+    @transaction
+    def outer(cursor: Cursor) -> None:
+        assert get_conn() is cursor.connection
+        inner()
+
+    @query
+    def inner(cursor: Cursor) -> None:
+        assert get_conn() is cursor.connection
+
+    def run() -> None:
+        outer()
+        assert get_pool_stats().in_use == in_use
+
+    in_use = get_pool_stats().in_use
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        executor.submit(run).result()
+
+
+def test_get_conn_outside_transaction_is_not_pooled() -> None:
+    stats = get_pool_stats()
+    conn1, conn2 = get_conn(), get_conn()
+    try:
+        assert conn1 is not conn2
+        assert get_pool_stats().in_use == stats.in_use
+    finally:
+        conn1.close()
+        conn2.close()
+
+
+def test_open_streams_leave_the_queries_their_connections() -> None:
+    def rows(cursor: Cursor):
+        yield from cursor.execute("SELECT 1 UNION ALL SELECT 2")
+
+    @async_query
+    def one(cursor: Cursor) -> int:
+        return cursor.execute("SELECT 1").fetchone()[0]
+
+    async def run() -> None:
+        in_use = get_pool_stats().in_use
+        streams = [async_stream(rows, batch_size=1)() for _ in range(init._streams.size)]
+        try:
+            assert [await anext(s) for s in streams] == [(1,)] * len(streams)
+            assert init._streams.stats().in_use == len(streams)
+            assert get_pool_stats().in_use == in_use
+            assert await asyncio.wait_for(one(), timeout=5) == 1
+        finally:
+            for s in streams:
+                await s.aclose()
+        assert init._streams.stats().in_use == 0
+
+    asyncio.run(run())
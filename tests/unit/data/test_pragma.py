@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from pathlib import Path
+from sqlite3 import connect
+
+import pytest
+
+from cryptid.data.pragma import PROFILES, apply_profile, get_profile
+
+
+def test_get_profile() -> None:
+    assert get_profile("durable") == PROFILES["durable"]
+
+
+def test_get_profile_unknown() -> None:
+    with pytest.raises(ValueError):
+        _ = get_profile("reckless")
+
+
+def test_get_profile_override(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("CRYPTID_SQLITE_PRAGMA_CACHE_SIZE", "-1024")
+    assert get_profile("balanced")["cache_size"] == "-1024"
+    assert PROFILES["balanced"]["cache_size"] != "-1024"
+
+
+def test_get_profile_override_invalid(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("CRYPTID_SQLITE_PRAGMA_SYNCHRONOUS", "OFF; DROP TABLE user")
+    with pytest.raises(ValueError):
+        _ = get_profile("balanced")
+
+
+def test_apply_profile(tmp_path: Path) -> None:
+    conn = connect(tmp_path / "test.db")
+    apply_profile(conn, PROFILES["balanced"])
+    assert conn.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    assert conn.execute("PRAGMA synchronous").fetchone() == (1,)  # NORMAL
+    assert conn.execute("PRAGMA busy_timeout").fetchone() == (5_000,)
+    conn.close()
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from cryptid.data.row import construct, json_list
+from cryptid.model.creature import Creature
+from cryptid.model.user import PrivateUser
+
+
+def test_construct() -> None:
+    values = {
+        "name": "Yeti",
+        "country": "CN",
+        "area": "Himalayas",
+        "description": "Hirsute",
+        "aka": "Snowman",
+        "version": 1,
+    }
+    resp = construct(Creature, dict(values))
+    assert resp == Creature(**values)
+    assert resp.model_dump_json() == Creature(**values).model_dump_json()
+    assert resp.model_fields_set == set(values)
+    resp.area = "*"
+    assert resp.model_dump()["area"] == "*"
+
+
+def test_construct_subclass() -> None:
+    now = datetime.now(timezone.utc)
+    values = {
+        "id": "1",
+        "name": "Mike",
+        "roles": ["user"],
+        "created_at": now,
+        "updated_at": now,
+        "deleted_at": None,
+        "version": 1,
+        "hash": "hash",
+    }
+    resp = construct(PrivateUser, dict(values))
+    assert resp == PrivateUser(**values)
+    assert resp.model_dump_json() == PrivateUser(**values).model_dump_json()
+
+
+def test_json_list() -> None:
+    resp = json_list('["user", "admin"]')
+    assert resp == ["user", "admin"]
+    resp.append("keeper")
+    assert json_list('["user", "admin"]') == ["user", "admin"]
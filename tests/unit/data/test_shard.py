@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from typing import Iterator
+
+import pytest
+
+from cryptid.backend import configure
+from cryptid.data.reshard import reshard
+from cryptid.data.shard import ShardSet, open_shards, shard_of, shard_paths
+from cryptid.error import EntityAlreadyExistsError, EntityNotFoundError, VersionMismatchError
+from cryptid.model.creature import Creature, PartialCreature
+from cryptid.service import creature as service
+from cryptid.service.aio import creature as aio_service
+
+from tests.common import count
+
+key_num: int = count()
+
+SHARDS: int = 3
+
+
+@pytest.fixture
+def shards() -> Iterator[ShardSet]:
+    shards = open_shards(SHARDS)
+    shards.migrate()
+    configure("sharded")
+    yield shards
+
+
+def creatures(n: int) -> list[Creature]:
+    return [Creature(name=f"Creature {key_num} {i:03}", country="US", area=str(i)) for i in range(n)]
+
+
+# A name that routes to another shard than `name`.
+def other_shard_name(name: str) -> str:
+    return next(f"{name} {i}" for i in range(100) if shard_of(f"{name} {i}", SHARDS) != shard_of(name, SHARDS))
+
+
+def rows(shards: ShardSet, index: int) -> set[str]:
+    with shards.connection(index) as conn:
+        return {name for (name,) in conn.execute("SELECT name FROM creature")}
+
+
+def test_shard_of() -> None:
+    assert shard_of("Yeti", 4) == shard_of("Yeti", 4)
+    spread = Counter(shard_of(f"Creature {i}", 4) for i in range(4000))
+    assert sorted(spread) == [0, 1, 2, 3]
+    assert min(spread.values()) > 800
+
+
+def test_shard_paths() -> None:
+    assert shard_paths("db/cryptid.db", 1) == ["db/cryptid.db"]
+    assert shard_paths("db/cryptid.db", 2) == ["db/cryptid.shard-0-of-2.db", "db/cryptid.shard-1-of-2.db"]
+
+
+def test_route(shards: ShardSet) -> None:
+    for creature in creatures(10):
+        service.create(creature)
+        assert creature.name in rows(shards, shard_of(creature.name, SHARDS))
+        assert service.get_one(creature.name).name == creature.name
+
+
+def test_get_all_merges_shards(shards: ShardSet) -> None:
+    models = creatures(20)
+    service.create_many(models)
+    names = sorted(model.name for model in models)
+    assert [c.name for c in service.get_all()] == names
+    assert [c.name for c in service.get_all(limit=5, after=names[4])] == names[5:10]
+    assert [c.name for c in service.iter_all()] == names
+
+
+def test_create_many_reports_positions(shards: ShardSet) -> None:
+    models = creatures(6)
+    service.create(models[2])
+    items = service.create_many(models, mode="skip")
+    assert [item.index for item in items] == list(range(6))
+    assert [item.name for item in items] == [model.name for model in models]
+    assert items[2].status == "skipped"
+
+
+def test_rename_to_other_shard(shards: ShardSet) -> None:
+    (yeti,) = creatures(1)
+    service.create(yeti)
+    name = other_shard_name(yeti.name)
+    with pytest.raises(VersionMismatchError):
+        service.modify(yeti.name, PartialCreature(name=name), version=2)
+    moved = service.modify(yeti.name, PartialCreature(name=name, area="Himalayas"), version=1)
+    assert moved == yeti.model_copy(update={"name": name, "area": "Himalayas", "version": 2})
+    assert service.get_one(name) == moved
+    with pytest.raises(EntityNotFoundError):
+        service.get_one(yeti.name)
+    service.create(yeti)
+    with pytest.raises(EntityAlreadyExistsError):
+        service.replace(yeti.name, moved)
+    assert service.get_one(yeti.name).version == 1
+
+
+def test_open_streams_leave_the_queries_their_connections(shards: ShardSet) -> None:
+    items = creatures(SHARDS * 2)
+    service.create_many(items)
+
+    async def run() -> None:
+        streams = [aio_service.iter_all() for _ in range(shards.max_streams)]
+        try:
+            for s in streams:
+                await anext(s)
+            assert all(stats.in_use == 0 for stats in shards.stats())
+            assert all(pool.stats().in_use == len(streams) for pool in shards._stream_pools)
+            assert (await asyncio.wait_for(aio_service.get_one(items[0].name), timeout=5)).name == items[0].name
+        finally:
+            for s in streams:
+                await s.aclose()
+
+    asyncio.run(run())
+
+
+def test_reshard(shards: ShardSet) -> None:
+    service.create_many(creatures(30))
+    target = ShardSet(2)
+    try:
+        copied = reshard(shards, target, batch_size=7)
+        assert copied["creature"] == sum(len(rows(shards, i)) for i in range(SHARDS))
+        for i in range(2):
+            assert all(shard_of(name, 2) == i for name in rows(target, i))
+        with pytest.raises(ValueError, match="must be empty"):
+            reshard(shards, target)
+    finally:
+        target.close()
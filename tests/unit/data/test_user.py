@@ -1,12 +1,14 @@
 from __future__ import annotations
 
+from datetime import datetime, timedelta, timezone
+
 import pytest
 
 from cryptid.data import user as data, xuser
 from cryptid.data.init import Cursor, get_cursor, transaction_with
-from cryptid.error import EntityAlreadyExistsError, EntityNotFoundError
-from cryptid.model.user import PartialUser, PrivateUser, PublicUser
-from cryptid.service.auth import make_hash
+from cryptid.error import EntityAlreadyExistsError, EntityNotFoundError, VersionMismatchError
+from cryptid.model.user import PartialUser, PrivateUser, PublicUser, UserFilter
+from cryptid.service.hasher import make_hash, verify_password
 
 from tests.common import count
 
@@ -49,6 +51,7 @@ def test_create(mike: PublicUser, mike_password: str) -> None:
         mike.id = resp.id
         mike.created_at = resp.created_at
         mike.updated_at = resp.updated_at
+        mike.version = 1
         assert resp == mike
     inner()
 
@@ -71,11 +74,66 @@ def test_get_all() -> None:
     assert len(resp) > 0
 
 
+def test_get_all_by_role(mike: PublicUser) -> None:
+    resp = data.get_all(get_cursor(), role="admin")
+    assert mike.id in [user.id for user in resp]
+    assert all("admin" in user.roles for user in resp)
+    assert data.get_all(get_cursor(), role="missing") == []
+
+
+def test_get_all_by_role_uses_index() -> None:
+    for after in (None, "1"):
+        sql, params = data.select_all(limit=10, after=after, role="admin")
+        plan = [detail for *_, detail in get_cursor().execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+        assert any(detail.startswith("SEARCH user_role") for detail in plan), plan
+        assert not any(detail.startswith("SCAN") or "TEMP B-TREE" in detail for detail in plan), plan
+
+
+def test_get_all_by_created_range(mike: PublicUser) -> None:
+    filters = UserFilter(created_after=mike.created_at - timedelta(seconds=1), created_before=mike.created_at)
+    assert mike.id not in [user.id for user in data.get_all(get_cursor(), filters=filters)]
+    filters.created_before = mike.created_at + timedelta(seconds=1)
+    resp = data.get_all(get_cursor(), filters=filters)
+    assert mike.id in [user.id for user in resp]
+    assert resp == sorted(resp, key=lambda user: (user.created_at, int(user.id)))
+    after = (resp[0].created_at, resp[0].id)
+    assert data.get_all(get_cursor(), after=after, filters=filters) == resp[1:]
+
+
+def test_get_all_by_created_range_uses_index() -> None:
+    filters = UserFilter(created_after=datetime(2000, 1, 1, tzinfo=timezone.utc))
+    for after in (None, (datetime.now(timezone.utc), "1")):
+        sql, params = data.select_all(limit=10, after=after, filters=filters)
+        plan = [detail for *_, detail in get_cursor().execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+        assert any("user_created_at" in detail for detail in plan), plan
+        assert not any("TEMP B-TREE" in detail for detail in plan), plan
+
+
+def test_role_index_follows_writes() -> None:
+    @transaction_with(new_conn=False)
+    def inner(cursor: Cursor) -> None:
+        user = data.create(cursor, PrivateUser(name=f"Role {key_num}", roles=["user", "keeper"], hash="hash"))
+        assert [u.id for u in data.get_all(cursor, role="keeper")] == [user.id]
+        data.modify(cursor, user.id, PartialUser(roles=["user"]))
+        assert data.get_all(cursor, role="keeper") == []
+        data.delete(cursor, user.id)
+        assert user.id not in [u.id for u in data.get_all(cursor, role="user")]
+        assert user.id in [u.id for u in xuser.get_all(cursor, role="user")]
+    inner()
+
+
 def test_get_one(mike: PublicUser) -> None:
     resp = data.get_one(get_cursor(), mike.id)
     assert resp == mike
 
 
+def test_get_one_private(mike: PublicUser, mike_password: str) -> None:
+    resp = data.get_one(get_cursor(), mike.id, public=False)
+    assert isinstance(resp, PrivateUser)
+    assert verify_password(mike_password, resp.hash)
+    assert PublicUser.model_validate(resp.model_dump(exclude={"hash"})) == mike
+
+
 def test_get_one_not_found(john: PublicUser) -> None:
     with pytest.raises(EntityNotFoundError):
         _ = data.get_one(get_cursor(), john.id)
@@ -88,6 +146,7 @@ def test_replace(mike: PublicUser, john: PublicUser) -> None:
         mike.name = john.name
         mike.roles = john.roles
         mike.updated_at = resp.updated_at
+        mike.version = 2
         assert resp == mike
     inner()
 
@@ -106,10 +165,32 @@ def test_modify(mike: PublicUser) -> None:
         mike.roles = ["user", "admin"]
         resp = data.modify(cursor, mike.id, PartialUser(roles=mike.roles))
         mike.updated_at = resp.updated_at
+        mike.version = 3
         assert resp == mike
     inner()
 
 
+def test_modify_unchanged_keeps_updated_at(mike: PublicUser) -> None:
+    @transaction_with(new_conn=False)
+    def inner(cursor: Cursor) -> None:
+        resp = data.modify(cursor, mike.id, PartialUser(name=mike.name, roles=mike.roles))
+        assert resp == mike
+    inner()
+
+
+def test_write_at_version(mike: PublicUser) -> None:
+    @transaction_with(new_conn=False)
+    def inner(cursor: Cursor) -> None:
+        with pytest.raises(VersionMismatchError):
+            _ = data.modify(cursor, mike.id, PartialUser(roles=["user"]), version=mike.version - 1)
+        with pytest.raises(VersionMismatchError):
+            _ = data.replace(cursor, mike.id, mike, version=mike.version - 1)
+        with pytest.raises(VersionMismatchError):
+            data.delete(cursor, mike.id, version=mike.version - 1)
+        assert data.modify(cursor, mike.id, PartialUser(), version=mike.version) == mike
+    inner()
+
+
 def test_modify_not_found(john: PublicUser) -> None:
     @transaction_with(new_conn=False)
     def inner(cursor: Cursor) -> None:
@@ -124,6 +205,7 @@ def test_delete(mike: PublicUser) -> None:
         assert data.delete(cursor, mike.id) is None
         resp = xuser.get_one(cursor, mike.id)
         mike.deleted_at = resp.deleted_at
+        mike.version = None
         assert resp == mike
     inner()
 
@@ -134,3 +216,19 @@ def test_delete_not_found(john: PublicUser) -> None:
         with pytest.raises(EntityNotFoundError):
             data.delete(cursor, john.id)
     inner()
+
+
+def test_delete_many(john: PublicUser) -> None:
+    @transaction_with(new_conn=False)
+    def inner(cursor: Cursor) -> None:
+        users = [data.create(cursor, PrivateUser(name=f"Bulk {key_num} {i}", hash="hash")) for i in range(2)]
+        ids = [users[0].id, john.id, users[1].id]
+        assert sorted(data.delete_many(cursor, ids)) == sorted(user.id for user in users)
+        for user in users:
+            with pytest.raises(EntityNotFoundError):
+                data.get_one(cursor, user.id)
+            archived = xuser.get_one(cursor, user.id, public=False)
+            assert archived.name == user.name and archived.hash == "hash"
+            assert archived.created_at == user.created_at and archived.deleted_at is not None
+        assert data.delete_many(cursor, ids) == []
+    inner()
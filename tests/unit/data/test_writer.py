@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from sqlite3 import Connection, IntegrityError, connect
+from typing import Iterator
+
+import pytest
+
+from cryptid.data.writer import GroupCommitWriter
+
+
+@pytest.fixture
+def db(tmp_path: Path) -> str:
+    path = str(tmp_path / "test.db")
+    with connect(path) as conn:
+        conn.execute("CREATE TABLE t (x INTEGER PRIMARY KEY)")
+    return path
+
+
+@pytest.fixture
+def writer(db: str) -> Iterator[GroupCommitWriter]:
+    writer = GroupCommitWriter(lambda: connect(db, check_same_thread=False))
+    yield writer
+    writer.close()
+
+
+def insert(x: int):
+    def job(conn: Connection) -> int:
+        conn.execute("INSERT INTO t VALUES (?)", (x,))
+        return x
+    return job
+
+
+def select_all(db: str) -> list[int]:
+    with connect(db) as conn:
+        return [x for (x,) in conn.execute("SELECT x FROM t ORDER BY x")]
+
+
+def test_submit(db: str, writer: GroupCommitWriter) -> None:
+    assert writer.submit(insert(1)) == 1
+    assert select_all(db) == [1]
+
+
+def test_submit_failure_rolls_back_only_its_job(db: str, writer: GroupCommitWriter) -> None:
+    started = threading.Event()
+    blocker = threading.Event()
+
+    def block(_: Connection) -> bool:
+        started.set()
+        return blocker.wait()
+
+    # Hold the writer busy, so the following jobs are committed in one batch.
+    blocked = writer.submit_future(block)
+    started.wait()
+    futures = [writer.submit_future(insert(x)) for x in (1, 1, 2)]
+    blocker.set()
+    assert blocked.result()
+    assert futures[0].result() == 1
+    with pytest.raises(IntegrityError):
+        futures[1].result()
+    assert futures[2].result() == 2
+    assert select_all(db) == [1, 2]
+    stats = writer.stats()
+    assert stats.batches == 2
+    assert stats.max_batch_size == 3
+    assert stats.transactions == 4
+    assert stats.failed == 1
+
+
+def test_submit_closed(writer: GroupCommitWriter) -> None:
+    writer.close()
+    with pytest.raises(RuntimeError):
+        writer.submit(insert(1))
@@ -1,14 +1,15 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 import pytest
 
 from cryptid.data import xuser as data
 from cryptid.data.init import Cursor, get_cursor, transaction_with
+from cryptid.data.row import to_micros
 from cryptid.error import EntityAlreadyExistsError, EntityNotFoundError
-from cryptid.model.user import PartialUser, PrivateUser, PublicUser
-from cryptid.service.auth import make_hash
+from cryptid.model.user import PartialUser, PrivateUser, PublicUser, UserFilter
+from cryptid.service.hasher import make_hash
 
 from tests.common import count
 
@@ -142,3 +143,36 @@ def test_delete_not_found(john: PublicUser) -> None:
         with pytest.raises(EntityNotFoundError):
             data.delete(cursor, john.id)
     inner()
+
+
+def test_purge() -> None:
+    @transaction_with(new_conn=False)
+    def inner(cursor: Cursor) -> None:
+        long_ago = datetime(2000, 1, 1, tzinfo=timezone.utc)
+        for i in range(3):
+            data.create(cursor, PrivateUser(
+                id=str(200000 + i),
+                name=f"Purge {key_num} {i}",
+                roles=["purged"],
+                created_at=long_ago,
+                updated_at=long_ago,
+                hash="hash",
+            ))
+        cursor.execute("UPDATE xuser SET deleted_at = :deleted_at WHERE id >= 200000", {
+            "deleted_at": to_micros(long_ago),
+        })
+        filters = UserFilter(deleted_before=long_ago + timedelta(days=1))
+        names = [f"Purge {key_num} {i}" for i in range(3)]
+        assert [user.name for user in data.get_all(cursor, filters=filters)] == names
+        assert data.purge(cursor, before=long_ago + timedelta(days=1), limit=2) == 2
+        assert data.purge(cursor, before=long_ago + timedelta(days=1), limit=2) == 1
+        assert data.purge(cursor, before=long_ago + timedelta(days=1), limit=2) == 0
+        assert data.get_all(cursor, role="purged") == []
+    inner()
+
+
+def test_purge_uses_index() -> None:
+    sql = "EXPLAIN QUERY PLAN SELECT id FROM xuser WHERE deleted_at < :before ORDER BY deleted_at LIMIT 10"
+    plan = [detail for *_, detail in get_cursor().execute(sql, {"before": 0})]
+    assert any("xuser_deleted_at" in detail for detail in plan), plan
+    assert not any("TEMP B-TREE" in detail for detail in plan), plan
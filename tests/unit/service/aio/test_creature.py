@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from cryptid.error import EntityAlreadyExistsError, EntityNotFoundError
+from cryptid.model.creature import Creature, PartialCreature
+from cryptid.service.aio import creature as service
+
+from tests.common import count
+
+key_num: int = count()
+
+
+@pytest.fixture
+def yeti() -> Creature:
+    return Creature(
+        name=f"Yeti {key_num}",
+        country="CN",
+        area="Himalayas",
+        description="Hirsute Himalayan",
+        aka="Abominable Snowman",
+    )
+
+
+@pytest.fixture
+def bigfoot() -> Creature:
+    return Creature(
+        name=f"Bigfoot {key_num}",
+        country="US",
+        area="*",
+        description="Yeti's Cousin Eddie",
+        aka="Sasquatch",
+    )
+
+
+def test_create(yeti: Creature) -> None:
+    resp = asyncio.run(service.create(yeti))
+    assert resp == yeti.model_copy(update={"version": 1})
+
+
+def test_create_already_exists(yeti: Creature) -> None:
+    with pytest.raises(EntityAlreadyExistsError):
+        _ = asyncio.run(service.create(yeti))
+
+
+def test_get_all() -> None:
+    resp = asyncio.run(service.get_all())
+    assert len(resp) > 0
+
+
+def test_get_one(yeti: Creature) -> None:
+    resp = asyncio.run(service.get_one(yeti.name))
+    assert resp == yeti.model_copy(update={"version": 1})
+
+
+def test_get_one_not_found(bigfoot: Creature) -> None:
+    with pytest.raises(EntityNotFoundError):
+        _ = asyncio.run(service.get_one(bigfoot.name))
+
+
+def test_replace(yeti: Creature, bigfoot: Creature) -> None:
+    resp = asyncio.run(service.replace(yeti.name, bigfoot))
+    assert resp == bigfoot.model_copy(update={"version": 2})
+
+
+def test_replace_not_found(yeti: Creature) -> None:
+    with pytest.raises(EntityNotFoundError):
+        _ = asyncio.run(service.replace(yeti.name, yeti))
+
+
+def test_modify(bigfoot: Creature) -> None:
+    bigfoot.description = f"I'm Bigfoot {key_num}"
+    resp = asyncio.run(service.modify(bigfoot.name, PartialCreature(description=bigfoot.description)))
+    assert resp == bigfoot.model_copy(update={"version": 3})
+
+
+def test_modify_not_found(yeti: Creature) -> None:
+    with pytest.raises(EntityNotFoundError):
+        _ = asyncio.run(service.modify(yeti.name, PartialCreature()))
+
+
+def test_delete(bigfoot: Creature) -> None:
+    assert asyncio.run(service.delete(bigfoot.name)) is None
+
+
+def test_delete_not_found(bigfoot: Creature) -> None:
+    with pytest.raises(EntityNotFoundError):
+        asyncio.run(service.delete(bigfoot.name))
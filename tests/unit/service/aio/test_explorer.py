@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from cryptid.error import EntityAlreadyExistsError, EntityNotFoundError
+from cryptid.model.explorer import Explorer, PartialExplorer
+from cryptid.service.aio import explorer as service
+
+from tests.common import count
+
+key_num: int = count()
+
+
+@pytest.fixture
+def claude() -> Explorer:
+    return Explorer(
+        name=f"Claude Hande {key_num}",
+        country="FR",
+        description="Hard to meet when the full moon rises",
+    )
+
+
+@pytest.fixture
+def noah() -> Explorer:
+    return Explorer(
+        name=f"Noah Weiser {key_num}",
+        country="DE",
+        description="Has poor eyesight and carries an axe",
+    )
+
+
+def test_create(claude: Explorer) -> None:
+    resp = asyncio.run(service.create(claude))
+    assert resp == claude.model_copy(update={"version": 1})
+
+
+def test_create_already_exists(claude: Explorer) -> None:
+    with pytest.raises(EntityAlreadyExistsError):
+        _ = asyncio.run(service.create(claude))
+
+
+def test_get_all() -> None:
+    resp = asyncio.run(service.get_all())
+    assert len(resp) > 0
+
+
+def test_get_one(claude: Explorer) -> None:
+    resp = asyncio.run(service.get_one(claude.name))
+    assert resp == claude.model_copy(update={"version": 1})
+
+
+def test_get_one_not_found(noah: Explorer) -> None:
+    with pytest.raises(EntityNotFoundError):
+        _ = asyncio.run(service.get_one(noah.name))
+
+
+def test_replace(claude: Explorer, noah: Explorer) -> None:
+    resp = asyncio.run(service.replace(claude.name, noah))
+    assert resp == noah.model_copy(update={"version": 2})
+
+
+def test_replace_not_found(claude: Explorer) -> None:
+    with pytest.raises(EntityNotFoundError):
+        _ = asyncio.run(service.replace(claude.name, claude))
+
+
+def test_modify(noah: Explorer) -> None:
+    noah.description = f"I'm Noah Weiser {key_num}"
+    resp = asyncio.run(service.modify(noah.name, PartialExplorer(description=noah.description)))
+    assert resp == noah.model_copy(update={"version": 3})
+
+
+def test_modify_not_found(claude: Explorer) -> None:
+    with pytest.raises(EntityNotFoundError):
+        _ = asyncio.run(service.modify(claude.name, PartialExplorer()))
+
+
+def test_delete(noah: Explorer) -> None:
+    assert asyncio.run(service.delete(noah.name)) is None
+
+
+def test_delete_not_found(noah: Explorer) -> None:
+    with pytest.raises(EntityNotFoundError):
+        asyncio.run(service.delete(noah.name))
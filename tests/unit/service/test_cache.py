@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import timedelta
+
+import pytest
+
+from cryptid.backend import configure
+from cryptid.data.init import get_conn
+from cryptid.data.migrate import migrate
+from cryptid.model.creature import Creature, PartialCreature
+from cryptid.service import cache as caches
+from cryptid.error import JWTValidationError
+from cryptid.model.auth import AuthUser
+from cryptid.service import auth
+from cryptid.service import creature as service
+from cryptid.service.cache import Cache, CacheStats, TokenCache, TokenCacheStats
+
+from tests.common import count
+
+key_num: int = count()
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def fail() -> str:
+    raise AssertionError("loaded")
+
+
+def test_hit_and_miss() -> None:
+    cache = Cache(ttl=10, clock=Clock())
+    assert cache.get("a", lambda: "A") == "A"
+    assert cache.get("a", fail) == "A"
+    assert cache.stats() == CacheStats(size=1, hits=1, stale_hits=0, misses=1, evictions=0, invalidations=0)
+
+
+def test_expire() -> None:
+    clock = Clock()
+    cache = Cache(ttl=10, clock=clock)
+    cache.get("a", lambda: "A")
+    clock.now = 10
+    assert cache.get("a", lambda: "B") == "B"
+    assert cache.stats().misses == 2
+
+
+def test_evict_least_recently_used() -> None:
+    cache = Cache(max_entries=2, ttl=10, clock=Clock())
+    cache.get("a", lambda: "A")
+    cache.get("b", lambda: "B")
+    cache.get("a", fail)
+    cache.get("c", lambda: "C")
+    assert cache.get("a", fail) == "A"
+    assert cache.get("b", lambda: "B2") == "B2"
+    assert cache.stats().evictions == 2
+
+
+def test_disabled() -> None:
+    cache = Cache(ttl=0)
+    cache.get("a", lambda: "A")
+    assert cache.get("a", lambda: "B") == "B"
+    assert cache.stats().size == 0
+
+
+def test_invalidate() -> None:
+    cache = Cache(ttl=10, clock=Clock())
+    cache.get("a", lambda: "A")
+    cache.invalidate("a")
+    assert cache.get("a", lambda: "B") == "B"
+
+
+def test_invalidate_during_load() -> None:
+    cache = Cache(ttl=10, clock=Clock())
+
+    def load() -> str:
+        cache.invalidate("a")
+        return "A"
+
+    assert cache.get("a", load) == "A"
+    assert cache.get("a", lambda: "B") == "B"
+
+
+def test_stale_while_revalidate() -> None:
+    clock = Clock()
+    cache = Cache(ttl=10, stale=10, clock=clock)
+    cache.get("a", lambda: "A")
+    clock.now = 15
+    assert cache.get("a", lambda: "B") == "A"
+    deadline = time.monotonic() + 5
+    while cache.get("a", fail) == "A" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cache.get("a", fail) == "B"
+    assert cache.stats().stale_hits >= 1
+    clock.now = 40
+    assert cache.get("a", lambda: "C") == "C"
+
+
+def test_stale_while_revalidate_async() -> None:
+    clock = Clock()
+    cache = Cache(ttl=10, stale=10, clock=clock)
+
+    async def load(value: str) -> str:
+        return value
+
+    async def run() -> None:
+        await cache.aget("a", lambda: load("A"))
+        clock.now = 15
+        assert await cache.aget("a", lambda: load("B")) == "A"
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert await cache.aget("a", lambda: load("C")) == "B"
+
+    asyncio.run(run())
+
+
+@pytest.fixture
+def yeti() -> Creature:
+    return Creature(name=f"Yeti {key_num}", country="CN", area="Himalayas")
+
+
+def test_service_invalidates(yeti: Creature) -> None:
+    service.create(yeti)
+    assert service.get_one(yeti.name).area == "Himalayas"
+    names = [c.name for c in service.get_all()]
+    hits = caches.creature.one.stats().hits
+    service.get_one(yeti.name)
+    assert caches.creature.one.stats().hits == hits + 1
+    service.modify(yeti.name, PartialCreature(area="Everest"))
+    assert service.get_one(yeti.name).area == "Everest"
+    service.delete(yeti.name)
+    assert [c.name for c in service.get_all()] == [name for name in names if name != yeti.name]
+
+
+def test_watch_invalidates_writes_of_other_workers(yeti: Creature) -> None:
+    backend = configure("sqlite")
+    migrate()
+    service.create(yeti)
+    service.get_one(yeti.name)
+    watcher = caches.watch(backend, interval=0.001)
+    try:
+        # Another worker writes with its own connection.
+        with get_conn(new=True) as conn:
+            conn.execute("UPDATE creature SET area = 'Everest' WHERE name = ?", (yeti.name,))
+        deadline = time.monotonic() + 5
+        while service.get_one(yeti.name).area != "Everest" and time.monotonic() < deadline:
+            time.sleep(0.001)
+        assert service.get_one(yeti.name).area == "Everest"
+        assert caches.get_change_stats() == watcher.stats()
+        assert watcher.stats().changes >= 1
+    finally:
+        caches.unwatch()
+        service.delete(yeti.name)
+    assert caches.get_change_stats() is None
+
+
+def test_token_cached_until_exp() -> None:
+    clock = Clock()
+    cache = TokenCache(max_entries=2, clock=clock)
+    assert cache.get("a", lambda _: ("A", 10)) == "A"
+    clock.now = 9.9
+    assert cache.get("a", fail) == "A"
+    clock.now = 10
+    assert cache.get("a", lambda _: ("B", 20)) == "B"
+    cache.get("b", lambda _: ("B", None))
+    cache.get("c", lambda _: ("C", None))
+    assert cache.stats() == TokenCacheStats(size=2, hits=1, misses=4, expirations=1, evictions=1)
+
+
+def test_token_failing_verification_not_cached() -> None:
+    cache = TokenCache(clock=Clock())
+    with pytest.raises(JWTValidationError):
+        cache.get("a", lambda _: auth.parse_jwt("a"))
+    assert cache.stats().size == 0
+
+
+def test_get_user_from_jwt() -> None:
+    token = auth.create_jwt({"sub": "mike", "roles": ["user"]}, expires_in=timedelta(minutes=1)).access
+    hits = caches.get_token_cache_stats().hits
+    assert auth.get_user_from_jwt(token) == AuthUser(id="mike", roles=["user"])
+    assert auth.get_user_from_jwt(token) == AuthUser(id="mike", roles=["user"])
+    assert caches.get_token_cache_stats().hits == hits + 1
+    with pytest.raises(JWTValidationError):
+        auth.get_user_from_jwt(token[:-2])
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import json
+import os
+import secrets
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from jose import JWTError, jwt
+from jose.exceptions import JOSEError
+
+from cryptid.service import cache
+from cryptid.service.codec import JWTCodec, Keyring, KeyringFile, load_codec
+
+
+def private_pem(algorithm: str) -> bytes:
+    key = ec.generate_private_key(ec.SECP256R1()) if algorithm == "ES256" else ed25519.Ed25519PrivateKey.generate()
+    return key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+
+
+def new_codec(algorithm: str) -> JWTCodec:
+    return JWTCodec(algorithm, secrets.token_urlsafe(32) if algorithm == "HS256" else private_pem(algorithm))
+
+
+@pytest.mark.parametrize("algorithm", ["HS256", "ES256", "EdDSA"])
+def test_encode_and_decode(algorithm: str) -> None:
+    codec = new_codec(algorithm)
+    token = codec.encode({"sub": "mike"}, headers={"kid": "1"})
+    assert codec.decode(token) == {"sub": "mike"}
+    with pytest.raises(JWTError):
+        new_codec(algorithm).decode(token)
+    with pytest.raises(JWTError):
+        codec.decode(codec.encode({"sub": "mike", "exp": datetime.now(UTC) - timedelta(seconds=1)}))
+
+
+@pytest.mark.parametrize("algorithm", ["ES256", "EdDSA"])
+def test_verify_with_public_jwk(algorithm: str) -> None:
+    codec = new_codec(algorithm)
+    jwk = codec.public_jwk()
+    assert jwk is not None and "d" not in jwk
+    verifier = JWTCodec(algorithm, jwk)
+    assert verifier.decode(codec.encode({"sub": "mike"})) == {"sub": "mike"}
+    with pytest.raises(JOSEError):
+        verifier.encode({"sub": "mike"})
+
+
+def test_load_codec(tmp_path: Path) -> None:
+    assert load_codec("HS256", "secret", None).public_jwk() is None
+    with pytest.raises(EnvironmentError):
+        load_codec("HS256", None, None)
+    with pytest.raises(EnvironmentError):
+        load_codec("EdDSA", "secret", None)
+    path = tmp_path / "jwt.pem"
+    path.write_bytes(private_pem("EdDSA"))
+    assert load_codec("EdDSA", None, str(path)).public_jwk()["crv"] == "Ed25519"
+
+
+def test_keyring() -> None:
+    new, old, shared = new_codec("EdDSA"), new_codec("ES256"), new_codec("HS256")
+    keyring = Keyring({"new": new, "old": old, "shared": shared})
+    token = keyring.encode({"sub": "mike"})
+    assert jwt.get_unverified_header(token)["kid"] == "new"
+    assert keyring.decode(token) == {"sub": "mike"}
+    assert keyring.decode(old.encode({"sub": "mike"}, headers={"kid": "old"})) == {"sub": "mike"}
+    assert keyring.decode(new.encode({"sub": "mike"})) == {"sub": "mike"}
+    with pytest.raises(JWTError):
+        keyring.decode(old.encode({"sub": "mike"}, headers={"kid": "gone"}))
+    with pytest.raises(JWTError):
+        keyring.decode(old.encode({"sub": "mike"}, headers={"kid": "new"}))
+    assert [key["kid"] for key in keyring.jwks()["keys"]] == ["new", "old"]
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_keyring_file_rotates(tmp_path: Path) -> None:
+    path = tmp_path / "keyring.json"
+    (tmp_path / "new.pem").write_bytes(private_pem("EdDSA"))
+
+    def write(keys: list[dict[str, str]], mtime: int) -> None:
+        path.write_text(json.dumps({"keys": keys}))
+        os.utime(path, ns=(mtime, mtime))
+
+    old = {"kid": "old", "alg": "HS256", "secret_key": secrets.token_urlsafe(32)}
+    new = {"kid": "new", "alg": "EdDSA", "private_key_file": "new.pem"}
+    write([old], 1)
+    clock = Clock()
+    keyring_file = KeyringFile(str(path), interval=10, clock=clock)
+    token = keyring_file.get().encode({"sub": "mike"})
+
+    write([new, old], 2)
+    assert keyring_file.get().kids == ["old"]
+    clock.now = 10
+    cache.token.get(token, lambda _: ("mike", None))
+    assert keyring_file.get().kids == ["new", "old"]
+    assert cache.token.stats().size == 0
+    assert keyring_file.get().decode(token) == {"sub": "mike"}
+
+    write([new, {"kid": "broken"}], 3)
+    assert not keyring_file.reload()
+    assert keyring_file.get().kids == ["new", "old"]
+    write([new], 4)
+    assert keyring_file.reload()
+    with pytest.raises(JWTError):
+        keyring_file.get().decode(token)
@@ -35,7 +35,7 @@ def bigfoot() -> Creature:
 
 def test_create(yeti: Creature) -> None:
     resp = service.create(yeti)
-    assert resp == yeti
+    assert resp == yeti.model_copy(update={"version": 1})
 
 
 def test_create_already_exists(yeti: Creature) -> None:
@@ -50,7 +50,7 @@ def test_get_all() -> None:
 
 def test_get_one(yeti: Creature) -> None:
     resp = service.get_one(yeti.name)
-    assert resp == yeti
+    assert resp == yeti.model_copy(update={"version": 1})
 
 
 def test_get_one_not_found(bigfoot: Creature) -> None:
@@ -60,7 +60,7 @@ def test_get_one_not_found(bigfoot: Creature) -> None:
 
 def test_replace(yeti: Creature, bigfoot: Creature) -> None:
     resp = service.replace(yeti.name, bigfoot)
-    assert resp == bigfoot
+    assert resp == bigfoot.model_copy(update={"version": 2})
 
 
 def test_replace_not_found(yeti: Creature) -> None:
@@ -71,7 +71,7 @@ def test_replace_not_found(yeti: Creature) -> None:
 def test_modify(bigfoot: Creature) -> None:
     bigfoot.description = f"I'm Bigfoot {key_num}"
     resp = service.modify(bigfoot.name, PartialCreature(description=bigfoot.description))
-    assert resp == bigfoot
+    assert resp == bigfoot.model_copy(update={"version": 3})
 
 
 def test_modify_not_found(yeti: Creature) -> None:
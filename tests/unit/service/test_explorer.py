@@ -31,7 +31,7 @@ def noah() -> Explorer:
 
 def test_create(claude: Explorer) -> None:
     resp = service.create(claude)
-    assert resp == claude
+    assert resp == claude.model_copy(update={"version": 1})
 
 
 def test_create_already_exists(claude: Explorer) -> None:
@@ -46,7 +46,7 @@ def test_get_all() -> None:
 
 def test_get_one(claude: Explorer) -> None:
     resp = service.get_one(claude.name)
-    assert resp == claude
+    assert resp == claude.model_copy(update={"version": 1})
 
 
 def test_get_one_not_found(noah: Explorer) -> None:
@@ -56,7 +56,7 @@ def test_get_one_not_found(noah: Explorer) -> None:
 
 def test_replace(claude: Explorer, noah: Explorer) -> None:
     resp = service.replace(claude.name, noah)
-    assert resp == noah
+    assert resp == noah.model_copy(update={"version": 2})
 
 
 def test_replace_not_found(claude: Explorer) -> None:
@@ -67,7 +67,7 @@ def test_replace_not_found(claude: Explorer) -> None:
 def test_modify(noah: Explorer) -> None:
     noah.description = f"I'm Noah Weiser {key_num}"
     resp = service.modify(noah.name, PartialExplorer(description=noah.description))
-    assert resp == noah
+    assert resp == noah.model_copy(update={"version": 3})
 
 
 def test_modify_not_found(claude: Explorer) -> None:
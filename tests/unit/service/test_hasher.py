@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Iterator
+
+import pytest
+
+from cryptid.error import HasherBusyError
+from cryptid.service.hasher import PasswordHasher
+
+
+@pytest.fixture(params=[0, 1], ids=["inline", "process"])
+def hasher(request: pytest.FixtureRequest) -> Iterator[PasswordHasher]:
+    hasher = PasswordHasher(workers=request.param, max_pending=2)
+    yield hasher
+    hasher.shutdown()
+
+
+def test_make_hash(hasher: PasswordHasher) -> None:
+    hashed = hasher.make_hash("mike1234")
+    assert hasher.verify_password("mike1234", hashed)
+    assert not hasher.verify_password("mike4321", hashed)
+    stats = hasher.stats()
+    assert (stats.pending, stats.completed, stats.rejected) == (0, 3, 0)
+
+
+def test_async_make_hash(hasher: PasswordHasher) -> None:
+    async def run() -> None:
+        hashed = await hasher.async_make_hash("mike1234")
+        assert await hasher.async_verify_password("mike1234", hashed)
+
+    asyncio.run(run())
+    assert hasher.stats().completed == 2
+
+
+def test_warm_up(hasher: PasswordHasher) -> None:
+    hasher.warm_up()
+    assert hasher.stats().completed == 0
+
+
+def test_admission_limit(hasher: PasswordHasher) -> None:
+    async def run() -> None:
+        hashes = [asyncio.create_task(hasher.async_make_hash("mike1234")) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert hasher.stats().pending == 2
+        assert hasher.stats().queued == 2 - hasher.workers
+        with pytest.raises(HasherBusyError):
+            await hasher.async_make_hash("mike1234")
+        await asyncio.gather(*hashes)
+
+    asyncio.run(run())
+    stats = hasher.stats()
+    assert (stats.pending, stats.peak_pending, stats.completed, stats.rejected) == (0, 2, 2, 1)
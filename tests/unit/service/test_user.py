@@ -45,6 +45,7 @@ def test_create(mike: PublicUser, mike_password: str) -> None:
     mike.id = resp.id
     mike.created_at = resp.created_at
     mike.updated_at = resp.updated_at
+    mike.version = 1
     assert resp == mike
 
 
@@ -78,6 +79,7 @@ def test_replace(mike: PublicUser, john: PublicUser) -> None:
     mike.name = john.name
     mike.roles = john.roles
     mike.updated_at = resp.updated_at
+    mike.version = 2
     assert resp == mike
 
 
@@ -90,6 +92,7 @@ def test_modify(mike: PublicUser) -> None:
     mike.roles = ["user", "admin"]
     resp = service.modify(mike.id, PartialUser(roles=mike.roles))
     mike.updated_at = resp.updated_at
+    mike.version = 3
     assert resp == mike
 
 
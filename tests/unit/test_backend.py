@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from cryptid import backend
+from cryptid.backend import Backend, configure, get_backend, register
+from cryptid.error import EntityNotFoundError
+from cryptid.fake.data import creature, explorer, init, user, xuser
+from cryptid.model.creature import Creature
+from cryptid.model.user import SignInUser
+from cryptid.service import creature as creature_service
+from cryptid.service import user as user_service
+
+from tests.common import count
+
+key_num: int = count()
+
+
+def test_configure_unknown():
+    with pytest.raises(ValueError, match="storage backend must be one of"):
+        configure("unknown")
+    assert get_backend().name == "memory"
+
+
+def test_configure_from_env(monkeypatch):
+    monkeypatch.setenv("CRYPTID_STORAGE_BACKEND", "memory")
+    assert configure().name == "memory"
+
+
+def test_register():
+    calls = []
+
+    def factory() -> Backend:
+        calls.append(1)
+        return Backend("custom", init, creature, explorer, user, xuser)
+
+    register("custom", factory)
+    try:
+        assert configure("custom") is get_backend()
+        assert get_backend().name == "custom"
+        configure("memory")
+        configure("custom")
+        assert calls == [1]
+    finally:
+        backend._factories.pop("custom")
+        backend._backends.pop("custom")
+
+
+def test_memory_service():
+    yeti = Creature(name=f"Yeti {key_num}", country="CN", area="Himalayas")
+    created = creature_service.create(yeti)
+    assert created == yeti.model_copy(update={"version": 1})
+    assert creature_service.get_one(yeti.name) == created
+    creature_service.delete(yeti.name)
+    with pytest.raises(EntityNotFoundError):
+        creature_service.get_one(yeti.name)
+
+
+def test_memory_service_purge_deleted():
+    bob = user_service.create(SignInUser(name=f"Bob {key_num}", password="bob12345"))
+    user_service.delete(bob.id)
+    assert user_service.get_one(bob.id, deleted=True).name == bob.name
+    assert user_service.purge_deleted(datetime.now(timezone.utc) + timedelta(seconds=1)) >= 1
+    with pytest.raises(EntityNotFoundError):
+        user_service.get_one(bob.id, deleted=True)
+
+
+def test_memory_async_transaction_waits_off_the_event_loop():
+    @init.async_transaction
+    def write(_) -> str:
+        return "written"
+
+    async def run() -> None:
+        task = asyncio.create_task(write())
+        # The event loop keeps running while a sync transaction holds the lock.
+        await asyncio.sleep(0.05)
+        assert not task.done()
+        released.set()
+        assert await asyncio.wait_for(task, timeout=5) == "written"
+
+    held, released = threading.Event(), threading.Event()
+
+    def hold() -> None:
+        with init._lock:
+            held.set()
+            released.wait(5)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    held.wait(5)
+    try:
+        asyncio.run(run())
+    finally:
+        released.set()
+        holder.join()
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from _pytest._code.code import ExceptionInfo
-from fastapi import HTTPException
+from fastapi import HTTPException, Request
 from starlette import status
 
 
@@ -13,3 +13,30 @@ def assert_already_exists_error(error: ExceptionInfo[HTTPException]) -> None:
 def assert_not_found_error(error: ExceptionInfo[HTTPException]) -> None:
     assert error.value.status_code == status.HTTP_404_NOT_FOUND
     assert "not found" in error.value.detail
+
+
+def assert_precondition_failed_error(error: ExceptionInfo[HTTPException]) -> None:
+    assert error.value.status_code == status.HTTP_412_PRECONDITION_FAILED
+    assert "version" in error.value.detail
+
+
+def make_request(
+    path: str,
+    query_string: str = "",
+    *,
+    method: str = "GET",
+    body: bytes = b"",
+    content_type: str = "application/json",
+) -> Request:
+    async def receive() -> dict:
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return Request({
+        "type": "http",
+        "method": method,
+        "scheme": "http",
+        "server": ("testserver", 80),
+        "path": path,
+        "query_string": query_string.encode("ascii"),
+        "headers": [(b"content-type", content_type.encode("ascii"))] if body else [],
+    }, receive)
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from fastapi import HTTPException, Response
+from starlette import status
+
+from cryptid.model.auth import AuthUser
+from cryptid.service import codec
+from cryptid.service.codec import JWTCodec, Keyring
+from cryptid.web import auth as web
+
+
+@pytest.fixture
+def keyring(monkeypatch: pytest.MonkeyPatch) -> Keyring:
+    pem = ed25519.Ed25519PrivateKey.generate().private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    keyring = Keyring({"2026-10": JWTCodec("EdDSA", pem), "2026-07": JWTCodec("HS256", "secret")})
+    monkeypatch.setattr(codec, "_keyring_file", None)
+    monkeypatch.setattr(codec, "_keyring", keyring)
+    return keyring
+
+
+def test_jwks(keyring: Keyring) -> None:
+    response = Response()
+    keys = asyncio.run(web.jwks(response, if_none_match=None))
+    assert [(key["kid"], key["alg"]) for key in keys["keys"]] == [("2026-10", "EdDSA")]
+    assert response.headers["Cache-Control"].startswith("public, max-age=")
+    not_modified = asyncio.run(web.jwks(Response(), if_none_match=f'"x", {response.headers["ETag"]}'))
+    assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+    assert not_modified.headers["ETag"] == response.headers["ETag"]
+
+
+def test_get_auth_user_by_kid(keyring: Keyring) -> None:
+    token = keyring.encode({"sub": "mike", "roles": ["user"]})
+    assert asyncio.run(web.get_auth_user(token)) == AuthUser(id="mike", roles=["user"])
+    forged = JWTCodec("HS256", "secret").encode({"sub": "mike", "roles": ["admin"]}, headers={"kid": "2026-10"})
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(web.get_auth_user(forged))
+    assert e.value.status_code == status.HTTP_401_UNAUTHORIZED
@@ -1,13 +1,23 @@
 from __future__ import annotations
 
+import asyncio
+import json
+
 import pytest
-from fastapi import HTTPException
+from fastapi import HTTPException, Response
+from starlette import status
 
-from cryptid.model.creature import Creature, PartialCreature
+from cryptid.model.creature import Creature, CreatureFilter, PartialCreature
 from cryptid.web import creature as web
+from cryptid.web.page import Page, decode_cursor
 
 from tests.common import count
-from tests.unit.web.common import assert_already_exists_error, assert_not_found_error
+from tests.unit.web.common import (
+    assert_already_exists_error,
+    assert_not_found_error,
+    assert_precondition_failed_error,
+    make_request,
+)
 
 key_num: int = count()
 
@@ -35,60 +45,129 @@ def bigfoot() -> Creature:
 
 
 def test_create(yeti: Creature) -> None:
-    resp = web.create(yeti)
-    assert resp == yeti
+    resp = asyncio.run(web.create(yeti, Response()))
+    assert resp == yeti.model_copy(update={"version": 1})
 
 
 def test_create_already_exists(yeti: Creature) -> None:
     with pytest.raises(HTTPException) as e:
-        _ = web.create(yeti)
+        _ = asyncio.run(web.create(yeti, Response()))
         assert_already_exists_error(e)
 
 
+def get_page(page: Page, response: Response | None = None, filters: CreatureFilter | None = None) -> list[Creature]:
+    request = make_request("/creatures")
+    return asyncio.run(web.get_all(request, response or Response(), page, filters, stream=False))
+
+
+def test_create_many(yeti: Creature) -> None:
+    body = [Creature(name=f"Bulk {key_num}", country="US", area="*").model_dump(), {"name": ""}, yeti.model_dump()]
+    for content_type, content, statuses in [
+        ("application/json", json.dumps(body), ["created", "failed", "skipped"]),
+        ("application/x-ndjson", "\n".join(json.dumps(item) for item in body), ["skipped", "failed", "skipped"]),
+    ]:
+        request = make_request("/creatures/bulk", method="POST", body=content.encode(), content_type=content_type)
+        resp = asyncio.run(web.create_many(request, mode="skip"))
+        assert [item.index for item in resp.items] == [0, 1, 2]
+        assert [item.status for item in resp.items] == statuses
+
+
+def test_create_many_invalid_body() -> None:
+    request = make_request("/creatures/bulk", method="POST", body=b'{"name": "not an array"}')
+    with pytest.raises(HTTPException) as e:
+        _ = asyncio.run(web.create_many(request, mode="insert"))
+    assert e.value.status_code == status.HTTP_400_BAD_REQUEST
+
+
 def test_get_all() -> None:
-    resp = web.get_all()
+    resp = get_page(Page())
     assert len(resp) > 0
 
 
+def test_get_all_paginated() -> None:
+    response = Response()
+    resp = get_page(Page(limit=1), response)
+    assert len(resp) == 1
+    assert 'rel="next"' in response.headers["Link"]
+    after = decode_cursor(response.headers["Link"].split("after=")[1].split(">")[0])
+    resp_next = get_page(Page(limit=1, after=after))
+    assert resp_next[0].name > resp[0].name
+
+
+def test_get_all_filtered() -> None:
+    resp = get_page(Page(), filters=CreatureFilter(country="US"))
+    assert len(resp) > 0
+    assert all(creature.country == "US" for creature in resp)
+
+
+def test_search(yeti: Creature) -> None:
+    request = make_request("/creatures/search")
+    resp = asyncio.run(web.search(request, Response(), "hirsute", Page()))
+    assert yeti.name in [hit.creature.name for hit in resp]
+
+
 def test_get_one(yeti: Creature) -> None:
-    resp = web.get_one(yeti.name)
-    assert resp == yeti
+    resp = asyncio.run(web.get_one(yeti.name, Response()))
+    assert resp == yeti.model_copy(update={"version": 1})
+
+
+def test_get_one_etag(yeti: Creature) -> None:
+    response = Response()
+    _ = asyncio.run(web.get_one(yeti.name, response))
+    assert response.headers["ETag"] == '"1"'
 
 
 def test_get_one_not_found(bigfoot: Creature) -> None:
     with pytest.raises(HTTPException) as e:
-        _ = web.get_one(bigfoot.name)
+        _ = asyncio.run(web.get_one(bigfoot.name, Response()))
         assert_not_found_error(e)
 
 
 def test_replace(yeti: Creature, bigfoot: Creature) -> None:
-    resp = web.replace(yeti.name, bigfoot)
-    assert resp == bigfoot
+    resp = asyncio.run(web.replace(yeti.name, bigfoot, Response(), version=None))
+    assert resp == bigfoot.model_copy(update={"version": 2})
 
 
 def test_replace_not_found(yeti: Creature) -> None:
     with pytest.raises(HTTPException) as e:
-        _ = web.replace(yeti.name, yeti)
+        _ = asyncio.run(web.replace(yeti.name, yeti, Response(), version=None))
         assert_not_found_error(e)
 
 
 def test_modify(bigfoot: Creature) -> None:
     bigfoot.description = f"I'm Bigfoot {key_num}"
-    resp = web.modify(bigfoot.name, PartialCreature(description=bigfoot.description))
-    assert resp == bigfoot
+    partial = PartialCreature(description=bigfoot.description)
+    resp = asyncio.run(web.modify(bigfoot.name, partial, Response(), version=None))
+    assert resp == bigfoot.model_copy(update={"version": 3})
+
+
+def test_modify_at_version(bigfoot: Creature) -> None:
+    with pytest.raises(HTTPException) as e:
+        _ = asyncio.run(web.modify(bigfoot.name, PartialCreature(area="Pacific Northwest"), Response(), version=2))
+    assert_precondition_failed_error(e)
+    response = Response()
+    resp = asyncio.run(web.modify(bigfoot.name, PartialCreature(area="Pacific Northwest"), response, version=3))
+    assert resp.version == 4
+    assert response.headers["ETag"] == '"4"'
 
 
 def test_modify_not_found(yeti: Creature) -> None:
     with pytest.raises(HTTPException) as e:
-        _ = web.modify(yeti.name, PartialCreature())
+        _ = asyncio.run(web.modify(yeti.name, PartialCreature(), Response(), version=None))
         assert_not_found_error(e)
 
 
+def test_delete_at_stale_version(bigfoot: Creature) -> None:
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(web.delete(bigfoot.name, version=1))
+    assert_precondition_failed_error(e)
+
+
 def test_delete(bigfoot: Creature) -> None:
-    assert web.delete(bigfoot.name) is None
+    assert asyncio.run(web.delete(bigfoot.name, version=None)) is None
 
 
 def test_delete_not_found(bigfoot: Creature) -> None:
     with pytest.raises(HTTPException) as e:
-        web.delete(bigfoot.name)
+        asyncio.run(web.delete(bigfoot.name, version=None))
         assert_not_found_error(e)
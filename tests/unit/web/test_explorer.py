@@ -1,13 +1,23 @@
 from __future__ import annotations
 
+import asyncio
+import json
+
 import pytest
-from fastapi import HTTPException
+from fastapi import HTTPException, Response
+from starlette import status
 
-from cryptid.model.explorer import Explorer, PartialExplorer
+from cryptid.model.explorer import Explorer, ExplorerFilter, PartialExplorer
 from cryptid.web import explorer as web
+from cryptid.web.page import Page, decode_cursor
 
 from tests.common import count
-from tests.unit.web.common import assert_already_exists_error, assert_not_found_error
+from tests.unit.web.common import (
+    assert_already_exists_error,
+    assert_not_found_error,
+    assert_precondition_failed_error,
+    make_request,
+)
 
 key_num: int = count()
 
@@ -31,60 +41,129 @@ def noah() -> Explorer:
 
 
 def test_create(claude: Explorer) -> None:
-    resp = web.create(claude)
-    assert resp == claude
+    resp = asyncio.run(web.create(claude, Response()))
+    assert resp == claude.model_copy(update={"version": 1})
 
 
 def test_create_already_exists(claude: Explorer) -> None:
     with pytest.raises(HTTPException) as e:
-        _ = web.create(claude)
+        _ = asyncio.run(web.create(claude, Response()))
         assert_already_exists_error(e)
 
 
+def get_page(page: Page, response: Response | None = None, filters: ExplorerFilter | None = None) -> list[Explorer]:
+    request = make_request("/explorers")
+    return asyncio.run(web.get_all(request, response or Response(), page, filters, stream=False))
+
+
+def test_create_many(claude: Explorer) -> None:
+    body = [Explorer(name=f"Bulk {key_num}", country="US").model_dump(), {"name": ""}, claude.model_dump()]
+    for content_type, content, statuses in [
+        ("application/json", json.dumps(body), ["created", "failed", "skipped"]),
+        ("application/x-ndjson", "\n".join(json.dumps(item) for item in body), ["skipped", "failed", "skipped"]),
+    ]:
+        request = make_request("/explorers/bulk", method="POST", body=content.encode(), content_type=content_type)
+        resp = asyncio.run(web.create_many(request, mode="skip"))
+        assert [item.index for item in resp.items] == [0, 1, 2]
+        assert [item.status for item in resp.items] == statuses
+
+
+def test_create_many_invalid_body() -> None:
+    request = make_request("/explorers/bulk", method="POST", body=b'{"name": "not an array"}')
+    with pytest.raises(HTTPException) as e:
+        _ = asyncio.run(web.create_many(request, mode="insert"))
+    assert e.value.status_code == status.HTTP_400_BAD_REQUEST
+
+
 def test_get_all() -> None:
-    resp = web.get_all()
+    resp = get_page(Page())
     assert len(resp) > 0
 
 
+def test_get_all_paginated() -> None:
+    response = Response()
+    resp = get_page(Page(limit=1), response)
+    assert len(resp) == 1
+    assert 'rel="next"' in response.headers["Link"]
+    after = decode_cursor(response.headers["Link"].split("after=")[1].split(">")[0])
+    resp_next = get_page(Page(limit=1, after=after))
+    assert resp_next[0].name > resp[0].name
+
+
+def test_get_all_filtered() -> None:
+    resp = get_page(Page(), filters=ExplorerFilter(country="FR"))
+    assert len(resp) > 0
+    assert all(explorer.country == "FR" for explorer in resp)
+
+
+def test_search(claude: Explorer) -> None:
+    request = make_request("/explorers/search")
+    resp = asyncio.run(web.search(request, Response(), "moon", Page()))
+    assert claude.name in [hit.explorer.name for hit in resp]
+
+
 def test_get_one(claude: Explorer) -> None:
-    resp = web.get_one(claude.name)
-    assert resp == claude
+    resp = asyncio.run(web.get_one(claude.name, Response()))
+    assert resp == claude.model_copy(update={"version": 1})
+
+
+def test_get_one_etag(claude: Explorer) -> None:
+    response = Response()
+    _ = asyncio.run(web.get_one(claude.name, response))
+    assert response.headers["ETag"] == '"1"'
 
 
 def test_get_one_not_found(noah: Explorer) -> None:
     with pytest.raises(HTTPException) as e:
-        _ = web.get_one(noah.name)
+        _ = asyncio.run(web.get_one(noah.name, Response()))
         assert_not_found_error(e)
 
 
 def test_replace(claude: Explorer, noah: Explorer) -> None:
-    resp = web.replace(claude.name, noah)
-    assert resp == noah
+    resp = asyncio.run(web.replace(claude.name, noah, Response(), version=None))
+    assert resp == noah.model_copy(update={"version": 2})
 
 
 def test_replace_not_found(claude: Explorer) -> None:
     with pytest.raises(HTTPException) as e:
-        _ = web.replace(claude.name, claude)
+        _ = asyncio.run(web.replace(claude.name, claude, Response(), version=None))
         assert_not_found_error(e)
 
 
 def test_modify(noah: Explorer) -> None:
     noah.description = f"I'm Noah Weiser {key_num}"
-    resp = web.modify(noah.name, PartialExplorer(description=noah.description))
-    assert resp == noah
+    partial = PartialExplorer(description=noah.description)
+    resp = asyncio.run(web.modify(noah.name, partial, Response(), version=None))
+    assert resp == noah.model_copy(update={"version": 3})
+
+
+def test_modify_at_version(noah: Explorer) -> None:
+    with pytest.raises(HTTPException) as e:
+        _ = asyncio.run(web.modify(noah.name, PartialExplorer(country="CA"), Response(), version=2))
+    assert_precondition_failed_error(e)
+    response = Response()
+    resp = asyncio.run(web.modify(noah.name, PartialExplorer(country="CA"), response, version=3))
+    assert resp.version == 4
+    assert response.headers["ETag"] == '"4"'
 
 
 def test_modify_not_found(claude: Explorer) -> None:
     with pytest.raises(HTTPException) as e:
-        _ = web.modify(claude.name, PartialExplorer())
+        _ = asyncio.run(web.modify(claude.name, PartialExplorer(), Response(), version=None))
         assert_not_found_error(e)
 
 
+def test_delete_at_stale_version(noah: Explorer) -> None:
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(web.delete(noah.name, version=1))
+    assert_precondition_failed_error(e)
+
+
 def test_delete(noah: Explorer) -> None:
-    assert web.delete(noah.name) is None
+    assert asyncio.run(web.delete(noah.name, version=None)) is None
 
 
 def test_delete_not_found(noah: Explorer) -> None:
     with pytest.raises(HTTPException) as e:
-        web.delete(noah.name)
+        asyncio.run(web.delete(noah.name, version=None))
         assert_not_found_error(e)
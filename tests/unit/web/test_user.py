@@ -1,13 +1,23 @@
 from __future__ import annotations
 
+import asyncio
+from datetime import datetime, timedelta, timezone
+
 import pytest
-from fastapi import HTTPException
+from fastapi import HTTPException, Response
 
-from cryptid.model.user import PartialUser, PublicUser, SignInUser
+from cryptid.model.user import PartialUser, PublicUser, SignInUser, UserFilter
+from cryptid.service import hasher
 from cryptid.web import user as web
+from cryptid.web.page import Page, decode_cursor
 
 from tests.common import count
-from tests.unit.web.common import assert_already_exists_error, assert_not_found_error
+from tests.unit.web.common import (
+    assert_already_exists_error,
+    assert_not_found_error,
+    assert_precondition_failed_error,
+    make_request,
+)
 
 key_num: int = count()
 
@@ -42,10 +52,11 @@ def test_create(mike: PublicUser, mike_password: str) -> None:
         roles=mike.roles,
         password=mike_password,
     )
-    resp = web.create(user)
+    resp = asyncio.run(web.create(user, Response()))
     mike.id = resp.id
     mike.created_at = resp.created_at
     mike.updated_at = resp.updated_at
+    mike.version = 1
     assert resp == mike
 
 
@@ -56,58 +67,138 @@ def test_create_already_exists(mike: PublicUser, mike_password: str) -> None:
         password=mike_password,
     )
     with pytest.raises(HTTPException) as e:
-        _ = web.create(user)
+        _ = asyncio.run(web.create(user, Response()))
         assert_already_exists_error(e)
 
 
+def get_page(
+    page: Page,
+    response: Response | None = None,
+    role: str | None = None,
+    filters: UserFilter | None = None,
+    deleted: bool = False,
+) -> list[PublicUser]:
+    request = make_request("/users")
+    return asyncio.run(web.get_all(
+        request,
+        response or Response(),
+        deleted=deleted,
+        role=role,
+        page=page,
+        filters=filters or UserFilter(),
+        stream=False,
+    ))
+
+
 def test_get_all() -> None:
-    resp = web.get_all(deleted=False)
+    resp = get_page(Page())
     assert len(resp) > 0
 
 
+def test_get_all_paginated() -> None:
+    response = Response()
+    resp = get_page(Page(limit=1), response)
+    assert len(resp) == 1
+    assert 'rel="next"' in response.headers["Link"]
+    after = decode_cursor(response.headers["Link"].split("after=")[1].split(">")[0])
+    resp_next = get_page(Page(limit=1, after=after))
+    assert int(resp_next[0].id) > int(resp[0].id)
+
+
+def test_get_all_by_role(mike: PublicUser) -> None:
+    resp = get_page(Page(), role="admin")
+    assert mike.id in [user.id for user in resp]
+    assert all("admin" in user.roles for user in resp)
+
+
+def test_get_all_by_created_range(mike: PublicUser) -> None:
+    filters = UserFilter(created_after=mike.created_at - timedelta(days=1))
+    response = Response()
+    resp = get_page(Page(limit=1), response, filters=filters)
+    assert len(resp) == 1 and resp[0].created_at > filters.created_after
+    after = decode_cursor(response.headers["Link"].split("after=")[1].split(">")[0])
+    resp_next = get_page(Page(limit=1, after=after), filters=filters)
+    assert (resp_next[0].created_at, int(resp_next[0].id)) > (resp[0].created_at, int(resp[0].id))
+    assert get_page(Page(), filters=UserFilter(created_before=mike.created_at - timedelta(days=1))) == []
+
+
+def test_get_all_by_deleted_range_requires_deleted() -> None:
+    with pytest.raises(HTTPException) as e:
+        get_page(Page(), filters=UserFilter(deleted_after=datetime.now(timezone.utc)))
+    assert e.value.status_code == 400
+
+
 def test_get_one(mike: PublicUser) -> None:
-    resp = web.get_one(mike.id, deleted=False)
+    resp = asyncio.run(web.get_one(mike.id, Response(), deleted=False))
     assert resp == mike
 
 
 def test_get_one_not_found(john: PublicUser) -> None:
     with pytest.raises(HTTPException) as e:
-        _ = web.get_one(john.id, deleted=False)
+        _ = asyncio.run(web.get_one(john.id, Response(), deleted=False))
         assert_not_found_error(e)
 
 
 def test_replace(mike: PublicUser, john: PublicUser) -> None:
-    resp = web.replace(mike.id, john)
+    resp = asyncio.run(web.replace(mike.id, john, Response(), version=None))
     mike.name = john.name
     mike.roles = john.roles
     mike.updated_at = resp.updated_at
+    mike.version = 2
     assert resp == mike
 
 
 def test_replace_not_found(john: PublicUser) -> None:
     with pytest.raises(HTTPException) as e:
-        _ = web.replace(john.id, john)
+        _ = asyncio.run(web.replace(john.id, john, Response(), version=None))
         assert_not_found_error(e)
 
 
 def test_modify(mike: PublicUser) -> None:
     mike.roles = ["user", "admin"]
-    resp = web.modify(mike.id, PartialUser(roles=mike.roles))
+    resp = asyncio.run(web.modify(mike.id, PartialUser(roles=mike.roles), Response(), version=None))
     mike.updated_at = resp.updated_at
+    mike.version = 3
     assert resp == mike
 
 
+def test_replace_at_stale_version(mike: PublicUser) -> None:
+    with pytest.raises(HTTPException) as e:
+        _ = asyncio.run(web.replace(mike.id, mike, Response(), version=mike.version - 1))
+    assert_precondition_failed_error(e)
+
+
 def test_modify_not_found(john: PublicUser) -> None:
     with pytest.raises(HTTPException) as e:
-        _ = web.modify(john.id, PartialUser())
+        _ = asyncio.run(web.modify(john.id, PartialUser(), Response(), version=None))
         assert_not_found_error(e)
 
 
 def test_delete(mike: PublicUser) -> None:
-    assert web.delete(mike.id) is None
+    assert asyncio.run(web.delete(mike.id, version=None)) is None
+
+
+def test_delete_many(john: PublicUser) -> None:
+    users = [
+        asyncio.run(web.create(SignInUser(name=f"Bulk {key_num} {i}", password="bulk1234"), Response()))
+        for i in range(2)
+    ]
+    resp = asyncio.run(web.delete_many([users[0].id, john.id, users[1].id]))
+    assert (resp.deleted, resp.failed) == (2, 1)
+    assert [item.status for item in resp.items] == ["deleted", "failed", "deleted"]
+    assert [item.id for item in resp.items] == [users[0].id, john.id, users[1].id]
 
 
 def test_delete_not_found(john: PublicUser) -> None:
     with pytest.raises(HTTPException) as e:
-        web.delete(john.id)
+        asyncio.run(web.delete(john.id, version=None))
         assert_not_found_error(e)
+
+
+def test_create_hasher_busy(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(hasher.get_hasher(), "max_pending", 0)
+    user = SignInUser(name=f"Busy {key_num}", password="busy1234")
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(web.create(user, Response()))
+    assert e.value.status_code == 503
+    assert e.value.headers == {"Retry-After": "1"}
@@ -1,14 +1,16 @@
 from __future__ import annotations
 
+import asyncio
+
 import pytest
-from fastapi import HTTPException
+from fastapi import HTTPException, Response
 
 from cryptid.model.auth import AuthUser
 from cryptid.model.user import PartialUser, PublicUser, SignInUser
 from cryptid.web import user as web
 
 from tests.common import count
-from tests.unit.web.common import assert_not_found_error
+from tests.unit.web.common import assert_not_found_error, assert_precondition_failed_error
 
 key_num: int = count()
 
@@ -48,56 +50,69 @@ def test_create(mike: PublicUser, mike_password: str) -> None:
         roles=mike.roles,
         password=mike_password,
     )
-    resp = web.create(user)
+    resp = asyncio.run(web.create(user, Response()))
     mike.id = resp.id
     mike.created_at = resp.created_at
     mike.updated_at = resp.updated_at
+    mike.version = 1
     assert resp == mike
 
 
 def test_get_me(mike: PublicUser) -> None:
-    resp = web.get_me(mike.to_auth_user())
+    resp = asyncio.run(web.get_me(Response(), mike.to_auth_user()))
     assert resp == mike
 
 
 def test_get_me_not_found(john: PublicUser) -> None:
     with pytest.raises(HTTPException) as e:
-        _ = web.get_me(john.to_auth_user())
+        _ = asyncio.run(web.get_me(Response(), john.to_auth_user()))
         assert_not_found_error(e)
 
 
 def test_replace_me(mike: PublicUser, john: PublicUser) -> None:
-    resp = web.replace_me(mike.to_auth_user(), john)
+    resp = asyncio.run(web.replace_me(Response(), mike.to_auth_user(), john, version=None))
     mike.name = john.name
     mike.roles = john.roles
     mike.updated_at = resp.updated_at
+    mike.version = 2
     assert resp == mike
 
 
 def test_replace_me_not_found(john: PublicUser) -> None:
     with pytest.raises(HTTPException) as e:
-        _ = web.replace_me(john.to_auth_user(), john)
+        _ = asyncio.run(web.replace_me(Response(), john.to_auth_user(), john, version=None))
         assert_not_found_error(e)
 
 
 def test_modify_me(mike: PublicUser) -> None:
     mike.roles = ["user", "admin"]
-    resp = web.modify_me(mike.to_auth_user(), PartialUser(roles=mike.roles))
+    resp = asyncio.run(web.modify_me(Response(), mike.to_auth_user(), PartialUser(roles=mike.roles), version=None))
     mike.updated_at = resp.updated_at
+    mike.version = 3
+    assert resp == mike
+
+
+def test_modify_me_at_version(mike: PublicUser) -> None:
+    with pytest.raises(HTTPException) as e:
+        _ = asyncio.run(web.modify_me(Response(), mike.to_auth_user(), PartialUser(roles=["user"]), version=1))
+    assert_precondition_failed_error(e)
+    response = Response()
+    resp = asyncio.run(web.modify_me(response, mike.to_auth_user(), PartialUser(), version=mike.version))
     assert resp == mike
+    assert response.headers["ETag"] == f'"{mike.version}"'
 
 
 def test_modify_me_not_found(john: PublicUser) -> None:
     with pytest.raises(HTTPException) as e:
-        _ = web.modify_me(john.to_auth_user(), PartialUser())
+        _ = asyncio.run(web.modify_me(Response(), john.to_auth_user(), PartialUser(), version=None))
         assert_not_found_error(e)
 
 
 def test_delete_me(mike: PublicUser) -> None:
-    assert web.delete_me(mike.to_auth_user()) is None
+    assert asyncio.run(web.delete_me(mike.to_auth_user(), version=None)) is None
 
 
 def test_delete_me_not_found(john: PublicUser) -> None:
     with pytest.raises(HTTPException) as e:
-        web.delete_me(john.to_auth_user())
+        asyncio.run(web.delete_me(john.to_auth_user(), version=None))
         assert_not_found_error(e)